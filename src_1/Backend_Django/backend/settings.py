@@ -64,17 +64,88 @@ INSTALLED_APPS = [
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        # TokenAuthentication con caché LRU+TTL de token -> usuario por proceso
+        'finances.authentication.CachedTokenAuthentication',
     ],
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    # JSON con orjson si está instalado (ver finances/renderers.py)
+    'DEFAULT_RENDERER_CLASSES': [
+        'finances.renderers.JSONRapidoRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'finances.parsers.JSONRapidoParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Paginación por cursor (opcional) de los listados de transacciones:
+# se activa con ?page_size=N o ?cursor=... (ver finances/pagination.py)
+API_PAGE_SIZE = int(os.environ.get('DJANGO_API_PAGE_SIZE', '50'))
+API_MAX_PAGE_SIZE = int(os.environ.get('DJANGO_API_MAX_PAGE_SIZE', '500'))
+
+# Segundos que se cachean las membresías usuario-grupo (ver finances/membresias.py).
+# Las escrituras en UsuarioGrupo invalidan la entrada; el TTL acota lo que puede
+# tardar en verse un cambio hecho por otro proceso si la caché no es compartida.
+MEMBRESIAS_CACHE_TTL = int(os.environ.get('DJANGO_MEMBRESIAS_CACHE_TTL', '300'))
+
+# Caché de autenticación por token (ver finances/authentication.py): número máximo
+# de tokens y segundos que un token se sirve sin volver a consultar la base de datos.
+# Las invalidaciones llegan a todos los workers por la caché de Django si es
+# compartida; el TTL solo acota el caso de LocMemCache con varios procesos.
+TOKEN_AUTH_CACHE_SIZE = int(os.environ.get('DJANGO_TOKEN_AUTH_CACHE_SIZE', '10000'))
+TOKEN_AUTH_CACHE_TTL = int(os.environ.get('DJANGO_TOKEN_AUTH_CACHE_TTL', '60'))
+
+# Caché de Django: memoria local en desarrollo y archivos en producción (compartida
+# entre los workers de un mismo servidor, necesario para que la invalidación de
+# membresías y versiones se vea en todos). DJANGO_CACHE_BACKEND/LOCATION permiten
+# usar cualquier otro backend (p. ej. django.core.cache.backends.redis.RedisCache).
+# Con varios servidores, o con muchos usuarios activos, Redis es lo recomendado:
+# la caché en archivos guarda una respuesta por usuario, ruta y query string y,
+# al llegar a MAX_ENTRIES, recorre el directorio y borra 1/CULL_FREQUENCY de los
+# archivos (versiones, membresías y tokens incluidos) dentro de la petición.
+# Los valores por defecto dejan margen para ese volumen y borran poco a la vez.
+if os.environ.get('DJANGO_CACHE_BACKEND'):
+    CACHES = {
+        'default': {
+            'BACKEND': os.environ['DJANGO_CACHE_BACKEND'],
+            'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+        }
+    }
+elif DEBUG:
+    CACHES = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', str(BASE_DIR / '.cache')),
+            'OPTIONS': {
+                'MAX_ENTRIES': int(os.environ.get('DJANGO_CACHE_MAX_ENTRIES', '50000')),
+                'CULL_FREQUENCY': int(os.environ.get('DJANGO_CACHE_CULL_FREQUENCY', '10')),
+            },
+        }
+    }
+
+# Segundos que se guardan los listados cacheados por versión de propietario
+# (ver finances/versiones.py); las escrituras los invalidan antes.
+RESPUESTAS_CACHE_TTL = int(os.environ.get('DJANGO_RESPUESTAS_CACHE_TTL', '300'))
+
+# Máximo de filas por petición a /api/ingresos/bulk/ y /api/egresos/bulk/
+IMPORTACION_MAX_FILAS = int(os.environ.get('DJANGO_IMPORTACION_MAX_FILAS', '50000'))
+
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     # Whitenoise para servir archivos estáticos en Railway
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    # Contadores e histogramas de /metrics (ver finances/metricas.py)
+    'finances.metricas.MetricasMiddleware',
+    # SQL, serialización y tiempo total por petición (después de whitenoise: no mide estáticos)
+    'finances.instrumentacion.InstrumentacionMiddleware',
+    # Perfil a pedido (staff + X-Perfilar), ver finances/perfilador.py
+    'finances.perfilador.PerfiladorMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -84,6 +155,48 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Instrumentación por petición (ver finances/instrumentacion.py): fracción de
+# peticiones medidas (0 = apagado, 1 = todas), umbral en ms a partir del cual
+# se registran las sentencias SQL más costosas y cuántas. Apagado por defecto
+# también en desarrollo: DJANGO_INSTRUMENTACION_MUESTREO=1 lo activa.
+INSTRUMENTACION_MUESTREO = float(os.environ.get('DJANGO_INSTRUMENTACION_MUESTREO', '0'))
+INSTRUMENTACION_LENTA_MS = float(os.environ.get('DJANGO_INSTRUMENTACION_LENTA_MS', '500'))
+INSTRUMENTACION_TOP_SQL = int(os.environ.get('DJANGO_INSTRUMENTACION_TOP_SQL', '5'))
+
+# Perfilado a pedido (ver finances/perfilador.py): directorio de los perfiles,
+# formato por defecto (pstats o colapsado) e intervalo del muestreo en ms.
+PERFILADOR_DIR = os.environ.get('DJANGO_PERFILADOR_DIR', str(BASE_DIR / 'perfiles'))
+PERFILADOR_FORMATO = os.environ.get('DJANGO_PERFILADOR_FORMATO', 'pstats')
+PERFILADOR_INTERVALO_MS = float(os.environ.get('DJANGO_PERFILADOR_INTERVALO_MS', '5'))
+
+# Métricas de Prometheus en /metrics (ver finances/metricas.py). Con varios
+# workers METRICAS_DIR debe ser un directorio local compartido por todos;
+# METRICAS_TOKEN habilita el acceso del scraper con "Authorization: Bearer".
+METRICAS_DIR = os.environ.get('DJANGO_METRICAS_DIR', '')
+METRICAS_INTERVALO = float(os.environ.get('DJANGO_METRICAS_INTERVALO', '1'))
+METRICAS_TOKEN = os.environ.get('DJANGO_METRICAS_TOKEN', '')
+
+# Aviso en el log cuando una petición supera el presupuesto_consultas de su
+# acción (ver finances/presupuestos.py).
+PRESUPUESTOS_CONSULTAS_AVISAR = get_bool_env('DJANGO_PRESUPUESTOS_CONSULTAS_AVISAR', DEBUG)
+# En las pruebas, superar el presupuesto es un error y no solo un aviso
+PRESUPUESTOS_CONSULTAS_ESTRICTO = False
+TEST_RUNNER = 'finances.presupuestos.EjecutorPruebas'
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'finances': {
+            'handlers': ['console'],
+            'level': os.environ.get('DJANGO_FINANCES_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -114,9 +227,37 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / 'db.sqlite3',
+            'CONN_MAX_AGE': int(os.environ.get('DJANGO_DB_CONN_MAX_AGE', '600')),
         }
     }
 
+# Perfil de SQLite para producción (también con DATABASE_URL=sqlite://...):
+# WAL para que las lecturas no esperen a las escrituras, synchronous=NORMAL
+# (seguro con WAL), mmap y caché de páginas más grandes y busy_timeout. Con
+# transaction_mode IMMEDIATE cada transacción toma el bloqueo de escritura al
+# empezar: espera su turno en lugar de fallar al pasar de lectura a escritura.
+# Los bloqueos que superan busy_timeout se reintentan en finances/reintentos.py.
+# DJANGO_SQLITE_OPTIMIZADO=0 vuelve a la configuración por defecto de Django.
+SQLITE_OPCIONES_OPTIMIZADAS = {
+    'init_command': ';'.join([
+        'PRAGMA journal_mode=WAL',
+        'PRAGMA synchronous=NORMAL',
+        f"PRAGMA mmap_size={int(os.environ.get('DJANGO_SQLITE_MMAP_SIZE', str(256 * 1024 * 1024)))}",
+        # Negativo = KiB
+        f"PRAGMA cache_size=-{int(os.environ.get('DJANGO_SQLITE_CACHE_KB', '65536'))}",
+        f"PRAGMA busy_timeout={int(os.environ.get('DJANGO_SQLITE_BUSY_TIMEOUT_MS', '5000'))}",
+        'PRAGMA temp_store=MEMORY',
+    ]),
+    'transaction_mode': 'IMMEDIATE',
+}
+if DATABASES['default']['ENGINE'] == 'django.db.backends.sqlite3' and os.environ.get('DJANGO_SQLITE_OPTIMIZADO', '1') == '1':
+    DATABASES['default'].setdefault('OPTIONS', {}).update(SQLITE_OPCIONES_OPTIMIZADAS)
+
+# Reintentos ante "database is locked" (ver finances/reintentos.py)
+DB_REINTENTOS = int(os.environ.get('DJANGO_DB_REINTENTOS', '5'))
+DB_REINTENTO_ESPERA_BASE = float(os.environ.get('DJANGO_DB_REINTENTO_ESPERA_BASE', '0.05'))
+DB_REINTENTO_ESPERA_MAX = float(os.environ.get('DJANGO_DB_REINTENTO_ESPERA_MAX', '1.0'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
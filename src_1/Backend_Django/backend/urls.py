@@ -18,6 +18,8 @@ from django.contrib import admin
 from django.urls import path, include
 from rest_framework import routers
 from finances import views as finances_views
+from finances import views_async as finances_views_async
+from finances import metricas as finances_metricas
 from rest_framework.authtoken import views as drf_authtoken_views
 
 router = routers.DefaultRouter()
@@ -29,12 +31,20 @@ router.register(r'transferencias', finances_views.TransferenciaViewSet)
 router.register(r'ingresos', finances_views.IngresoViewSet)
 router.register(r'egresos', finances_views.EgresoViewSet)
 router.register(r'movimientos', finances_views.MovimientoViewSet)
+router.register(r'movimientos-unificados', finances_views.MovimientoUnificadoViewSet, basename='movimientos-unificados')
 router.register(r'usuario-grupo', finances_views.UsuarioGrupoViewSet)
 router.register(r'aportaciones', finances_views.AportacionViewSet)
+router.register(r'stats', finances_views.StatsViewSet, basename='stats')
+router.register(r'dashboard', finances_views.DashboardViewSet, basename='dashboard')
 
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/', include(router.urls)),
     path('api-token-auth/', drf_authtoken_views.obtain_auth_token, name='api_token_auth'),
         path('api/register/', finances_views.RegisterAPIView.as_view(), name='api_register'),
+    path('api/export/', finances_views.ExportAPIView.as_view(), name='api_export'),
+    # Versiones async (servidas por backend/asgi.py) de los endpoints de estadísticas
+    path('api/async/dashboard/overview/', finances_views_async.DashboardOverviewAsync.as_view(), name='api_async_dashboard'),
+    path('api/async/stats/monthly/', finances_views_async.StatsMonthlyAsync.as_view(), name='api_async_stats'),
+    path('metrics', finances_metricas.vista_metricas, name='metrics'),
 ]
@@ -0,0 +1,138 @@
+"""
+Autenticación por token con caché en memoria.
+
+`CachedTokenAuthentication` es un reemplazo directo de
+`rest_framework.authentication.TokenAuthentication`: guarda token -> usuario en
+una caché LRU con TTL compartida por todas las peticiones del proceso, de modo
+que las peticiones repetidas no consultan `authtoken_token` ni `usuario`.
+
+La caché es por proceso, pero cada entrada guarda la versión del token en la
+caché de Django (finances/versiones.py, alcance `alcance_token`) y cada acierto
+la compara con la actual. Las señales (finances/signals.py) renuevan esa
+versión al borrar el token o modificar/desactivar el usuario, así que con una
+caché compartida (archivos, Redis) todos los workers dejan de servir la
+entrada en la siguiente petición. Con LocMemCache (DEBUG) la invalidación
+llega solo al proceso que hizo el cambio y los demás dependen de
+TOKEN_AUTH_CACHE_TTL.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework import exceptions
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import versiones
+
+
+class LRUTTLCache:
+    """Caché LRU acotada con expiración por entrada y contadores de aciertos/fallos."""
+
+    def __init__(self, maxsize=10000, ttl=60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, clave, version=None):
+        """Valor de `clave`, o None si no está, expiró o se guardó con otra versión."""
+        ahora = time.monotonic()
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None or entrada[0] < ahora or entrada[2] != version:
+                if entrada is not None:
+                    del self._datos[clave]
+                self.misses += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.hits += 1
+            return entrada[1]
+
+    def set(self, clave, valor, version=None):
+        with self._lock:
+            self._datos[clave] = (time.monotonic() + self.ttl, valor, version)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.maxsize:
+                self._datos.popitem(last=False)
+
+    def delete(self, clave):
+        with self._lock:
+            self._datos.pop(clave, None)
+
+    def delete_where(self, condicion):
+        """Elimina las entradas cuyo valor cumple `condicion(valor)`."""
+        with self._lock:
+            for clave in [c for c, (_, valor, _) in self._datos.items() if condicion(valor)]:
+                del self._datos[clave]
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._datos), 'maxsize': self.maxsize}
+
+
+token_cache = LRUTTLCache(
+    maxsize=getattr(settings, 'TOKEN_AUTH_CACHE_SIZE', 10000),
+    ttl=getattr(settings, 'TOKEN_AUTH_CACHE_TTL', 60),
+)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """TokenAuthentication que resuelve token -> usuario desde `token_cache`."""
+
+    def authenticate_credentials(self, key):
+        # La versión se lee antes de consultar: una invalidación concurrente deja la entrada obsoleta
+        alcance = versiones.alcance_token(key)
+        version = versiones.obtener([alcance])[alcance]
+        entrada = token_cache.get(key, version)
+        if entrada is None:
+            # Consulta normal (select_related del usuario) y validación de is_active
+            entrada = super().authenticate_credentials(key)
+            token_cache.set(key, entrada, version)
+        user, token = entrada
+        # Copia superficial: cada petición recibe su propia instancia del usuario
+        return copy.copy(user), token
+
+
+def invalidar_token(key):
+    """Deja de servir el token desde la caché en este y en los demás procesos."""
+    token_cache.delete(key)
+    versiones.incrementar(versiones.alcance_token(key))
+
+
+def invalidar_usuario(usuario_id):
+    """Invalida los tokens del usuario en todos los procesos (cambios de datos, desactivación)."""
+    token_cache.delete_where(lambda entrada: entrada[0].pk == usuario_id)
+    versiones.incrementar(*[
+        versiones.alcance_token(key) for key in Token.objects.filter(user_id=usuario_id).values_list('key', flat=True)
+    ])
+
+
+def estadisticas():
+    """Aciertos, fallos y tamaño de la caché de tokens de este proceso."""
+    return token_cache.stats()
+
+
+def es_staff(request):
+    """
+    Autentica una petición de Django con las clases de DRF, fuera de una vista
+    de DRF (middlewares, vistas de Django), y dice si el usuario es staff.
+    """
+    drf_request = Request(request, authenticators=[clase() for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        user = drf_request.user
+    except exceptions.APIException:
+        return False
+    return bool(user and user.is_active and user.is_staff)
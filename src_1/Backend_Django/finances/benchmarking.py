@@ -0,0 +1,98 @@
+"""
+Utilidades compartidas por los comandos de benchmark (finances/management/commands/benchmark_*).
+
+Los reportes se escriben como JSON con claves ordenadas para poder compararlos
+entre ejecuciones con un simple diff.
+"""
+import json
+import platform
+import statistics
+import sys
+import time
+
+import django
+from django.db import connection
+from django.test import RequestFactory
+from django.urls import URLResolver
+from rest_framework.request import Request
+
+
+# Dominio de los usuarios que crea seed_finances (benchmark_endpoints los busca por él)
+DOMINIO_SEMILLA = 'seed.local'
+
+
+def rutas(patrones, prefijo=''):
+    """(ruta, URLPattern) de todo el URLconf, sin entrar al admin (su patrón es None)."""
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            if patron.namespace == 'admin':
+                yield prefijo + str(patron.pattern), None
+                continue
+            yield from rutas(patron.url_patterns, prefijo + str(patron.pattern))
+        else:
+            yield prefijo + str(patron.pattern), patron
+
+
+def primer_pk(clase, usuario):
+    """pk del primer objeto que el viewset `clase` le muestra a `usuario`, o None."""
+    request = Request(RequestFactory().get('/'))
+    request.user = usuario
+    vista = clase(action='retrieve', request=request, kwargs={}, args=(), format_kwarg=None)
+    return vista.get_queryset().order_by('pk').values_list('pk', flat=True).first()
+
+
+def medir(funcion, repeticiones=5, calentamiento=1):
+    """Ejecuta `funcion` varias veces y devuelve los tiempos en milisegundos."""
+    for _ in range(calentamiento):
+        funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+def percentil(muestras, p):
+    """Percentil por interpolación lineal (p entre 0 y 100)."""
+    if not muestras:
+        return 0.0
+    ordenadas = sorted(muestras)
+    k = (len(ordenadas) - 1) * p / 100
+    inferior = int(k)
+    superior = min(inferior + 1, len(ordenadas) - 1)
+    return ordenadas[inferior] + (ordenadas[superior] - ordenadas[inferior]) * (k - inferior)
+
+
+def resumen_tiempos(muestras):
+    """p50/p95/p99/media/mín/máx de una lista de tiempos en ms, redondeados a 3 decimales."""
+    return {
+        'n': len(muestras),
+        'p50_ms': round(percentil(muestras, 50), 3),
+        'p95_ms': round(percentil(muestras, 95), 3),
+        'p99_ms': round(percentil(muestras, 99), 3),
+        'media_ms': round(statistics.fmean(muestras), 3) if muestras else 0.0,
+        'min_ms': round(min(muestras), 3) if muestras else 0.0,
+        'max_ms': round(max(muestras), 3) if muestras else 0.0,
+    }
+
+
+def entorno():
+    """Metadatos del entorno para que los reportes sean comparables."""
+    return {
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'base_de_datos': connection.vendor,
+        'plataforma': sys.platform,
+    }
+
+
+def escribir_reporte(reporte, destino=None, stdout=None):
+    """Escribe el reporte JSON en `destino` (ruta) o en stdout."""
+    texto = json.dumps(reporte, indent=2, sort_keys=True, default=str, ensure_ascii=False)
+    if destino:
+        with open(destino, 'w', encoding='utf-8') as archivo:
+            archivo.write(texto + '\n')
+    elif stdout is not None:
+        stdout.write(texto)
+    return texto
@@ -0,0 +1,141 @@
+"""
+Exportación en streaming del libro de un usuario o grupo (CSV o NDJSON).
+
+Cada tipo de transacción se recorre con QuerySet.values_list().iterator(), de
+modo que solo hay `CHUNK_SIZE` filas en memoria a la vez sin importar el
+tamaño del export.
+"""
+import csv
+import datetime
+import json
+from decimal import Decimal
+
+from django.db.models import Q
+
+from . import models
+
+
+CHUNK_SIZE = 2000
+LINEAS_POR_BLOQUE = 500
+
+COLUMNAS = (
+    'tipo', 'id', 'fecha', 'monto', 'monto_destino', 'bolsillo_id', 'bolsillo_destino_id',
+    'categoria_id', 'descripcion', 'creado_por_id',
+)
+
+TIPOS = ('ingresos', 'egresos', 'movimientos', 'transferencias')
+
+# Campo de cada modelo para cada columna (None si no aplica), sin 'tipo'
+CAMPOS = {
+    'ingreso': ('ingreso_id', 'fecha', 'monto', None, 'bolsillo_id', None, 'categoria_id', 'descripcion', 'creado_por_id'),
+    'egreso': ('egreso_id', 'fecha', 'monto', None, 'bolsillo_id', None, 'categoria_id', 'descripcion', 'creado_por_id'),
+    'movimiento': ('movimiento_id', 'fecha', 'monto', None, 'bolsillo_id', None, 'categoria_id', 'descripcion', None),
+    'transferencia': (
+        'transferencia_id', 'fecha', 'monto_origen', 'monto_destino', 'de_bolsillo_id', 'a_bolsillo_id',
+        None, 'descripcion', 'creado_por_id',
+    ),
+}
+
+
+FORMATOS = {
+    'csv': 'text/csv; charset=utf-8',
+    'ndjson': 'application/x-ndjson',
+}
+
+
+def _filtro_fechas(fechas, con_hora):
+    # movimiento y transferencia guardan fecha con hora: comparar solo el día
+    if not con_hora:
+        return fechas
+    return {clave.replace('fecha__', 'fecha__date__'): valor for clave, valor in fechas.items()}
+
+
+def _filtro_transferencias(filtro):
+    """Transferencias cuyo bolsillo de origen o de destino es del propietario."""
+    origen = Q(**{f'de_bolsillo__{clave}': valor for clave, valor in filtro.items()})
+    destino = Q(**{f'a_bolsillo__{clave}': valor for clave, valor in filtro.items()})
+    return origen | destino
+
+
+def consultas(filtro, fechas=None, tipos=TIPOS):
+    """Devuelve [(tipo, queryset)] con los querysets filtrados de los tipos pedidos."""
+    fechas = fechas or {}
+    resultado = []
+    if 'ingresos' in tipos:
+        resultado.append(('ingreso', models.Ingreso.objects.filter(**filtro, **fechas)))
+    if 'egresos' in tipos:
+        resultado.append(('egreso', models.Egreso.objects.filter(**filtro, **fechas)))
+    if 'movimientos' in tipos:
+        resultado.append(('movimiento', models.Movimiento.objects.filter(**filtro, **_filtro_fechas(fechas, True))))
+    if 'transferencias' in tipos:
+        resultado.append(('transferencia', models.Transferencia.objects.filter(
+            _filtro_transferencias(filtro), **_filtro_fechas(fechas, True)
+        )))
+    return resultado
+
+
+def filas(filtro, fechas=None, tipos=TIPOS):
+    """Genera las filas del export (tuplas en el orden de COLUMNAS)."""
+    for tipo, queryset in consultas(filtro, fechas, tipos):
+        campos = CAMPOS[tipo]
+        presentes = [campo for campo in campos if campo]
+        # Orden por clave primaria: recorrido del índice sin ordenar en memoria
+        valores = queryset.order_by(presentes[0]).values_list(*presentes).iterator(chunk_size=CHUNK_SIZE)
+        for fila in valores:
+            datos = iter(fila)
+            yield (tipo,) + tuple(next(datos) if campo else None for campo in campos)
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    return str(valor)
+
+
+class _Eco:
+    """Pseudo-archivo para csv.writer: write() devuelve la línea en vez de guardarla."""
+
+    def write(self, valor):
+        return valor
+
+
+def _en_bloques(lineas, tamano=LINEAS_POR_BLOQUE):
+    # Agrupar líneas reduce las escrituras al socket sin acumular el export
+    bloque = []
+    for linea in lineas:
+        bloque.append(linea)
+        if len(bloque) >= tamano:
+            yield ''.join(bloque)
+            bloque = []
+    if bloque:
+        yield ''.join(bloque)
+
+
+def generar_csv(filas_export):
+    escritor = csv.writer(_Eco())
+    # BOM para que Excel detecte UTF-8
+    yield '\ufeff' + escritor.writerow(COLUMNAS)
+    yield from _en_bloques(escritor.writerow([_texto(valor) for valor in fila]) for fila in filas_export)
+
+
+def _json_default(valor):
+    if isinstance(valor, Decimal):
+        return str(valor)
+    if isinstance(valor, (datetime.date, datetime.datetime)):
+        return valor.isoformat()
+    raise TypeError(f'Tipo no serializable: {type(valor).__name__}')
+
+
+def generar_ndjson(filas_export):
+    yield from _en_bloques(
+        json.dumps(dict(zip(COLUMNAS, fila)), default=_json_default, ensure_ascii=False) + '\n'
+        for fila in filas_export
+    )
+
+
+GENERADORES = {
+    'csv': generar_csv,
+    'ndjson': generar_ndjson,
+}
@@ -0,0 +1,146 @@
+"""
+Importación masiva de ingresos y egresos.
+
+Valida todas las filas en una sola pasada contra los bolsillos y categorías del
+propietario (cargados con una consulta cada uno), inserta con bulk_create y
+aplica un único delta de saldo por bolsillo afectado, todo en una transacción.
+"""
+import datetime
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import models, reintentos, resumenes, saldos, versiones
+
+
+def _leer_monto(valor):
+    try:
+        monto = Decimal(str(valor).strip().replace(',', '.'))
+    except (InvalidOperation, ValueError, TypeError):
+        return None, 'El monto debe ser un número válido'
+    if not monto.is_finite():
+        return None, 'El monto debe ser un número válido'
+    if monto <= 0:
+        return None, 'El monto debe ser mayor a 0'
+    if monto.as_tuple().exponent < -2:
+        return None, 'El monto no puede tener más de 2 decimales'
+    if monto >= Decimal('1e12'):
+        return None, 'El monto es demasiado grande'
+    return monto, None
+
+
+def _leer_fecha(valor):
+    try:
+        return datetime.date.fromisoformat(str(valor).strip()), None
+    except (ValueError, TypeError):
+        return None, 'La fecha debe tener formato YYYY-MM-DD'
+
+
+def _leer_id(fila, *claves):
+    for clave in claves:
+        valor = fila.get(clave)
+        if valor not in (None, ''):
+            try:
+                return int(valor), None
+            except (TypeError, ValueError):
+                return None, 'Debe ser un ID numérico'
+    return None, None
+
+
+@reintentos.con_reintentos
+def importar(modelo, filas, user, grupo_id=None):
+    """
+    Importa `filas` (lista de dicts con monto, fecha, bolsillo, categoria y
+    descripcion) como instancias de `modelo` (Ingreso o Egreso).
+
+    Devuelve (creados, errores). Si alguna fila es inválida no se inserta nada
+    y `errores` contiene el reporte por fila: [{'fila': n, 'errores': {...}}].
+    """
+    es_egreso = modelo is models.Egreso
+    max_filas = getattr(settings, 'IMPORTACION_MAX_FILAS', 50000)
+    if not isinstance(filas, list) or not filas:
+        raise ValidationError({'detail': 'Se requiere una lista de filas'})
+    if len(filas) > max_filas:
+        raise ValidationError({'detail': f'Se permiten como máximo {max_filas} filas por importación'})
+
+    propietario = {'grupo_id': grupo_id} if grupo_id else {'usuario': user, 'grupo__isnull': True}
+    bolsillos = {
+        b['bolsillo_id']: b
+        for b in models.Bolsillo.objects.filter(**propietario).values('bolsillo_id', 'nombre', 'saldo')
+    }
+    categorias = set(models.Categoria.objects.filter(**propietario).values_list('categoria_id', flat=True))
+
+    instancias = []
+    errores = []
+    deltas_saldo = OrderedDict()
+    for indice, fila in enumerate(filas, start=1):
+        if not isinstance(fila, dict):
+            errores.append({'fila': indice, 'errores': {'detail': 'Cada fila debe ser un objeto'}})
+            continue
+        errores_fila = {}
+
+        monto, error = _leer_monto(fila.get('monto'))
+        if error:
+            errores_fila['monto'] = error
+        fecha, error = _leer_fecha(fila.get('fecha'))
+        if error:
+            errores_fila['fecha'] = error
+        bolsillo_id, error = _leer_id(fila, 'bolsillo', 'bolsillo_id')
+        if error:
+            errores_fila['bolsillo'] = error
+        elif bolsillo_id is not None and bolsillo_id not in bolsillos:
+            errores_fila['bolsillo'] = 'El bolsillo no existe o no pertenece a este usuario o grupo'
+        categoria_id, error = _leer_id(fila, 'categoria', 'categoria_id')
+        if error:
+            errores_fila['categoria'] = error
+        elif categoria_id is not None and categoria_id not in categorias:
+            errores_fila['categoria'] = 'La categoría no existe o no pertenece a este usuario o grupo'
+        descripcion = fila.get('descripcion') or None
+        if descripcion is not None and len(str(descripcion)) > 255:
+            errores_fila['descripcion'] = 'La descripción no puede superar 255 caracteres'
+
+        # Para egresos, el saldo acumulado del bolsillo no puede quedar negativo
+        if not errores_fila and bolsillo_id is not None:
+            delta = -monto if es_egreso else monto
+            acumulado = deltas_saldo.get(bolsillo_id, Decimal('0')) + delta
+            if es_egreso and bolsillos[bolsillo_id]['saldo'] + acumulado < 0:
+                errores_fila['monto'] = (
+                    f'Saldo insuficiente en el bolsillo "{bolsillos[bolsillo_id]["nombre"]}" '
+                    f'para esta fila. Saldo disponible: ${bolsillos[bolsillo_id]["saldo"] + deltas_saldo.get(bolsillo_id, 0)}'
+                )
+            else:
+                deltas_saldo[bolsillo_id] = acumulado
+
+        if errores_fila:
+            errores.append({'fila': indice, 'errores': errores_fila})
+            continue
+
+        instancias.append(modelo(
+            usuario=None if grupo_id else user,
+            grupo_id=grupo_id,
+            bolsillo_id=bolsillo_id,
+            categoria_id=categoria_id,
+            monto=monto,
+            fecha=fecha,
+            descripcion=descripcion,
+            creado_por=user,
+        ))
+
+    if errores:
+        return 0, errores
+
+    with transaction.atomic():
+        modelo.objects.bulk_create(instancias, batch_size=1000)
+        # Un UPDATE neto por bolsillo; los débitos verifican el saldo en la misma sentencia
+        saldos.aplicar(deltas_saldo)
+        deltas_resumen = resumenes.Deltas()
+        for instancia in instancias:
+            deltas_resumen.agregar(instancia)
+        deltas_resumen.aplicar()
+        # bulk_create no emite señales: renovar la versión del propietario a mano
+        versiones.incrementar(versiones.alcance_propietario(None if grupo_id else user.pk, grupo_id))
+
+    return len(instancias), []
@@ -0,0 +1,152 @@
+"""
+Instrumentación por petición: consultas SQL (número y tiempo), tiempo de
+serialización y tiempo total.
+
+InstrumentacionMiddleware mide una fracción de las peticiones
+(INSTRUMENTACION_MUESTREO, de 0 a 1). En las medidas registra cada consulta
+con connection.execute_wrapper, agrega la cabecera Server-Timing y escribe una
+línea en el logger `finances.instrumentacion`. Si la petición tarda más de
+INSTRUMENTACION_LENTA_MS, además registra las INSTRUMENTACION_TOP_SQL
+sentencias que más tiempo sumaron. Con el muestreo en 0 el middleware solo
+pasa la petición a la vista.
+
+El tiempo de serialización es el de `serializer.data` de los serializers con
+CamposDinamicosMixin e incluye las consultas que dispare. Con las vistas de
+views_async solo se mide el total: sus consultas corren en otros hilos. En las
+respuestas en streaming (/api/export/) el total no incluye el envío.
+"""
+import contextvars
+import logging
+import random
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection
+
+
+logger = logging.getLogger(__name__)
+
+_medicion = contextvars.ContextVar('medicion_peticion', default=None)
+
+
+class Medicion:
+    """Acumulado de una petición; también es el execute_wrapper de la conexión."""
+    __slots__ = ('inicio', 'consultas', 'sql_ms', 'serializacion_ms', 'sentencias')
+
+    def __init__(self):
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.sql_ms = 0.0
+        self.serializacion_ms = 0.0
+        # {sql: [ejecuciones, ms]}; los parámetros van aparte, así que un N+1 suma en la misma sentencia
+        self.sentencias = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            ms = (time.perf_counter() - inicio) * 1000
+            self.consultas += 1
+            self.sql_ms += ms
+            acumulado = self.sentencias.setdefault(sql, [0, 0.0])
+            acumulado[0] += 1
+            acumulado[1] += ms
+
+    def total_ms(self):
+        return (time.perf_counter() - self.inicio) * 1000
+
+    def top_sql(self, cantidad):
+        ordenadas = sorted(self.sentencias.items(), key=lambda item: item[1][1], reverse=True)[:cantidad]
+        return [{'sql': sql, 'ejecuciones': n, 'ms': round(ms, 2)} for sql, (n, ms) in ordenadas]
+
+
+def actual():
+    """Medición de la petición en curso, o None si no se está midiendo."""
+    return _medicion.get()
+
+
+def medir_serializacion(funcion):
+    """Ejecuta `funcion` y suma su duración al tiempo de serialización de la petición medida."""
+    medicion = _medicion.get()
+    if medicion is None:
+        return funcion()
+    inicio = time.perf_counter()
+    try:
+        return funcion()
+    finally:
+        medicion.serializacion_ms += (time.perf_counter() - inicio) * 1000
+
+
+def server_timing(medicion, total_ms):
+    return (
+        f'sql;dur={medicion.sql_ms:.1f};desc="{medicion.consultas} consultas", '
+        f'ser;dur={medicion.serializacion_ms:.1f}, '
+        f'total;dur={total_ms:.1f}'
+    )
+
+
+class InstrumentacionMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'INSTRUMENTACION_MUESTREO', 0.0)
+        self.lenta_ms = getattr(settings, 'INSTRUMENTACION_LENTA_MS', 500)
+        self.top_sql = getattr(settings, 'INSTRUMENTACION_TOP_SQL', 5)
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def muestrear(self):
+        return self.muestreo >= 1 or (self.muestreo > 0 and random.random() < self.muestreo)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        if not self.muestrear():
+            return self.get_response(request)
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            with connection.execute_wrapper(medicion):
+                response = self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.registrar(request, response, medicion)
+
+    async def __acall__(self, request):
+        if not self.muestrear():
+            return await self.get_response(request)
+        medicion = Medicion()
+        token = _medicion.set(medicion)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _medicion.reset(token)
+        return self.registrar(request, response, medicion)
+
+    def registrar(self, request, response, medicion):
+        total_ms = medicion.total_ms()
+        response['Server-Timing'] = server_timing(medicion, total_ms)
+
+        coincidencia = request.resolver_match
+        datos = {
+            'metodo': request.method,
+            'ruta': coincidencia.route if coincidencia else request.path,
+            'vista': coincidencia.view_name if coincidencia else None,
+            'estado': response.status_code,
+            'consultas': medicion.consultas,
+            'sql_ms': round(medicion.sql_ms, 2),
+            'serializacion_ms': round(medicion.serializacion_ms, 2),
+            'total_ms': round(total_ms, 2),
+        }
+        linea = ' '.join(f'{clave}={valor}' for clave, valor in datos.items())
+        if total_ms >= self.lenta_ms:
+            datos['top_sql'] = medicion.top_sql(self.top_sql)
+            logger.warning('Petición lenta %s top_sql=%s', linea, datos['top_sql'], extra={'instrumentacion': datos})
+        else:
+            logger.info('Petición %s', linea, extra={'instrumentacion': datos})
+        return response
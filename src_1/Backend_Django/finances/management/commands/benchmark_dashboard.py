@@ -0,0 +1,171 @@
+"""
+Prueba de carga del dashboard: ruta WSGI síncrona contra la ruta ASGI async.
+
+Siembra un usuario con transacciones (por defecto 200k), mide cada consulta
+del dashboard por separado (su suma es el piso de la ruta síncrona y su máximo
+el de la async) y luego lanza peticiones concurrentes contra
+/api/dashboard/overview/ con el handler WSGI de Django y contra
+/api/async/dashboard/overview/ con el handler ASGI, en el mismo proceso.
+
+Usar SIEMPRE sobre una base de datos desechable (reconstruye resumen_mensual):
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py migrate
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py benchmark_dashboard --output dashboard.json
+
+Para medir con servidores reales: gunicorn backend.wsgi contra
+uvicorn backend.asgi:application con la herramienta de carga habitual.
+"""
+import asyncio
+import datetime
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import AsyncClient, Client
+from django.test.utils import override_settings
+from rest_framework.authtoken.models import Token
+
+from finances import benchmarking, models, reportes, resumenes
+
+
+PREFIJO_EMAIL = 'bench-dash-'
+URL_WSGI = '/api/dashboard/overview/'
+URL_ASGI = '/api/async/dashboard/overview/'
+
+
+class Command(BaseCommand):
+    help = 'Compara latencia y rendimiento del dashboard síncrono (WSGI) y async (ASGI) bajo concurrencia.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=200_000, help='Ingresos + egresos a sembrar (default 200k)')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--peticiones', type=int, default=100, help='Peticiones por nivel de concurrencia')
+        parser.add_argument('--concurrencia', default='1,4,16', help='Niveles separados por comas (default 1,4,16)')
+        parser.add_argument('--repeticiones', type=int, default=10, help='Repeticiones al medir cada consulta')
+        parser.add_argument('--dias', type=int, default=365,
+                            help='Rango fecha_desde (hoy - dias); 0 = sin rango (lee solo el resumen mensual)')
+        parser.add_argument('--no-seed', action='store_true', help='Reutilizar los datos de una ejecución anterior')
+        parser.add_argument('--output', help='Ruta del reporte JSON (default: stdout)')
+
+    def handle(self, *args, **options):
+        if not options['no_seed']:
+            self.sembrar(options)
+        usuario = models.Usuario.objects.filter(email__startswith=PREFIJO_EMAIL).order_by('-usuario_id').first()
+        if not usuario:
+            raise CommandError('No hay datos de benchmark; ejecuta el comando sin --no-seed')
+        try:
+            niveles = [int(n) for n in options['concurrencia'].split(',') if n.strip()]
+        except ValueError:
+            raise CommandError('--concurrencia debe ser una lista de enteros separados por comas')
+
+        token = Token.objects.get_or_create(user=usuario)[0].key
+        params = {'incluir': ','.join(reportes.PARTES_OPCIONALES)}
+        fechas = None
+        if options['dias']:
+            params['fecha_desde'] = (datetime.date.today() - datetime.timedelta(days=options['dias'])).isoformat()
+            fechas = reportes.rango_fechas(params['fecha_desde'])
+
+        consultas = self.medir_consultas(usuario, fechas, params, options['repeticiones'])
+        reporte = {
+            'entorno': benchmarking.entorno(),
+            'parametros': {k: options[k] for k in ('filas', 'seed', 'peticiones', 'dias')} | {'concurrencia': niveles},
+            'consultas': consultas,
+            'wsgi': {},
+            'asgi': {},
+        }
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for nivel in niveles:
+                reporte['wsgi'][str(nivel)] = self.carga_wsgi(token, params, nivel, options['peticiones'])
+                reporte['asgi'][str(nivel)] = asyncio.run(self.carga_asgi(token, params, nivel, options['peticiones']))
+
+        benchmarking.escribir_reporte(reporte, options['output'], self.stdout)
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+    def medir_consultas(self, usuario, fechas, params, repeticiones):
+        filtro = reportes.filtro_propietario(usuario)
+        consultas = reportes.consultas_dashboard(filtro, fechas, params['incluir'].split(','))
+        tiempos = {
+            nombre: benchmarking.resumen_tiempos(benchmarking.medir(consulta, repeticiones))
+            for nombre, consulta in consultas.items()
+        }
+        p50 = [t['p50_ms'] for t in tiempos.values()]
+        return {
+            'tiempos': tiempos,
+            # Piso teórico de cada ruta con una sola petición
+            'suma_p50_ms': round(sum(p50), 3),
+            'max_p50_ms': round(max(p50), 3),
+        }
+
+    def _resumen_carga(self, latencias, segundos):
+        return {
+            'latencia': benchmarking.resumen_tiempos(latencias),
+            'peticiones_por_segundo': round(len(latencias) / segundos, 2) if segundos else 0.0,
+        }
+
+    def carga_wsgi(self, token, params, concurrencia, peticiones):
+        """Hilos con el handler WSGI, como un worker de gunicorn con --threads."""
+        def peticion(_):
+            inicio = time.perf_counter()
+            response = Client().get(URL_WSGI, params, HTTP_AUTHORIZATION=f'Token {token}')
+            if response.status_code != 200:
+                raise CommandError(f'{URL_WSGI} respondió {response.status_code}')
+            return (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrencia) as pool:
+            latencias = list(pool.map(peticion, range(peticiones)))
+        return self._resumen_carga(latencias, time.perf_counter() - inicio)
+
+    async def carga_asgi(self, token, params, concurrencia, peticiones):
+        """Tareas en un solo bucle de eventos con el handler ASGI, como un worker de uvicorn."""
+        semaforo = asyncio.Semaphore(concurrencia)
+        cliente = AsyncClient()
+
+        async def peticion():
+            async with semaforo:
+                inicio = time.perf_counter()
+                response = await cliente.get(URL_ASGI, params, headers={'Authorization': f'Token {token}'})
+                if response.status_code != 200:
+                    raise CommandError(f'{URL_ASGI} respondió {response.status_code}')
+                return (time.perf_counter() - inicio) * 1000
+
+        inicio = time.perf_counter()
+        latencias = await asyncio.gather(*[peticion() for _ in range(peticiones)])
+        return self._resumen_carga(list(latencias), time.perf_counter() - inicio)
+
+    # -- Datos sintéticos ------------------------------------------------------
+
+    def sembrar(self, options):
+        rnd = random.Random(options['seed'])
+        hoy = datetime.date.today()
+        with transaction.atomic():
+            usuario = models.Usuario.objects.create_user(
+                email=f'{PREFIJO_EMAIL}{options["seed"]}-{int(time.time())}@bench.local', password=None, nombre='Bench dashboard'
+            )
+            bolsillos = models.Bolsillo.objects.bulk_create([
+                models.Bolsillo(usuario=usuario, nombre=f'Bolsillo {i}', saldo=Decimal('1000000.00')) for i in range(5)
+            ])
+            categorias = {
+                tipo: models.Categoria.objects.bulk_create([
+                    models.Categoria(usuario=usuario, nombre=f'{tipo} {i}', tipo=tipo) for i in range(10)
+                ])
+                for tipo in ('ing', 'eg')
+            }
+            for modelo, tipo in ((models.Ingreso, 'ing'), (models.Egreso, 'eg')):
+                modelo.objects.bulk_create([
+                    modelo(
+                        usuario=usuario,
+                        creado_por=usuario,
+                        bolsillo=rnd.choice(bolsillos),
+                        categoria=rnd.choice(categorias[tipo]),
+                        monto=Decimal(rnd.randint(100, 5_000_000)) / 100,
+                        fecha=hoy - datetime.timedelta(days=rnd.randint(0, 3 * 365)),
+                    )
+                    for _ in range(options['filas'] // 2)
+                ], batch_size=5000)
+        # bulk_create no pasa por las señales: reconstruir el resumen mensual
+        resumenes.reconstruir()
+        self.stdout.write(f'{options["filas"]} transacciones sembradas para {usuario.email}')
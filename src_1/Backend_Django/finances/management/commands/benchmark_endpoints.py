@@ -0,0 +1,174 @@
+"""
+Benchmark de todas las rutas GET de backend/urls.py con el cliente de pruebas.
+
+Recorre el URLconf, arma la URL de cada ruta (las de detalle con el primer
+objeto visible para el usuario) y la pide --repeticiones veces autenticada con
+el token de un usuario generado por seed_finances. Por ruta reporta latencia
+p50/p95/p99, consultas SQL y pico de memoria (tracemalloc, en una petición
+aparte para no inflar los tiempos). Las variantes con sufijo de formato
+(.json) no se miden; las rutas sin GET y el admin quedan en 'omitidas'. Las
+consultas de las vistas de views_async corren en hilos con su propia conexión
+y no entran en el conteo.
+
+Por defecto la caché queda caliente entre repeticiones (listados y ETag de
+finances/versiones.py); --sin-cache la vacía antes de cada petición.
+
+Con los mismos datos (misma --seed y --hasta en seed_finances) las URLs y los
+parámetros son los mismos, así que dos reportes se comparan con un diff:
+    DATABASE_URL=sqlite:////tmp/seed.sqlite3 python manage.py seed_finances --hasta 2026-01-01
+    DATABASE_URL=sqlite:////tmp/seed.sqlite3 python manage.py benchmark_endpoints --output endpoints.json
+"""
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import get_resolver, reverse
+from rest_framework.authtoken.models import Token
+
+from finances import benchmarking, models
+
+
+# Parámetros que una ruta necesita para responder 200
+PARAMETROS = {
+    'usuario-check-email': {'email': f'nadie@{benchmarking.DOMINIO_SEMILLA}'},
+}
+
+
+def vista_get(patron):
+    """(clase, acción) que atiende GET en el patrón, o (clase, None) si no acepta GET."""
+    callback = patron.callback
+    clase = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    acciones = getattr(callback, 'actions', None)
+    if acciones is not None:
+        return clase, acciones.get('get')
+    return clase, 'get' if clase is not None and hasattr(clase, 'get') else None
+
+
+class Command(BaseCommand):
+    help = 'Mide latencia, consultas y memoria de cada ruta GET del API con datos de seed_finances.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--email', help=f'Usuario autenticado (default: el primero de @{benchmarking.DOMINIO_SEMILLA} con grupo)')
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--grupo', action='store_true', help='Medir también cada ruta con ?grupo_id= de un grupo del usuario')
+        parser.add_argument('--sin-cache', action='store_true', help='Vaciar la caché antes de cada petición (ruta fría)')
+        parser.add_argument('--filtro', help='Medir solo las rutas cuyo nombre contenga este texto')
+        parser.add_argument('--output', help='Ruta del reporte JSON (default: stdout)')
+
+    def handle(self, *args, **options):
+        usuario = self.usuario(options['email'])
+        grupo_id = (
+            models.UsuarioGrupo.objects.filter(usuario=usuario).order_by('grupo_id').values_list('grupo_id', flat=True).first()
+        )
+        self.token = Token.objects.get_or_create(user=usuario)[0].key
+        self.opciones = options
+
+        medidas, omitidas = {}, {}
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            for ruta, patron in benchmarking.rutas(get_resolver().url_patterns):
+                if patron is None:
+                    omitidas[ruta] = 'admin'
+                    continue
+                variables = set(patron.pattern.regex.groupindex)
+                if 'format' in variables or (options['filtro'] and options['filtro'] not in (patron.name or '')):
+                    continue
+                clase, accion = vista_get(patron)
+                if accion is None:
+                    omitidas[patron.name or ruta] = 'sin GET'
+                    continue
+                kwargs, motivo = self.kwargs_ruta(clase, variables, usuario, grupo_id)
+                if motivo:
+                    omitidas[patron.name or ruta] = motivo
+                    continue
+                url = reverse(patron.name, kwargs=kwargs) if patron.name else '/' + ruta
+                params = dict(PARAMETROS.get(patron.name, {}))
+                vista = f'{clase.__name__}.{accion}'
+                medidas[patron.name] = self.medir(url, params, vista)
+                if options['grupo'] and grupo_id and not kwargs:
+                    medidas[f'{patron.name}?grupo_id'] = self.medir(url, {**params, 'grupo_id': grupo_id}, vista)
+
+        reporte = {
+            'entorno': benchmarking.entorno(),
+            'parametros': {k: options[k] for k in ('repeticiones', 'grupo', 'sin_cache', 'filtro')},
+            'datos': {
+                'usuario': usuario.email,
+                'ingresos': models.Ingreso.objects.count(),
+                'egresos': models.Egreso.objects.count(),
+                'movimientos': models.Movimiento.objects.count(),
+                'usuarios': models.Usuario.objects.count(),
+            },
+            'rutas': medidas,
+            'omitidas': omitidas,
+        }
+        benchmarking.escribir_reporte(reporte, options['output'], self.stdout)
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+    def usuario(self, email):
+        queryset = models.Usuario.objects.order_by('usuario_id')
+        if email:
+            usuario = queryset.filter(email=email).first()
+        else:
+            usuario = queryset.filter(
+                email__endswith=f'@{benchmarking.DOMINIO_SEMILLA}', usuariogrupo__isnull=False
+            ).first()
+        if not usuario:
+            raise CommandError('No hay usuario para el benchmark; ejecuta seed_finances o indica --email')
+        return usuario
+
+    def kwargs_ruta(self, clase, variables, usuario, grupo_id):
+        """Valores para las variables de la ruta, o (None, motivo) si no se pueden armar."""
+        kwargs = {}
+        for variable in variables:
+            if variable == 'grupo_id':
+                if not grupo_id:
+                    return None, 'el usuario no tiene grupos'
+                kwargs[variable] = grupo_id
+            elif variable == 'pk':
+                pk = benchmarking.primer_pk(clase, usuario)
+                if pk is None:
+                    return None, 'sin objetos visibles para el usuario'
+                kwargs[variable] = pk
+            else:
+                return None, f'variable de ruta desconocida: {variable}'
+        return kwargs, None
+
+    def pedir(self, cliente, url, params):
+        response = cliente.get(url, params, HTTP_AUTHORIZATION=f'Token {self.token}')
+        # Las respuestas en streaming se consumen completas para medir la exportación real
+        cuerpo = b''.join(response.streaming_content) if response.streaming else response.content
+        return response.status_code, len(cuerpo)
+
+    def medir(self, url, params, vista):
+        cliente = Client()
+        estado, tamano = self.pedir(cliente, url, params)
+        resultado = {'url': url, 'params': params, 'vista': vista, 'estado': estado, 'bytes': tamano}
+        if estado != 200:
+            return resultado
+
+        latencias, consultas = [], []
+        for _ in range(self.opciones['repeticiones']):
+            if self.opciones['sin_cache']:
+                cache.clear()
+            with CaptureQueriesContext(connection) as capturadas:
+                latencias.extend(benchmarking.medir(lambda: self.pedir(cliente, url, params), 1, calentamiento=0))
+            consultas.append(len(capturadas))
+
+        if self.opciones['sin_cache']:
+            cache.clear()
+        tracemalloc.start()
+        try:
+            self.pedir(cliente, url, params)
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        resultado.update({
+            'latencia': benchmarking.resumen_tiempos(latencias),
+            'consultas': {'min': min(consultas), 'max': max(consultas)},
+            'memoria_pico_kb': round(pico / 1024, 1),
+        })
+        return resultado
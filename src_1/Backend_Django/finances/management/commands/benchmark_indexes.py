@@ -0,0 +1,194 @@
+"""
+Benchmark de los índices compuestos (propietario, fecha) de ingreso, egreso y movimiento.
+
+Siembra un dataset sintético (por defecto 1M filas), captura EXPLAIN y tiempos
+de las consultas más frecuentes de finances/views.py con los índices y luego
+sin ellos (se eliminan temporalmente y se vuelven a crear al terminar).
+
+Usar SIEMPRE sobre una base de datos desechable, por ejemplo:
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py migrate
+    DATABASE_URL=sqlite:////tmp/bench.sqlite3 python manage.py benchmark_indexes --output antes_despues.json
+"""
+import datetime
+import random
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Q, Sum
+
+from finances import benchmarking, models
+
+
+PREFIJO_EMAIL = 'bench-idx-'
+INDICES = {
+    models.Ingreso: ('idx_ingreso_usuario_fecha', 'idx_ingreso_grupo_fecha'),
+    models.Egreso: ('idx_egreso_usuario_fecha', 'idx_egreso_grupo_fecha'),
+    models.Movimiento: ('idx_movimiento_usuario_fecha', 'idx_movimiento_grupo_fecha'),
+}
+
+
+class Command(BaseCommand):
+    help = 'Mide EXPLAIN y tiempos de las consultas por propietario y fecha con y sin los índices compuestos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1_000_000, help='Transacciones a sembrar (default 1M)')
+        parser.add_argument('--usuarios', type=int, default=200)
+        parser.add_argument('--grupos', type=int, default=40)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--no-seed', action='store_true', help='Reutilizar los datos de una ejecución anterior')
+        parser.add_argument('--output', help='Ruta del reporte JSON (default: stdout)')
+
+    def handle(self, *args, **options):
+        if not options['no_seed']:
+            self.sembrar(options)
+        usuario = models.Usuario.objects.filter(email__startswith=PREFIJO_EMAIL).order_by('usuario_id').first()
+        grupo = models.Grupo.objects.filter(nombre__startswith=PREFIJO_EMAIL).order_by('grupo_id').first()
+        if not usuario or not grupo:
+            raise CommandError('No hay datos de benchmark; ejecuta el comando sin --no-seed')
+
+        self.analizar()
+        consultas = self.consultas(usuario, grupo)
+        reporte = {
+            'entorno': benchmarking.entorno(),
+            'parametros': {k: options[k] for k in ('filas', 'usuarios', 'grupos', 'seed', 'repeticiones')},
+            'filas': {
+                'ingreso': models.Ingreso.objects.count(),
+                'egreso': models.Egreso.objects.count(),
+                'movimiento': models.Movimiento.objects.count(),
+            },
+            'con_indices': self.medir(consultas, options['repeticiones']),
+        }
+        self.eliminar_indices()
+        try:
+            self.analizar()
+            reporte['sin_indices'] = self.medir(consultas, options['repeticiones'])
+        finally:
+            self.crear_indices()
+            self.analizar()
+
+        benchmarking.escribir_reporte(reporte, options['output'], self.stdout)
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+    # -- Consultas medidas (las mismas formas que usan las vistas) ---------
+
+    def consultas(self, usuario, grupo):
+        hoy = datetime.date.today()
+        mitad = hoy - datetime.timedelta(days=540)
+        return {
+            'ingresos_personales_pagina': (
+                models.Ingreso.objects.filter(usuario=usuario, grupo__isnull=True).order_by('-fecha', '-pk')[:50]
+            ),
+            'ingresos_grupo_pagina': (
+                models.Ingreso.objects.filter(grupo_id=grupo.grupo_id).order_by('-fecha', '-pk')[:50]
+            ),
+            'egresos_grupo_pagina_profunda': (
+                models.Egreso.objects.filter(grupo_id=grupo.grupo_id)
+                .filter(Q(fecha__lt=mitad) | Q(fecha=mitad, pk__lt=10 ** 12))
+                .order_by('-fecha', '-pk')[:50]
+            ),
+            'egresos_personales_rango_mes': (
+                models.Egreso.objects
+                .filter(usuario=usuario, grupo__isnull=True, fecha__gte=mitad, fecha__lt=mitad + datetime.timedelta(days=31))
+                .order_by()
+                .values('usuario_id')
+                .annotate(total=Sum('monto'))
+            ),
+            'movimientos_usuario_o_grupos': (
+                models.Movimiento.objects.filter(Q(usuario=usuario) | Q(grupo__in=[grupo.grupo_id]))
+                .order_by('-fecha', '-pk')[:50]
+            ),
+        }
+
+    def medir(self, consultas, repeticiones):
+        resultado = {}
+        for nombre, queryset in consultas.items():
+            resultado[nombre] = {
+                'explain': queryset.explain(),
+                # .all() crea un queryset nuevo en cada ejecución (sin caché de resultados)
+                'tiempos': benchmarking.resumen_tiempos(
+                    benchmarking.medir(lambda: list(queryset.all()), repeticiones)
+                ),
+            }
+        return resultado
+
+    # -- Índices --------------------------------------------------------------
+
+    def _indices(self):
+        for modelo, nombres in INDICES.items():
+            for indice in modelo._meta.indexes:
+                if indice.name in nombres:
+                    yield modelo, indice
+
+    def eliminar_indices(self):
+        with connection.schema_editor() as editor:
+            for modelo, indice in self._indices():
+                editor.remove_index(modelo, indice)
+
+    def crear_indices(self):
+        with connection.schema_editor() as editor:
+            for modelo, indice in self._indices():
+                editor.add_index(modelo, indice)
+
+    def analizar(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+    # -- Datos sintéticos ------------------------------------------------------
+
+    def sembrar(self, options):
+        rnd = random.Random(options['seed'])
+        batch = options['batch_size']
+        password = make_password(None)
+
+        with transaction.atomic():
+            models.Usuario.objects.bulk_create([
+                models.Usuario(email=f'{PREFIJO_EMAIL}{options["seed"]}-{i}@bench.local', nombre=f'Bench {i}', password=password)
+                for i in range(options['usuarios'])
+            ], batch_size=batch)
+            usuarios = list(models.Usuario.objects.filter(email__startswith=f'{PREFIJO_EMAIL}{options["seed"]}-'))
+            models.Grupo.objects.bulk_create([
+                models.Grupo(nombre=f'{PREFIJO_EMAIL}{options["seed"]}-{i}', creador=rnd.choice(usuarios))
+                for i in range(options['grupos'])
+            ], batch_size=batch)
+            grupos = list(models.Grupo.objects.filter(nombre__startswith=f'{PREFIJO_EMAIL}{options["seed"]}-'))
+            models.UsuarioGrupo.objects.bulk_create([
+                models.UsuarioGrupo(usuario=u, grupo=g, rol='miembro')
+                for g in grupos for u in rnd.sample(usuarios, min(5, len(usuarios)))
+            ], batch_size=batch, ignore_conflicts=True)
+            models.Bolsillo.objects.bulk_create(
+                [models.Bolsillo(usuario=u, nombre=f'Principal {options["seed"]}') for u in usuarios]
+                + [models.Bolsillo(grupo=g, nombre=f'General {options["seed"]}') for g in grupos],
+                batch_size=batch,
+            )
+        bolsillos_usuario = dict(models.Bolsillo.objects.filter(usuario__in=usuarios).values_list('usuario_id', 'bolsillo_id'))
+        bolsillos_grupo = dict(models.Bolsillo.objects.filter(grupo__in=grupos).values_list('grupo_id', 'bolsillo_id'))
+
+        hoy = datetime.date.today()
+        total = options['filas']
+        repartos = ((models.Ingreso, int(total * 0.4)), (models.Egreso, int(total * 0.4)), (models.Movimiento, total - 2 * int(total * 0.4)))
+        for modelo, cantidad in repartos:
+            pendientes = cantidad
+            while pendientes > 0:
+                lote = []
+                for _ in range(min(batch, pendientes)):
+                    propietario = {}
+                    if rnd.random() < 0.5:
+                        usuario = rnd.choice(usuarios)
+                        propietario = {'usuario_id': usuario.usuario_id, 'bolsillo_id': bolsillos_usuario[usuario.usuario_id]}
+                    else:
+                        grupo = rnd.choice(grupos)
+                        propietario = {'grupo_id': grupo.grupo_id, 'bolsillo_id': bolsillos_grupo[grupo.grupo_id]}
+                    monto = Decimal(rnd.randint(100, 5_000_000)) / 100
+                    if modelo is models.Movimiento:
+                        lote.append(modelo(tipo=rnd.choice(('ing', 'eg')), monto=monto, **propietario))
+                    else:
+                        fecha = hoy - datetime.timedelta(days=rnd.randint(0, 3 * 365))
+                        lote.append(modelo(monto=monto, fecha=fecha, **propietario))
+                modelo.objects.bulk_create(lote, batch_size=batch)
+                pendientes -= len(lote)
+            self.stdout.write(f'{modelo.__name__}: {cantidad} filas sembradas')
@@ -0,0 +1,110 @@
+"""
+Benchmark de serialización y render JSON de listados de transacciones.
+
+Compara el JSONRenderer de DRF contra finances.renderers.JSONRapidoRenderer
+sobre la misma salida de los serializers (ajustes de DRF por defecto: montos y
+fechas ya como texto). Las filas se arman en memoria con sus relaciones, así
+que no se mide la base de datos y no escribe nada.
+
+    python manage.py benchmark_renderer --filas 10000 --output renderer.json
+"""
+import datetime
+import json
+import random
+import tracemalloc
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from finances import benchmarking, models, renderers, serializers
+
+
+class Command(BaseCommand):
+    help = 'Mide tiempo y memoria de serializar y renderizar listados de egresos con el renderer de DRF y con el rápido.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=10_000, help='Egresos por listado (default 10000)')
+        parser.add_argument('--repeticiones', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--output', help='Ruta del reporte JSON (default: stdout)')
+
+    def handle(self, *args, **options):
+        filas = self.filas(options['filas'], options['seed'])
+        variantes = {
+            'drf': JSONRenderer(),
+            'rapido': renderers.JSONRapidoRenderer(),
+        }
+        reporte = {
+            'entorno': {**benchmarking.entorno(), 'orjson': renderers.orjson is not None},
+            'parametros': {k: options[k] for k in ('filas', 'repeticiones', 'seed')},
+        }
+        salidas = {}
+        for nombre, renderer in variantes.items():
+            reporte[nombre], salidas[nombre] = self.medir(filas, renderer, options['repeticiones'])
+        # Mismo contenido: mismos textos para montos y fechas
+        reporte['salida_identica'] = json.loads(salidas['drf']) == json.loads(salidas['rapido'])
+
+        benchmarking.escribir_reporte(reporte, options['output'], self.stdout)
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+    def medir(self, filas, renderer, repeticiones):
+        datos = {}
+
+        def serializar():
+            datos['data'] = serializers.EgresoSerializer(filas, many=True).data
+
+        def renderizar():
+            datos['json'] = renderer.render(datos['data'], 'application/json')
+
+        def completo():
+            serializar()
+            renderizar()
+
+        tiempos_serializar = benchmarking.medir(serializar, repeticiones)
+        tiempos_render = benchmarking.medir(renderizar, repeticiones)
+        resultado = {
+            'serializar': benchmarking.resumen_tiempos(tiempos_serializar),
+            'renderizar': benchmarking.resumen_tiempos(tiempos_render),
+            'render_memoria_pico_kb': self.memoria_pico(renderizar),
+            'total_memoria_pico_kb': self.memoria_pico(completo),
+            'bytes': len(datos['json']),
+        }
+        return resultado, datos['json']
+
+    def memoria_pico(self, funcion):
+        tracemalloc.start()
+        try:
+            funcion()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return round(pico / 1024, 1)
+
+    def filas(self, cantidad, seed):
+        """Egresos sin guardar con categoría, bolsillo y autor ya asignados."""
+        aleatorio = random.Random(seed)
+        usuario = models.Usuario(usuario_id=1, email='bench@example.com', nombre='Bench')
+        categorias = [
+            models.Categoria(categoria_id=i, usuario=usuario, nombre=f'Categoría {i}', color='#ef4444', tipo='eg')
+            for i in range(1, 21)
+        ]
+        bolsillos = [
+            models.Bolsillo(bolsillo_id=i, usuario=usuario, nombre=f'Bolsillo {i}', saldo=Decimal('1500.00'), color='#3b82f6')
+            for i in range(1, 6)
+        ]
+        hoy = datetime.date.today()
+        return [
+            models.Egreso(
+                egreso_id=i,
+                usuario=usuario,
+                creado_por=usuario,
+                categoria=aleatorio.choice(categorias),
+                bolsillo=aleatorio.choice(bolsillos),
+                monto=Decimal(aleatorio.randint(100, 5_000_000)) / 100,
+                fecha=hoy - datetime.timedelta(days=aleatorio.randint(0, 730)),
+                descripcion=f'Egreso {i}',
+            )
+            for i in range(1, cantidad + 1)
+        ]
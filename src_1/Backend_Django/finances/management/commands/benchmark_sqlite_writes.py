@@ -0,0 +1,159 @@
+"""
+Benchmark de escrituras concurrentes en SQLite: configuración por defecto de
+Django contra el perfil de backend/settings.py (WAL, pragmas, transacciones
+IMMEDIATE y reintentos de finances/reintentos.py).
+
+Cada perfil usa un archivo nuevo en --directorio, migrado al empezar, y varios
+hilos que registran egresos como EgresoViewSet: leen el bolsillo, descuentan
+el saldo con un UPDATE condicional e insertan el egreso en una transacción.
+No toca la base configurada.
+
+    python manage.py benchmark_sqlite_writes --hilos 8 --transacciones 200 --output escrituras.json
+"""
+import datetime
+import os
+import tempfile
+import threading
+import time
+from decimal import Decimal
+
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connections, transaction
+from django.db.models import F
+
+from finances import benchmarking, models, reintentos
+
+
+PERFILES = {
+    'por_defecto': {'opciones': {}, 'reintentos': False},
+    'optimizado': {'opciones': settings.SQLITE_OPCIONES_OPTIMIZADAS, 'reintentos': True},
+}
+MONTO = Decimal('1.00')
+
+
+class Command(BaseCommand):
+    help = 'Mide transacciones por segundo y errores "database is locked" de SQLite con y sin el perfil optimizado.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hilos', type=int, default=8, help='Escritores concurrentes (default 8)')
+        parser.add_argument('--transacciones', type=int, default=200, help='Transacciones por hilo (default 200)')
+        parser.add_argument('--directorio', default=tempfile.gettempdir(), help='Dónde crear las bases temporales')
+        parser.add_argument('--output', help='Ruta del reporte JSON (default: stdout)')
+
+    def handle(self, *args, **options):
+        reporte = {
+            'entorno': {**benchmarking.entorno(), 'base_de_datos': 'sqlite'},
+            'parametros': {k: options[k] for k in ('hilos', 'transacciones')},
+        }
+        for nombre, perfil in PERFILES.items():
+            alias = f'bench_escrituras_{nombre}'
+            ruta = os.path.join(options['directorio'], f'{alias}.sqlite3')
+            self.preparar_base(alias, ruta, perfil['opciones'])
+            try:
+                reporte[nombre] = self.medir(alias, perfil['reintentos'], options['hilos'], options['transacciones'])
+            finally:
+                connections[alias].close()
+                self.borrar_archivos(ruta)
+
+        base = reporte['por_defecto']['transacciones_por_segundo']
+        reporte['mejora_throughput'] = round(reporte['optimizado']['transacciones_por_segundo'] / base, 2) if base else None
+
+        benchmarking.escribir_reporte(reporte, options['output'], self.stdout)
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'Reporte escrito en {options["output"]}'))
+
+    def borrar_archivos(self, ruta):
+        for sufijo in ('', '-wal', '-shm', '-journal'):
+            if os.path.exists(ruta + sufijo):
+                os.remove(ruta + sufijo)
+
+    def preparar_base(self, alias, ruta, opciones):
+        self.borrar_archivos(ruta)
+        connections.settings[alias] = {
+            **connections['default'].settings_dict,
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': ruta,
+            'OPTIONS': dict(opciones),
+            'CONN_MAX_AGE': 0,
+        }
+        call_command('migrate', database=alias, verbosity=0, interactive=False)
+        connections[alias].close()
+
+    def medir(self, alias, reintentar, hilos, transacciones):
+        usuario = models.Usuario.objects.db_manager(alias).create_user(
+            email='bench-escrituras@bench.local', password=None, nombre='Bench escrituras'
+        )
+        # Un bolsillo por hilo: los choques son del archivo, no del saldo
+        bolsillos = models.Bolsillo.objects.using(alias).bulk_create([
+            models.Bolsillo(usuario=usuario, nombre=f'Bolsillo {i}', saldo=MONTO * transacciones) for i in range(hilos)
+        ])
+        connections[alias].close()
+
+        antes = reintentos.contadores()
+        resultados = [None] * hilos
+        barrera = threading.Barrier(hilos)
+        trabajadores = [
+            threading.Thread(
+                target=self.escritor,
+                args=(alias, reintentar, usuario.pk, bolsillo.pk, transacciones, barrera, resultados, i),
+            )
+            for i, bolsillo in enumerate(bolsillos)
+        ]
+        inicio = time.perf_counter()
+        for trabajador in trabajadores:
+            trabajador.start()
+        for trabajador in trabajadores:
+            trabajador.join()
+        segundos = time.perf_counter() - inicio
+        despues = reintentos.contadores()
+
+        latencias = [ms for lat, _ in resultados for ms in lat]
+        errores = sum(err for _, err in resultados)
+        guardados = models.Egreso.objects.using(alias).count()
+        return {
+            'ok': len(latencias),
+            'errores_bloqueo': errores,
+            'egresos_guardados': guardados,
+            'reintentos': despues['reintentos'] - antes['reintentos'],
+            'reintentos_agotados': despues['agotados'] - antes['agotados'],
+            'segundos': round(segundos, 3),
+            'transacciones_por_segundo': round(len(latencias) / segundos, 2) if segundos else 0.0,
+            'latencia': benchmarking.resumen_tiempos(latencias),
+        }
+
+    def escritor(self, alias, reintentar, usuario_id, bolsillo_id, transacciones, barrera, resultados, indice):
+        hoy = datetime.date.today()
+
+        def registrar_egreso():
+            with transaction.atomic(using=alias):
+                bolsillo = models.Bolsillo.objects.using(alias).only('saldo').get(pk=bolsillo_id)
+                actualizados = models.Bolsillo.objects.using(alias).filter(
+                    pk=bolsillo_id, saldo__gte=MONTO
+                ).update(saldo=F('saldo') - MONTO)
+                if not actualizados:
+                    raise RuntimeError(f'Saldo insuficiente en el bolsillo {bolsillo.pk}')
+                models.Egreso.objects.using(alias).create(
+                    usuario_id=usuario_id, creado_por_id=usuario_id, bolsillo_id=bolsillo_id, monto=MONTO, fecha=hoy
+                )
+
+        if reintentar:
+            registrar_egreso = reintentos.con_reintentos(registrar_egreso, using=alias)
+
+        latencias, errores = [], 0
+        try:
+            barrera.wait()
+            for _ in range(transacciones):
+                inicio = time.perf_counter()
+                try:
+                    registrar_egreso()
+                except OperationalError as exc:
+                    if not reintentos.es_bloqueo(exc):
+                        raise
+                    errores += 1
+                    continue
+                latencias.append((time.perf_counter() - inicio) * 1000)
+        finally:
+            connections[alias].close()
+            resultados[indice] = (latencias, errores)
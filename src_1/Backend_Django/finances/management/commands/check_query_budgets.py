@@ -0,0 +1,391 @@
+"""
+Verifica los presupuestos de consultas de las vistas de finances/views.py
+(atributo `presupuesto_consultas`, ver finances/presupuestos.py).
+
+Como `manage.py test`, crea una base de pruebas nueva y la borra al terminar,
+así que no toca la base configurada. Siembra un usuario con un grupo y
+--pequeno filas de cada recurso (bolsillos, categorías, ingresos, egresos,
+transferencias, aportaciones, grupos y miembros), mide las consultas de cada
+acción, agrega filas hasta --grande y vuelve a medir. Termina con error si una
+acción:
+- supera su presupuesto,
+- hace más consultas con --grande que con --pequeno (una consulta por fila),
+- declara presupuesto pero no se pudo medir.
+
+Las acciones GET se piden tal cual; las de escritura necesitan una receta en
+RECETAS con el cuerpo de la petición, y las que no la tienen se listan en
+'sin_medir'. Las rutas de detalle apuntan al primer objeto visible para el
+usuario, salvo las de OBJETIVOS. Las acciones con VARIANTES se miden además con
+cada juego de parámetros, contra el mismo presupuesto. Cada petición corre en un savepoint que se deshace al terminar,
+con la caché vacía y el token fuera de la caché de autenticación, así que se
+mide el camino frío. No se cuentan las sentencias de savepoints. Las vistas de
+views_async no se miden.
+
+    python manage.py check_query_budgets
+    python manage.py check_query_budgets --grande 50 --output presupuestos.json
+
+Las pruebas (finances/tests.py) llaman a Command().verificar() sobre su propia
+base de pruebas.
+"""
+import datetime
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import (
+    CaptureQueriesContext, override_settings, setup_test_environment, teardown_test_environment,
+)
+from django.urls import get_resolver, reverse
+from rest_framework.authtoken.models import Token
+
+from finances import authentication, benchmarking, models, presupuestos, resumenes
+
+
+MODULO_VISTAS = 'finances.views'
+METODOS = ('get', 'post', 'put', 'patch', 'delete')
+HASTA = datetime.date(2026, 1, 1)
+# Saldo de los bolsillos sembrados: alcanza para revertir o bajar sus ingresos, que se verifican como débitos
+SALDO_SEMBRADO = Decimal('1000')
+
+# Parámetros de consulta que una acción GET necesita para responder 200
+PARAMETROS = {
+    ('UsuarioViewSet', 'check_email'): lambda datos: {'email': datos['invitado'].email},
+}
+
+# Otros parámetros con los que se mide la acción, por nombre de variante
+VARIANTES = {
+    ('DashboardViewSet', 'overview'): {'incluir': lambda datos: {'incluir': 'periodos,recientes'}},
+}
+
+# pk de las rutas de detalle que no deben usar el primer objeto visible
+OBJETIVOS = {
+    # El primer bolsillo tiene transferencias y aportaciones, que restringen el borrado;
+    # este solo tiene ingresos, egresos y movimientos, que crecen con cada siembra
+    ('BolsilloViewSet', 'destroy'): lambda datos: datos['bolsillo_borrable'].pk,
+}
+
+
+def transaccion_completa(modelo, monto):
+    """Receta de PUT para la primera transacción personal: cambia el monto y conserva lo demás."""
+    def receta(datos):
+        fila = modelo.objects.filter(usuario=datos['usuario']).order_by('pk').first()
+        return {
+            'bolsillo': fila.bolsillo_id, 'categoria': fila.categoria_id, 'monto': monto,
+            'fecha': fila.fecha.isoformat(), 'descripcion': fila.descripcion,
+        }
+    return receta
+
+
+def filas_importacion(datos, categoria):
+    return [
+        {'bolsillo': datos['bolsillo'].pk, 'categoria': datos[categoria].pk, 'monto': '10', 'fecha': '2025-12-01'}
+        for _ in range(3)
+    ]
+
+
+# Cuerpo JSON de las acciones de escritura, por (vista, acción)
+RECETAS = {
+    ('GrupoViewSet', 'create'): lambda datos: {'nombre': 'Nuevo grupo'},
+    ('GrupoViewSet', 'update'): lambda datos: {'nombre': 'Grupo renombrado'},
+    ('GrupoViewSet', 'partial_update'): lambda datos: {'nombre': 'Grupo renombrado'},
+    ('BolsilloViewSet', 'create'): lambda datos: {'nombre': 'Nuevo bolsillo', 'saldo': '0', 'usuario': datos['usuario'].pk, 'grupo': None},
+    ('BolsilloViewSet', 'update'): lambda datos: {
+        'nombre': 'Bolsillo renombrado', 'saldo': '1000010', 'usuario': datos['usuario'].pk, 'grupo': None,
+    },
+    ('BolsilloViewSet', 'partial_update'): lambda datos: {'nombre': 'Bolsillo renombrado'},
+    ('BolsilloViewSet', 'destroy'): lambda datos: None,
+    ('CategoriaViewSet', 'create'): lambda datos: {
+        'nombre': 'Nueva categoría', 'tipo': 'eg', 'usuario': datos['usuario'].pk, 'grupo': None,
+    },
+    ('CategoriaViewSet', 'update'): lambda datos: {
+        'nombre': 'Categoría renombrada', 'tipo': 'ing', 'usuario': datos['usuario'].pk, 'grupo': None,
+    },
+    ('CategoriaViewSet', 'partial_update'): lambda datos: {'nombre': 'Categoría renombrada'},
+    ('IngresoViewSet', 'create'): lambda datos: {
+        'bolsillo': datos['bolsillo'].pk, 'categoria': datos['categoria_ingreso'].pk, 'monto': '10', 'fecha': '2025-12-01',
+    },
+    ('IngresoViewSet', 'update'): transaccion_completa(models.Ingreso, '11'),
+    ('IngresoViewSet', 'partial_update'): lambda datos: {'monto': '11'},
+    ('IngresoViewSet', 'destroy'): lambda datos: None,
+    ('IngresoViewSet', 'bulk'): lambda datos: filas_importacion(datos, 'categoria_ingreso'),
+    ('EgresoViewSet', 'create'): lambda datos: {
+        'bolsillo': datos['bolsillo'].pk, 'categoria': datos['categoria_egreso'].pk, 'monto': '10', 'fecha': '2025-12-01',
+    },
+    ('EgresoViewSet', 'update'): transaccion_completa(models.Egreso, '9'),
+    ('EgresoViewSet', 'partial_update'): lambda datos: {'monto': '9'},
+    ('EgresoViewSet', 'destroy'): lambda datos: None,
+    ('EgresoViewSet', 'bulk'): lambda datos: filas_importacion(datos, 'categoria_egreso'),
+    ('TransferenciaViewSet', 'batch'): lambda datos: [
+        {'bolsillo_origen_id': datos['bolsillo'].pk, 'bolsillo_destino_id': datos['bolsillo_2'].pk, 'monto': '10'},
+        {'bolsillo_origen_id': datos['bolsillo_2'].pk, 'bolsillo_destino_id': datos['bolsillo'].pk, 'monto': '5'},
+    ],
+    ('MovimientoViewSet', 'transferir'): lambda datos: {
+        'bolsillo_origen_id': datos['bolsillo'].pk, 'bolsillo_destino_id': datos['bolsillo_2'].pk, 'monto': '10',
+    },
+    ('AportacionViewSet', 'aportar'): lambda datos: {
+        'grupo_id': datos['grupo'].pk, 'bolsillo_usuario_id': datos['bolsillo'].pk,
+        'bolsillo_grupo_id': datos['bolsillo_grupo'].pk, 'monto': '10', 'fecha': '2025-12-01',
+    },
+    ('UsuarioGrupoViewSet', 'add_by_email'): lambda datos: {'email': datos['invitado'].email, 'grupo_id': datos['grupo'].pk},
+    ('UsuarioGrupoViewSet', 'change_role'): lambda datos: {
+        'usuario_id': datos['miembro'].pk, 'grupo_id': datos['grupo'].pk, 'nuevo_rol': 'admin',
+    },
+}
+
+
+class Command(BaseCommand):
+    help = 'Falla si alguna acción de finances/views.py supera su presupuesto de consultas o hace una consulta por fila.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pequeno', type=int, default=2, help='Filas por recurso en la primera medición (default 2)')
+        parser.add_argument('--grande', type=int, default=20, help='Filas por recurso en la segunda medición (default 20)')
+        parser.add_argument('--output', help='Ruta del reporte JSON (default: stdout)')
+
+    def handle(self, *args, **options):
+        if not 0 < options['pequeno'] < options['grande']:
+            raise CommandError('Se necesita 0 < --pequeno < --grande')
+
+        setup_test_environment()
+        nombre_original = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            reporte = self.verificar(options['pequeno'], options['grande'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+        benchmarking.escribir_reporte(reporte, options['output'], self.stdout)
+        if reporte['fallas']:
+            raise CommandError(f'{len(reporte["fallas"])} acciones fallaron: ' + '; '.join(reporte['fallas']))
+        if options['output']:
+            self.stdout.write(self.style.SUCCESS(f'{len(reporte["acciones"])} acciones dentro del presupuesto; reporte en {options["output"]}'))
+
+    def verificar(self, pequeno, grande):
+        """Siembra, mide y arma el reporte sobre la base actual, que debe estar vacía (una base de pruebas)."""
+        # Caché local propia: vaciarla antes de cada petición no afecta a la configurada
+        with override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'check_query_budgets'}},
+            INSTRUMENTACION_MUESTREO=0,
+            # Los excesos se reportan en 'fallas'; no cortar la medición
+            PRESUPUESTOS_CONSULTAS_ESTRICTO=False,
+        ):
+            return self._verificar(pequeno, grande)
+
+    def _verificar(self, pequeno, grande):
+        self.datos = self.preparar()
+        self.token = Token.objects.create(user=self.datos['usuario']).key
+        self.cliente = Client()
+        self.contador = 0
+
+        self.sembrar(pequeno)
+        peticiones = list(self.peticiones())
+        medidas_pequeno = {clave: self.medir(*peticion) for clave, peticion in peticiones}
+        self.sembrar(grande - pequeno)
+        medidas_grande = {clave: self.medir(*peticion) for clave, peticion in peticiones}
+
+        acciones, fallas = {}, []
+        for clave, (clase, accion, _, _, _, _) in peticiones:
+            (estado_p, consultas_p), (estado_g, consultas_g) = medidas_pequeno[clave], medidas_grande[clave]
+            maximo = presupuestos.limite(clase, accion)
+            acciones[clave] = {
+                'estado': estado_g, 'presupuesto': maximo, 'consultas': {str(pequeno): consultas_p, str(grande): consultas_g},
+            }
+            if estado_p >= 400 or estado_g >= 400:
+                fallas.append(f'{clave}: respondió {estado_p}/{estado_g}')
+            elif consultas_g > consultas_p:
+                fallas.append(f'{clave}: {consultas_p} consultas con {pequeno} filas y {consultas_g} con {grande}')
+            elif maximo is not None and consultas_g > maximo:
+                fallas.append(f'{clave}: {consultas_g} consultas, presupuesto {maximo}')
+
+        sin_medir = {}
+        for clase, accion, motivo in self.omitidas:
+            clave = f'{clase.__name__}.{accion}'
+            sin_medir[clave] = motivo
+            if presupuestos.limite(clase, accion) is not None:
+                fallas.append(f'{clave}: tiene presupuesto pero {motivo}')
+
+        return {
+            'entorno': benchmarking.entorno(),
+            'parametros': {'pequeno': pequeno, 'grande': grande},
+            'acciones': acciones,
+            'sin_medir': sin_medir,
+            'fallas': fallas,
+        }
+
+    def peticiones(self):
+        """(clave, (clase, acción, método, url, params, cuerpo)) de cada acción medible; el resto va a self.omitidas."""
+        self.omitidas = []
+        vistas = set()
+        for _, patron in benchmarking.rutas(get_resolver().url_patterns):
+            if patron is None or 'format' in patron.pattern.regex.groupindex:
+                continue
+            callback = patron.callback
+            clase = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+            if clase is None or clase.__module__ != MODULO_VISTAS:
+                continue
+            acciones = getattr(callback, 'actions', None) or {m: m for m in METODOS if hasattr(clase, m)}
+            for metodo, accion in acciones.items():
+                if (clase, accion) in vistas:
+                    continue
+                vistas.add((clase, accion))
+                if metodo == 'get':
+                    cuerpo = None
+                elif (clase.__name__, accion) in RECETAS:
+                    cuerpo = RECETAS[clase.__name__, accion](self.datos)
+                else:
+                    self.omitidas.append((clase, accion, 'no hay receta en RECETAS'))
+                    continue
+                kwargs = self.kwargs_ruta(clase, accion, patron.pattern.regex.groupindex)
+                if kwargs is None:
+                    self.omitidas.append((clase, accion, 'sin objetos para armar la ruta'))
+                    continue
+                parametros = PARAMETROS.get((clase.__name__, accion), lambda datos: {})(self.datos)
+                url = reverse(patron.name, kwargs=kwargs)
+                yield f'{clase.__name__}.{accion}', (clase, accion, metodo, url, parametros, cuerpo)
+                for variante, extra in VARIANTES.get((clase.__name__, accion), {}).items():
+                    yield (
+                        f'{clase.__name__}.{accion}[{variante}]',
+                        (clase, accion, metodo, url, {**parametros, **extra(self.datos)}, cuerpo),
+                    )
+
+    def kwargs_ruta(self, clase, accion, variables):
+        kwargs = {}
+        for variable in variables:
+            if variable == 'grupo_id':
+                kwargs[variable] = self.datos['grupo'].pk
+            elif variable == 'pk' and (clase.__name__, accion) in OBJETIVOS:
+                kwargs[variable] = OBJETIVOS[clase.__name__, accion](self.datos)
+            elif variable == 'pk':
+                kwargs[variable] = benchmarking.primer_pk(clase, self.datos['usuario'])
+                if kwargs[variable] is None:
+                    return None
+            else:
+                return None
+        return kwargs
+
+    def medir(self, clase, accion, metodo, url, parametros, cuerpo):
+        """(estado, consultas) de la petición con la caché fría, deshaciendo lo que escriba."""
+        cache.clear()
+        authentication.invalidar_token(self.token)
+        cabeceras = {'Authorization': f'Token {self.token}'}
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as capturadas:
+                if metodo == 'get':
+                    response = self.cliente.get(url, parametros, headers=cabeceras)
+                else:
+                    response = getattr(self.cliente, metodo)(url, cuerpo or {}, content_type='application/json', headers=cabeceras)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+            transaction.set_rollback(True)
+        return response.status_code, presupuestos.contar(consulta['sql'] for consulta in capturadas.captured_queries)
+
+    def preparar(self):
+        """Usuario con un grupo (del que es admin), otro miembro, un invitado y los bolsillos de las recetas
+        (uno sin transferencias ni aportaciones, para borrarlo)."""
+        clave = make_password('presupuestos')
+        usuario, miembro, invitado = models.Usuario.objects.bulk_create([
+            models.Usuario(email=f'{nombre}@{benchmarking.DOMINIO_SEMILLA}', nombre=nombre, password=clave)
+            for nombre in ('presupuestos', 'miembro', 'invitado')
+        ])
+        grupo = models.Grupo.objects.create(nombre='Presupuestos', creador=usuario)
+        models.UsuarioGrupo.objects.bulk_create([
+            models.UsuarioGrupo(usuario=usuario, grupo=grupo, rol='admin'),
+            models.UsuarioGrupo(usuario=miembro, grupo=grupo, rol='miembro'),
+        ])
+        bolsillo, bolsillo_2, bolsillo_grupo, bolsillo_borrable = models.Bolsillo.objects.bulk_create([
+            models.Bolsillo(usuario=usuario, nombre='Principal', saldo=Decimal('1000000')),
+            models.Bolsillo(usuario=usuario, nombre='Ahorros', saldo=Decimal('1000000')),
+            models.Bolsillo(grupo=grupo, nombre='General', saldo=Decimal('1000000')),
+            models.Bolsillo(usuario=usuario, nombre='Borrable'),
+        ])
+        categoria_ingreso, categoria_egreso = models.Categoria.objects.bulk_create([
+            models.Categoria(usuario=usuario, nombre='Salario', tipo='ing'),
+            models.Categoria(usuario=usuario, nombre='Mercado', tipo='eg'),
+        ])
+        return {
+            'usuario': usuario, 'miembro': miembro, 'invitado': invitado, 'grupo': grupo,
+            'bolsillo': bolsillo, 'bolsillo_2': bolsillo_2, 'bolsillo_grupo': bolsillo_grupo, 'bolsillo_borrable': bolsillo_borrable,
+            'categoria_ingreso': categoria_ingreso, 'categoria_egreso': categoria_egreso,
+        }
+
+    def sembrar(self, cantidad):
+        """Agrega `cantidad` filas de cada recurso visible para el usuario, personales y del grupo."""
+        usuario, miembro, grupo = self.datos['usuario'], self.datos['miembro'], self.datos['grupo']
+        bolsillo, bolsillo_grupo, borrable = self.datos['bolsillo'], self.datos['bolsillo_grupo'], self.datos['bolsillo_borrable']
+        indices = range(self.contador, self.contador + cantidad)
+        self.contador += cantidad
+        fecha = lambda i: HASTA - datetime.timedelta(days=i)
+
+        nuevos = models.Usuario.objects.bulk_create([
+            models.Usuario(email=f'miembro{i}@{benchmarking.DOMINIO_SEMILLA}', nombre=f'Miembro {i}', password='!')
+            for i in indices
+        ])
+        grupos = models.Grupo.objects.bulk_create([models.Grupo(nombre=f'Grupo {i}', creador=miembro) for i in indices])
+        models.UsuarioGrupo.objects.bulk_create(
+            [models.UsuarioGrupo(usuario=nuevo, grupo=grupo) for nuevo in nuevos]
+            + [models.UsuarioGrupo(usuario=usuario, grupo=otro) for otro in grupos]
+        )
+        bolsillos = models.Bolsillo.objects.bulk_create(
+            [models.Bolsillo(usuario=usuario, nombre=f'Bolsillo {i}', saldo=SALDO_SEMBRADO) for i in indices]
+            + [models.Bolsillo(grupo=grupo, nombre=f'Bolsillo {i}', saldo=SALDO_SEMBRADO) for i in indices]
+        )
+        categorias = models.Categoria.objects.bulk_create(
+            [models.Categoria(usuario=usuario, nombre=f'Categoría {i}', tipo=tipo) for i in indices for tipo in ('ing', 'eg')]
+            + [models.Categoria(grupo=grupo, nombre=f'Categoría {i}', tipo=tipo) for i in indices for tipo in ('ing', 'eg')]
+        )
+        por_tipo = {tipo: [c for c in categorias if c.tipo == tipo] for tipo in ('ing', 'eg')}
+
+        for modelo, tipo in ((models.Ingreso, 'ing'), (models.Egreso, 'eg')):
+            modelo.objects.bulk_create([
+                modelo(
+                    usuario=None if de_grupo else usuario, grupo=grupo if de_grupo else None,
+                    categoria=por_tipo[tipo][n], bolsillo=bolsillos[n], monto=Decimal('10'), fecha=fecha(i),
+                    descripcion=f'{tipo} {i}', creado_por=miembro if de_grupo else usuario,
+                )
+                for n, (i, de_grupo) in enumerate((i, de_grupo) for i in indices for de_grupo in (False, True))
+            ])
+
+        transferencias = models.Transferencia.objects.bulk_create([
+            models.Transferencia(
+                de_bolsillo=bolsillo, a_bolsillo=bolsillos[n], monto_origen=Decimal('5'), monto_destino=Decimal('5'),
+                descripcion=f'Transferencia {i}', creado_por=usuario,
+            )
+            for n, i in enumerate(indices)
+        ])
+        models.Movimiento.objects.bulk_create([
+            models.Movimiento(tipo=tipo, monto=t.monto_origen, descripcion=t.descripcion, usuario=usuario, bolsillo=b)
+            for t in transferencias for tipo, b in (('eg', t.de_bolsillo), ('ing', t.a_bolsillo))
+        ])
+
+        # Filas del bolsillo que mide BolsilloViewSet.destroy (OBJETIVOS)
+        for modelo, tipo in ((models.Ingreso, 'ing'), (models.Egreso, 'eg')):
+            modelo.objects.bulk_create([
+                modelo(
+                    usuario=usuario, categoria=por_tipo[tipo][n], bolsillo=borrable, monto=Decimal('1'),
+                    fecha=fecha(i), creado_por=usuario,
+                )
+                for n, i in enumerate(indices)
+            ])
+        models.Movimiento.objects.bulk_create([
+            models.Movimiento(tipo='ing', monto=Decimal('1'), descripcion=f'Movimiento {i}', usuario=usuario, bolsillo=borrable)
+            for i in indices
+        ])
+
+        egresos = models.Egreso.objects.bulk_create([
+            models.Egreso(usuario=usuario, bolsillo=bolsillo, monto=Decimal('3'), fecha=fecha(i), creado_por=usuario)
+            for i in indices
+        ])
+        ingresos = models.Ingreso.objects.bulk_create([
+            models.Ingreso(grupo=grupo, bolsillo=bolsillo_grupo, monto=Decimal('3'), fecha=fecha(i), creado_por=usuario)
+            for i in indices
+        ])
+        models.Aportacion.objects.bulk_create([
+            models.Aportacion(
+                usuario=usuario, grupo=grupo, monto=Decimal('3'), fecha=fecha(i), egreso_usuario=egreso,
+                ingreso_grupo=ingreso, bolsillo_usuario=bolsillo, bolsillo_grupo=bolsillo_grupo,
+            )
+            for i, egreso, ingreso in zip(indices, egresos, ingresos)
+        ])
+        resumenes.reconstruir()
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from finances import resumenes
+
+
+class Command(BaseCommand):
+    help = 'Reconstruye desde cero la tabla resumen_mensual a partir de ingresos y egresos.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Filas por INSERT (default 1000)')
+
+    def handle(self, *args, **options):
+        filas = resumenes.reconstruir(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Resumen mensual reconstruido: {filas} filas'))
@@ -0,0 +1,123 @@
+"""
+Concilia el saldo guardado de cada bolsillo con el que implican sus ingresos,
+egresos y movimientos.
+
+Los bolsillos se recorren en bloques de IDs consecutivos; por bloque se hacen
+tres consultas GROUP BY (ingreso, egreso, movimiento) y una lectura de saldos.
+
+Los saldos iniciales de bolsillos y los ajustes manuales de saldo no dejan
+registro, así que también aparecen como diferencia. Por eso las acciones son
+explícitas y van después de revisar el reporte:
+
+- --fix lleva cada bolsillo de --bolsillos al saldo esperado (un UPDATE por
+  bloque). Exige --bolsillos: corregir todos borraría los saldos iniciales.
+- --adopt-current acepta el saldo actual de los bolsillos con diferencia (todos
+  o los de --bolsillos) y registra la diferencia como un Movimiento, sin
+  cambiar el saldo. Desde ese punto solo los descuadres nuevos aparecen.
+
+    python manage.py reconcile_balances
+    python manage.py reconcile_balances --fix --bolsillos 12,40
+    python manage.py reconcile_balances --adopt-current
+"""
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from finances import models, saldos, versiones
+
+
+class Command(BaseCommand):
+    help = 'Compara el saldo de cada bolsillo con el implicado por sus transacciones y opcionalmente lo corrige.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Bolsillos por bloque (default 2000)')
+        parser.add_argument('--bolsillos', help='IDs de bolsillos separados por comas (default: todos)')
+        acciones = parser.add_mutually_exclusive_group()
+        acciones.add_argument('--fix', action='store_true', help='Llevar los bolsillos de --bolsillos al saldo esperado')
+        acciones.add_argument(
+            '--adopt-current', action='store_true',
+            help='Aceptar el saldo actual y registrar la diferencia como movimiento',
+        )
+        parser.add_argument('--mostrar', type=int, default=50, help='Máximo de diferencias a listar (default 50)')
+        parser.add_argument('--json', action='store_true', help='Reporte en JSON')
+
+    def handle(self, *args, **options):
+        seleccion = None
+        if options['bolsillos']:
+            try:
+                seleccion = {int(valor) for valor in options['bolsillos'].split(',') if valor.strip()}
+            except ValueError:
+                raise CommandError('--bolsillos debe ser una lista de IDs separados por comas')
+        if options['fix'] and not seleccion:
+            raise CommandError(
+                '--fix necesita --bolsillos: los saldos iniciales y ajustes manuales no dejan registro, '
+                'así que corregir todos los bolsillos los borraría. Revisa el reporte y lista los bolsillos '
+                'a corregir, o acepta los saldos actuales con --adopt-current.'
+            )
+
+        inicio = time.perf_counter()
+        revisados = 0
+        corregidos = 0
+        adoptados = 0
+        encontradas = []
+        total_diferencias = 0
+
+        ultimo_id = 0
+        while True:
+            queryset = models.Bolsillo.objects.filter(bolsillo_id__gt=ultimo_id)
+            if seleccion is not None:
+                queryset = queryset.filter(bolsillo_id__in=seleccion)
+            ids = list(
+                queryset
+                .order_by('bolsillo_id')
+                .values_list('bolsillo_id', flat=True)[:options['chunk_size']]
+            )
+            if not ids:
+                break
+            ultimo_id = ids[-1]
+            revisados += len(ids)
+
+            with transaction.atomic():
+                bloque = saldos.diferencias(ids)
+                if seleccion is not None:
+                    # diferencias() revisa el rango de IDs: dejar solo los pedidos
+                    bloque = [fila for fila in bloque if fila[0] in seleccion]
+                if options['fix'] and bloque:
+                    corregidos += saldos.corregir(bloque)
+                elif options['adopt_current'] and bloque:
+                    adoptados += saldos.adoptar(bloque)
+                if bloque and (options['fix'] or options['adopt_current']):
+                    versiones.incrementar_bolsillos(bolsillo_id for bolsillo_id, _, _ in bloque)
+
+            total_diferencias += len(bloque)
+            encontradas.extend(bloque[:max(options['mostrar'] - len(encontradas), 0)])
+
+        reporte = {
+            'bolsillos_revisados': revisados,
+            'con_diferencia': total_diferencias,
+            'corregidos': corregidos,
+            'adoptados': adoptados,
+            'segundos': round(time.perf_counter() - inicio, 3),
+            'diferencias': [
+                {'bolsillo_id': bolsillo_id, 'saldo': str(saldo), 'esperado': str(esperado), 'diferencia': str(esperado - saldo)}
+                for bolsillo_id, saldo, esperado in encontradas
+            ],
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(reporte, indent=2))
+            return
+
+        for fila in reporte['diferencias']:
+            self.stdout.write(
+                f"bolsillo {fila['bolsillo_id']}: saldo {fila['saldo']}, esperado {fila['esperado']} (diferencia {fila['diferencia']})"
+            )
+        if total_diferencias > len(encontradas):
+            self.stdout.write(f'... y {total_diferencias - len(encontradas)} más')
+        resuelto = not total_diferencias or options['fix'] or options['adopt_current']
+        estilo = self.style.SUCCESS if resuelto else self.style.WARNING
+        self.stdout.write(estilo(
+            f'{revisados} bolsillos revisados, {total_diferencias} con diferencia, '
+            f'{corregidos} corregidos, {adoptados} adoptados en {reporte["segundos"]} s'
+        ))
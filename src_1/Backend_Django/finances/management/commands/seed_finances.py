@@ -0,0 +1,287 @@
+"""
+Genera datos sintéticos a escala de producción: usuarios, grupos con sus
+miembros, bolsillos, categorías, ingresos, egresos, transferencias (con sus
+dos movimientos) y aportaciones (con su egreso e ingreso).
+
+Todo se inserta con bulk_create en lotes, sin señales, y al final se
+recalculan los saldos de los bolsillos generados (finances/saldos.py; los
+demás bolsillos de la base no se tocan) y la tabla de resumen mensual. La misma --seed y la misma --hasta generan exactamente los
+mismos datos, así que los reportes de benchmark_endpoints son comparables.
+
+Usar SIEMPRE sobre una base de datos desechable, por ejemplo:
+    DATABASE_URL=sqlite:////tmp/seed.sqlite3 python manage.py migrate
+    DATABASE_URL=sqlite:////tmp/seed.sqlite3 python manage.py seed_finances --usuarios 1000 --transacciones 10000000
+"""
+import datetime
+import random
+import time
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from finances import benchmarking, models, resumenes, saldos
+
+
+BOLSILLOS = ('Principal', 'Ahorros', 'Efectivo', 'Viajes')
+CATEGORIAS = {
+    'ing': ('Salario', 'Freelance', 'Intereses', 'Regalos'),
+    'eg': ('Mercado', 'Transporte', 'Arriendo', 'Servicios', 'Restaurantes', 'Salud', 'Ocio'),
+}
+COLORES = ('#ef4444', '#f59e0b', '#10b981', '#3b82f6', '#8b5cf6', '#ec4899')
+DESCRIPCIONES = {
+    'ing': ('Pago quincena', 'Proyecto', 'Rendimientos', 'Reembolso'),
+    'eg': ('Compra semanal', 'Taxi', 'Cuota mensual', 'Factura', 'Almuerzo', 'Farmacia', 'Cine'),
+}
+# Rango de montos en centavos: pocos ingresos grandes, muchos egresos pequeños
+MONTOS = {'ing': (5_000_000, 500_000_000), 'eg': (100_000, 50_000_000)}
+PROPORCION_INGRESOS = 0.35
+PROPORCION_GRUPO = 0.25
+
+
+class Command(BaseCommand):
+    help = 'Genera datos sintéticos deterministas de finanzas a escala configurable con bulk_create.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--usuarios', type=int, default=1000)
+        parser.add_argument('--grupos', type=int, help='Default: usuarios / 10')
+        parser.add_argument('--miembros', type=int, default=5, help='Miembros por grupo, incluido el creador (default 5)')
+        parser.add_argument('--transacciones', type=int, default=100_000, help='Ingresos + egresos (default 100k)')
+        parser.add_argument('--transferencias', type=int, help='Default: transacciones / 100')
+        parser.add_argument('--aportaciones', type=int, help='Default: transacciones / 100')
+        parser.add_argument('--anios', type=int, default=3, help='Años de historial hacia atrás desde --hasta (default 3)')
+        parser.add_argument('--hasta', help='Fecha más reciente YYYY-MM-DD (default hoy); fijarla para repetir los datos')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--password', default='seed', help='Contraseña de todos los usuarios generados')
+
+    def handle(self, *args, **options):
+        try:
+            hasta = datetime.date.fromisoformat(options['hasta']) if options['hasta'] else datetime.date.today()
+        except ValueError:
+            raise CommandError('--hasta debe tener formato YYYY-MM-DD')
+        if options['usuarios'] < 1:
+            raise CommandError('--usuarios debe ser mayor que cero')
+        transacciones = options['transacciones']
+        grupos = options['grupos'] if options['grupos'] is not None else options['usuarios'] // 10
+        self.prefijo = f'seed{options["seed"]}-'
+        if models.Usuario.objects.filter(email__startswith=self.prefijo, email__endswith=f'@{benchmarking.DOMINIO_SEMILLA}').exists():
+            raise CommandError(f'Ya hay datos con --seed {options["seed"]} en esta base; usa una base desechable nueva')
+
+        self.rnd = random.Random(options['seed'])
+        self.batch = options['batch_size']
+        self.hasta = hasta
+        self.dias = options['anios'] * 365
+        inicio = time.perf_counter()
+
+        personales, de_grupo, membresias = self.sembrar_propietarios(options['usuarios'], grupos, options['miembros'], options['password'])
+        self.sembrar_transacciones(personales, de_grupo, transacciones)
+        self.sembrar_transferencias(personales + de_grupo, self._cantidad(options['transferencias'], transacciones))
+        self.sembrar_aportaciones(personales, de_grupo, membresias, self._cantidad(options['aportaciones'], transacciones))
+        self.cerrar()
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Datos generados en {time.perf_counter() - inicio:.1f} s (usuarios {self.prefijo}*@{benchmarking.DOMINIO_SEMILLA})'
+        ))
+
+    def _cantidad(self, valor, transacciones):
+        return valor if valor is not None else transacciones // 100
+
+    def _fecha(self):
+        return self.hasta - datetime.timedelta(days=self.rnd.randint(0, self.dias))
+
+    def _monto(self, tipo):
+        return Decimal(self.rnd.randint(*MONTOS[tipo])) / 100
+
+    def _descripcion(self, tipo):
+        return self.rnd.choice(DESCRIPCIONES[tipo]) if self.rnd.random() < 0.7 else None
+
+    def _insertar(self, modelo, filas):
+        """bulk_create por lotes; devuelve las filas con su pk asignada."""
+        with transaction.atomic():
+            return modelo.objects.bulk_create(filas, batch_size=self.batch)
+
+    # -- Propietarios -----------------------------------------------------------
+
+    def sembrar_propietarios(self, cantidad_usuarios, cantidad_grupos, miembros, password):
+        """
+        Crea usuarios, grupos, membresías, bolsillos y categorías. Devuelve los
+        propietarios personales y de grupo como diccionarios con sus IDs y las
+        membresías como pares (usuario_id, grupo_id).
+        """
+        password = make_password(password)
+        usuarios = self._insertar(models.Usuario, [
+            models.Usuario(
+                email=f'{self.prefijo}{i}@{benchmarking.DOMINIO_SEMILLA}', nombre=f'Usuario {i}', password=password
+            )
+            for i in range(cantidad_usuarios)
+        ])
+        grupos = self._insertar(models.Grupo, [
+            models.Grupo(nombre=f'Grupo {self.prefijo}{i}', creador=self.rnd.choice(usuarios))
+            for i in range(cantidad_grupos)
+        ])
+        membresias = []
+        for grupo in grupos:
+            otros = [u for u in self.rnd.sample(usuarios, min(miembros, len(usuarios))) if u.pk != grupo.creador_id]
+            membresias.append((grupo.creador_id, grupo.grupo_id, 'admin'))
+            membresias.extend((u.pk, grupo.grupo_id, 'miembro') for u in otros[:max(miembros - 1, 0)])
+        self._insertar(models.UsuarioGrupo, [
+            models.UsuarioGrupo(usuario_id=usuario_id, grupo_id=grupo_id, rol=rol) for usuario_id, grupo_id, rol in membresias
+        ])
+
+        autores_grupo = {}
+        for usuario_id, grupo_id, _ in membresias:
+            autores_grupo.setdefault(grupo_id, []).append(usuario_id)
+        personales = [{'propietario': {'usuario_id': u.pk}, 'autores': [u.pk]} for u in usuarios]
+        de_grupo = [{'propietario': {'grupo_id': g.pk}, 'autores': autores_grupo[g.pk]} for g in grupos]
+        propietarios = personales + de_grupo
+
+        bolsillos = self._insertar(models.Bolsillo, [
+            models.Bolsillo(nombre=nombre, color=self.rnd.choice(COLORES), **p['propietario'])
+            for p in propietarios
+            for nombre in BOLSILLOS[:self.rnd.randint(1, len(BOLSILLOS))]
+        ])
+        categorias = self._insertar(models.Categoria, [
+            models.Categoria(nombre=nombre, tipo=tipo, color=self.rnd.choice(COLORES), **p['propietario'])
+            for p in propietarios
+            for tipo, nombres in CATEGORIAS.items()
+            for nombre in nombres
+        ])
+        por_propietario = {}
+        for p in propietarios:
+            p['bolsillos'] = []
+            p['categorias'] = {'ing': [], 'eg': []}
+            por_propietario[tuple(p['propietario'].items())] = p
+        for b in bolsillos:
+            por_propietario[self._clave(b)]['bolsillos'].append(b.pk)
+        self.bolsillo_ids = sorted(b.pk for b in bolsillos)
+        for c in categorias:
+            por_propietario[self._clave(c)]['categorias'][c.tipo].append(c.pk)
+
+        self.stdout.write(
+            f'{len(usuarios)} usuarios, {len(grupos)} grupos, {len(membresias)} membresías, '
+            f'{len(bolsillos)} bolsillos, {len(categorias)} categorías'
+        )
+        return personales, de_grupo, [(u, g) for u, g, _ in membresias]
+
+    def _clave(self, fila):
+        return (('usuario_id', fila.usuario_id),) if fila.usuario_id else (('grupo_id', fila.grupo_id),)
+
+    # -- Transacciones ----------------------------------------------------------
+
+    def _propietario(self, personales, de_grupo):
+        if de_grupo and self.rnd.random() < PROPORCION_GRUPO:
+            return self.rnd.choice(de_grupo)
+        return self.rnd.choice(personales)
+
+    def sembrar_transacciones(self, personales, de_grupo, cantidad):
+        inicio = time.perf_counter()
+        pendientes = cantidad
+        while pendientes > 0:
+            lote = {'ing': [], 'eg': []}
+            for _ in range(min(self.batch, pendientes)):
+                p = self._propietario(personales, de_grupo)
+                tipo = 'ing' if self.rnd.random() < PROPORCION_INGRESOS else 'eg'
+                modelo = models.Ingreso if tipo == 'ing' else models.Egreso
+                lote[tipo].append(modelo(
+                    **p['propietario'],
+                    bolsillo_id=self.rnd.choice(p['bolsillos']),
+                    categoria_id=self.rnd.choice(p['categorias'][tipo]),
+                    monto=self._monto(tipo),
+                    fecha=self._fecha(),
+                    descripcion=self._descripcion(tipo),
+                    creado_por_id=self.rnd.choice(p['autores']),
+                ))
+            with transaction.atomic():
+                models.Ingreso.objects.bulk_create(lote['ing'], batch_size=self.batch)
+                models.Egreso.objects.bulk_create(lote['eg'], batch_size=self.batch)
+            pendientes -= len(lote['ing']) + len(lote['eg'])
+            hechas = cantidad - pendientes
+            if hechas % (self.batch * 100) == 0 or not pendientes:
+                segundos = time.perf_counter() - inicio
+                self.stdout.write(f'{hechas}/{cantidad} ingresos y egresos ({hechas / segundos:.0f} filas/s)')
+
+    def sembrar_transferencias(self, propietarios, cantidad):
+        """Transferencia más sus dos movimientos, como transferencias.ejecutar."""
+        candidatos = [p for p in propietarios if len(p['bolsillos']) > 1]
+        if not candidatos:
+            return
+        pendientes = cantidad
+        while pendientes > 0:
+            transferencias, movimientos = [], []
+            for _ in range(min(self.batch, pendientes)):
+                p = self.rnd.choice(candidatos)
+                origen, destino = self.rnd.sample(p['bolsillos'], 2)
+                monto = self._monto('eg')
+                descripcion = self.rnd.choice(('Ahorro mensual', 'Ajuste', None))
+                transferencias.append(models.Transferencia(
+                    de_bolsillo_id=origen, a_bolsillo_id=destino, monto_origen=monto, monto_destino=monto,
+                    descripcion=descripcion, creado_por_id=self.rnd.choice(p['autores']),
+                ))
+                movimientos.append(models.Movimiento(tipo='eg', monto=monto, bolsillo_id=origen,
+                                                     descripcion=descripcion or 'Transferencia', **p['propietario']))
+                movimientos.append(models.Movimiento(tipo='ing', monto=monto, bolsillo_id=destino,
+                                                     descripcion=descripcion or 'Transferencia', **p['propietario']))
+            with transaction.atomic():
+                models.Transferencia.objects.bulk_create(transferencias, batch_size=self.batch)
+                models.Movimiento.objects.bulk_create(movimientos, batch_size=self.batch)
+            pendientes -= len(transferencias)
+        self.stdout.write(f'{cantidad} transferencias')
+
+    def sembrar_aportaciones(self, personales, de_grupo, membresias, cantidad):
+        """Aportación más su egreso del usuario y su ingreso al grupo, como AportacionViewSet.aportar."""
+        if not membresias:
+            return
+        usuarios = {p['propietario']['usuario_id']: p for p in personales}
+        grupos = {p['propietario']['grupo_id']: p for p in de_grupo}
+        pendientes = cantidad
+        while pendientes > 0:
+            filas = []
+            for _ in range(min(self.batch, pendientes)):
+                usuario_id, grupo_id = self.rnd.choice(membresias)
+                filas.append({
+                    'usuario_id': usuario_id,
+                    'grupo_id': grupo_id,
+                    'monto': self._monto('eg'),
+                    'fecha': self._fecha(),
+                    'bolsillo_usuario_id': self.rnd.choice(usuarios[usuario_id]['bolsillos']),
+                    'bolsillo_grupo_id': self.rnd.choice(grupos[grupo_id]['bolsillos']),
+                })
+            with transaction.atomic():
+                egresos = models.Egreso.objects.bulk_create([
+                    models.Egreso(usuario_id=f['usuario_id'], bolsillo_id=f['bolsillo_usuario_id'], monto=f['monto'],
+                                  fecha=f['fecha'], descripcion='Aportación al grupo', creado_por_id=f['usuario_id'])
+                    for f in filas
+                ], batch_size=self.batch)
+                ingresos = models.Ingreso.objects.bulk_create([
+                    models.Ingreso(grupo_id=f['grupo_id'], bolsillo_id=f['bolsillo_grupo_id'], monto=f['monto'],
+                                   fecha=f['fecha'], descripcion='Aportación de miembro', creado_por_id=f['usuario_id'])
+                    for f in filas
+                ], batch_size=self.batch)
+                models.Aportacion.objects.bulk_create([
+                    models.Aportacion(**f, egreso_usuario=egreso, ingreso_grupo=ingreso)
+                    for f, egreso, ingreso in zip(filas, egresos, ingresos)
+                ], batch_size=self.batch)
+            pendientes -= len(filas)
+        self.stdout.write(f'{cantidad} aportaciones')
+
+    # -- Cierre -------------------------------------------------------------------
+
+    def cerrar(self):
+        """
+        Saldos de los bolsillos generados coherentes con sus transacciones,
+        resumen mensual y estadísticas del planificador. Solo se corrigen los
+        bolsillos de esta ejecución: los de otros datos de la base se dejan igual.
+        """
+        propios = set(self.bolsillo_ids)
+        for inicio in range(0, len(self.bolsillo_ids), 2000):
+            ids = self.bolsillo_ids[inicio:inicio + 2000]
+            with transaction.atomic():
+                # diferencias() revisa el rango de IDs: filtrar los que no son de esta ejecución
+                saldos.corregir([fila for fila in saldos.diferencias(ids) if fila[0] in propios])
+        filas = resumenes.reconstruir()
+        self.stdout.write(f'Saldos recalculados y {filas} filas de resumen mensual')
+        if connection.vendor in ('sqlite', 'postgresql'):
+            with connection.cursor() as cursor:
+                cursor.execute('ANALYZE')
@@ -0,0 +1,97 @@
+"""
+Resolución de las membresías usuario-grupo.
+
+Casi todas las peticiones necesitan saber en qué grupos está el usuario (y con
+qué rol). En lugar de consultar `usuario_grupo` en cada verificación, las
+membresías se memorizan en la petición y se guardan en la caché de Django
+entre peticiones. La entrada incluye un token de versión por usuario (como
+finances/versiones.py); los cambios en UsuarioGrupo lo renuevan mediante
+señales (ver finances/signals.py), así que una lectura concurrente que guarde
+el estado anterior lo hace bajo una versión que ya nadie consulta.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+from . import models
+
+
+def _clave_version(usuario_id):
+    return f'finances:membresias:version:{usuario_id}'
+
+
+def _clave(usuario_id, version):
+    return f'finances:membresias:{usuario_id}:{version}'
+
+
+def _version(usuario_id):
+    """Token de versión de las membresías del usuario; lo crea si falta."""
+    clave = _clave_version(usuario_id)
+    version = cache.get(clave)
+    if version is None:
+        version = uuid.uuid4().hex[:16]
+        cache.set(clave, version, None)
+    return version
+
+
+def _http_request(request):
+    # Memorizar en el HttpRequest de Django (DRF envuelve el original en _request)
+    return getattr(request, '_request', request)
+
+
+def obtener_membresias(user, request=None):
+    """Devuelve {grupo_id: rol} de los grupos donde el usuario es miembro."""
+    if not user or user.is_anonymous:
+        return {}
+
+    http_request = _http_request(request) if request is not None else None
+    if http_request is not None:
+        memo = getattr(http_request, '_finances_membresias', None)
+        if memo is not None and memo[0] == user.pk:
+            return memo[1]
+
+    # La versión se lee antes que la base: si cambia entre medias, la entrada queda huérfana
+    clave = _clave(user.pk, _version(user.pk))
+    membresias = cache.get(clave)
+    if membresias is None:
+        membresias = dict(models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo_id', 'rol'))
+        cache.set(clave, membresias, getattr(settings, 'MEMBRESIAS_CACHE_TTL', 300))
+
+    if http_request is not None:
+        http_request._finances_membresias = (user.pk, membresias)
+    return membresias
+
+
+def grupos_ids(user, request=None):
+    """Lista de IDs de los grupos del usuario."""
+    return list(obtener_membresias(user, request))
+
+
+def _normalizar_grupo_id(grupo_id):
+    try:
+        return int(grupo_id)
+    except (TypeError, ValueError):
+        return None
+
+
+def es_miembro(user, grupo_id, request=None):
+    grupo_id = _normalizar_grupo_id(grupo_id)
+    return grupo_id is not None and grupo_id in obtener_membresias(user, request)
+
+
+def es_admin(user, grupo_id, request=None):
+    grupo_id = _normalizar_grupo_id(grupo_id)
+    return grupo_id is not None and obtener_membresias(user, request).get(grupo_id) == 'admin'
+
+
+def invalidar(usuario_id):
+    """
+    Renueva la versión de las membresías de un usuario. Se repite al confirmar
+    la transacción para que una lectura concurrente no guarde el estado
+    anterior al commit con la versión nueva.
+    """
+    clave = _clave_version(usuario_id)
+    cache.set(clave, uuid.uuid4().hex[:16], None)
+    transaction.on_commit(lambda: cache.set(clave, uuid.uuid4().hex[:16], None))
@@ -0,0 +1,305 @@
+"""
+Métricas en formato de texto de Prometheus en /metrics.
+
+Cada proceso acumula en memoria contadores e histogramas con etiquetas y, como
+mucho cada METRICAS_INTERVALO segundos, vuelca su estado completo a
+METRICAS_DIR/metricas-<pid>-<inicio>.json (escritura atómica). /metrics suma
+los archivos de todos los procesos, así que con varios workers de gunicorn
+cualquier worker responde con los totales. Sin METRICAS_DIR solo se reporta
+el proceso que atiende. El directorio se vacía al arrancar (start.sh): los
+archivos de workers que ya terminaron siguen sumando hasta el próximo deploy.
+
+Se exponen:
+- finanzas_peticiones_total{vista, metodo, estado}
+- finanzas_peticion_duracion_segundos{vista} (histograma, METRICAS_CUBETAS)
+- finanzas_consultas_sql_total{vista}
+- finanzas_auth_cache_{aciertos,fallos}_total y finanzas_auth_cache_tasa_aciertos
+- finanzas_{transferencias,aportaciones}_total y finanzas_{transferencias,aportaciones}_monto_total
+- finanzas_db_reintentos_total y finanzas_db_reintentos_agotados_total
+
+`vista` es Clase.accion (IngresoViewSet.list, MovimientoViewSet.transferir).
+Las consultas de las vistas de views_async corren en otros hilos y no se cuentan.
+"""
+import glob
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import HttpResponse, HttpResponseForbidden
+
+from . import authentication, presupuestos, reintentos
+
+
+logger = logging.getLogger(__name__)
+
+TIPO_CONTENIDO = 'text/plain; version=0.0.4; charset=utf-8'
+
+# nombre: (tipo, ayuda)
+METRICAS = {
+    'finanzas_peticiones_total': ('counter', 'Peticiones HTTP atendidas.'),
+    'finanzas_peticion_duracion_segundos': ('histogram', 'Duración de las peticiones por vista.'),
+    'finanzas_consultas_sql_total': ('counter', 'Consultas SQL ejecutadas por las peticiones.'),
+    'finanzas_auth_cache_aciertos_total': ('counter', 'Tokens resueltos desde la caché de autenticación.'),
+    'finanzas_auth_cache_fallos_total': ('counter', 'Tokens que tuvieron que consultarse en la base de datos.'),
+    'finanzas_auth_cache_tasa_aciertos': ('gauge', 'Aciertos / (aciertos + fallos) de la caché de autenticación.'),
+    'finanzas_transferencias_total': ('counter', 'Transferencias entre bolsillos confirmadas.'),
+    'finanzas_transferencias_monto_total': ('counter', 'Suma de los montos transferidos.'),
+    'finanzas_aportaciones_total': ('counter', 'Aportaciones a grupos confirmadas.'),
+    'finanzas_aportaciones_monto_total': ('counter', 'Suma de los montos aportados.'),
+    'finanzas_db_reintentos_total': ('counter', 'Reintentos por base de datos bloqueada.'),
+    'finanzas_db_reintentos_agotados_total': ('counter', 'Operaciones que agotaron los reintentos.'),
+}
+
+# Métricas con etiqueta `vista`: solo tienen series cuando hubo peticiones
+POR_VISTA = ('finanzas_peticiones_total', 'finanzas_peticion_duracion_segundos', 'finanzas_consultas_sql_total')
+
+_lock = threading.Lock()
+# (nombre, etiquetas) -> valor; etiquetas es una tupla ordenada de pares
+_valores = {}
+# (nombre, etiquetas) -> [conteos por cubeta (no acumulados), suma, cuenta]
+_histogramas = {}
+_volcado = {'pid': None, 'archivo': None, 'ultimo': 0.0}
+
+
+def _etiquetas(etiquetas):
+    return tuple(sorted((clave, str(valor)) for clave, valor in etiquetas.items()))
+
+
+def cubetas():
+    return getattr(settings, 'METRICAS_CUBETAS', (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10))
+
+
+def incrementar(nombre, valor=1, **etiquetas):
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        _valores[clave] = _valores.get(clave, 0) + valor
+
+
+def observar(nombre, valor, **etiquetas):
+    limites = cubetas()
+    clave = (nombre, _etiquetas(etiquetas))
+    with _lock:
+        histograma = _histogramas.get(clave)
+        if histograma is None:
+            histograma = _histogramas[clave] = [[0] * len(limites), 0.0, 0]
+        for indice, limite in enumerate(limites):
+            if valor <= limite:
+                histograma[0][indice] += 1
+                break
+        histograma[1] += valor
+        histograma[2] += 1
+
+
+def al_confirmar(nombre, montos):
+    """
+    Cuenta operaciones de negocio ('transferencias', 'aportaciones') y la suma
+    de sus montos cuando la transacción en curso se confirma.
+    """
+    cantidad, total = len(montos), float(sum(montos))
+
+    def contar():
+        incrementar(f'finanzas_{nombre}_total', cantidad)
+        incrementar(f'finanzas_{nombre}_monto_total', total)
+    transaction.on_commit(contar)
+
+
+def _estado_proceso():
+    """Estado completo de este proceso, con los contadores que llevan otros módulos."""
+    auth = authentication.estadisticas()
+    bloqueos = reintentos.contadores()
+    with _lock:
+        valores = dict(_valores)
+        histogramas = {clave: [list(h[0]), h[1], h[2]] for clave, h in _histogramas.items()}
+    valores[('finanzas_auth_cache_aciertos_total', ())] = auth['hits']
+    valores[('finanzas_auth_cache_fallos_total', ())] = auth['misses']
+    valores[('finanzas_db_reintentos_total', ())] = bloqueos['reintentos']
+    valores[('finanzas_db_reintentos_agotados_total', ())] = bloqueos['agotados']
+    return {
+        'valores': [[nombre, etiquetas, valor] for (nombre, etiquetas), valor in valores.items()],
+        'histogramas': [[nombre, etiquetas, *h] for (nombre, etiquetas), h in histogramas.items()],
+    }
+
+
+def volcar(forzar=False):
+    """Escribe el estado del proceso en METRICAS_DIR si pasó METRICAS_INTERVALO desde el último volcado."""
+    directorio = getattr(settings, 'METRICAS_DIR', '')
+    ahora = time.monotonic()
+    if not directorio or (not forzar and ahora - _volcado['ultimo'] < getattr(settings, 'METRICAS_INTERVALO', 1.0)):
+        return
+    _volcado['ultimo'] = ahora
+    if _volcado['pid'] != os.getpid():
+        # Nombre por proceso (también tras un fork): un PID reutilizado no pisa a un worker anterior
+        _volcado['pid'] = os.getpid()
+        _volcado['archivo'] = os.path.join(directorio, f'metricas-{os.getpid()}-{time.time_ns()}.json')
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        temporal = f'{_volcado["archivo"]}.{threading.get_ident()}.tmp'
+        with open(temporal, 'w', encoding='utf-8') as archivo:
+            json.dump(_estado_proceso(), archivo)
+        os.replace(temporal, _volcado['archivo'])
+    except OSError:
+        logger.exception('No se pudieron volcar las métricas en %s', directorio)
+
+
+def _sumar(estados):
+    valores, histogramas = {}, {}
+    for estado in estados:
+        for nombre, etiquetas, valor in estado['valores']:
+            clave = (nombre, tuple(tuple(par) for par in etiquetas))
+            valores[clave] = valores.get(clave, 0) + valor
+        for nombre, etiquetas, conteos, suma, cuenta in estado['histogramas']:
+            clave = (nombre, tuple(tuple(par) for par in etiquetas))
+            total = histogramas.setdefault(clave, [[0] * len(conteos), 0.0, 0])
+            total[0] = [a + b for a, b in zip(total[0], conteos)]
+            total[1] += suma
+            total[2] += cuenta
+    return valores, histogramas
+
+
+def estados():
+    """Estados de todos los procesos (o solo de este sin METRICAS_DIR)."""
+    directorio = getattr(settings, 'METRICAS_DIR', '')
+    if not directorio:
+        return [_estado_proceso()]
+    volcar(forzar=True)
+    resultado = []
+    for ruta in glob.glob(os.path.join(directorio, 'metricas-*.json')):
+        try:
+            with open(ruta, encoding='utf-8') as archivo:
+                resultado.append(json.load(archivo))
+        except (OSError, ValueError):
+            # Archivo borrado o a medio escribir por un worker que terminó
+            continue
+    return resultado
+
+
+def _escapar(valor):
+    return valor.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _serie(nombre, etiquetas, valor):
+    texto = ','.join(f'{clave}="{_escapar(v)}"' for clave, v in etiquetas)
+    return f'{nombre}{{{texto}}} {valor:g}' if texto else f'{nombre} {valor:g}'
+
+
+def exposicion():
+    """Texto de Prometheus con la suma de todos los procesos."""
+    valores, histogramas = _sumar(estados())
+    aciertos = valores.get(('finanzas_auth_cache_aciertos_total', ()), 0)
+    fallos = valores.get(('finanzas_auth_cache_fallos_total', ()), 0)
+    valores[('finanzas_auth_cache_tasa_aciertos', ())] = aciertos / (aciertos + fallos) if aciertos + fallos else 0
+    limites = cubetas()
+
+    lineas = []
+    for nombre, (tipo, ayuda) in METRICAS.items():
+        lineas += [f'# HELP {nombre} {ayuda}', f'# TYPE {nombre} {tipo}']
+        if tipo == 'histogram':
+            for (serie, etiquetas), (conteos, suma, cuenta) in sorted(histogramas.items()):
+                if serie != nombre:
+                    continue
+                acumulado = 0
+                for limite, conteo in zip(limites, conteos):
+                    acumulado += conteo
+                    lineas.append(_serie(f'{nombre}_bucket', etiquetas + (('le', f'{limite:g}'),), acumulado))
+                lineas.append(_serie(f'{nombre}_bucket', etiquetas + (('le', '+Inf'),), cuenta))
+                lineas.append(_serie(f'{nombre}_sum', etiquetas, suma))
+                lineas.append(_serie(f'{nombre}_count', etiquetas, cuenta))
+        else:
+            series = sorted((etiquetas, valor) for (serie, etiquetas), valor in valores.items() if serie == nombre)
+            if not series and nombre not in POR_VISTA:
+                series = [((), 0)]
+            lineas += [_serie(nombre, etiquetas, valor) for etiquetas, valor in series]
+    return '\n'.join(lineas) + '\n'
+
+
+def vista_metricas(request):
+    """
+    GET /metrics. Con METRICAS_TOKEN exige `Authorization: Bearer <token>`
+    (el scraper de Prometheus); sin él, solo usuarios staff con su token del API.
+    """
+    token = getattr(settings, 'METRICAS_TOKEN', '')
+    if token:
+        # Comparación en tiempo constante; en bytes porque el encabezado puede traer no ASCII
+        permitido = hmac.compare_digest(
+            request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode(),
+        )
+    else:
+        permitido = authentication.es_staff(request)
+    if not permitido:
+        return HttpResponseForbidden()
+    return HttpResponse(exposicion(), content_type=TIPO_CONTENIDO)
+
+
+_vistas = {}
+
+
+def nombre_vista(request):
+    """Clase.accion de la vista que atendió la petición (en caché por vista y método)."""
+    coincidencia = request.resolver_match
+    if coincidencia is None:
+        return 'sin_ruta'
+    clave = (coincidencia.func, request.method)
+    nombre = _vistas.get(clave)
+    if nombre is None:
+        clase, accion = presupuestos.vista_y_accion(coincidencia.func, request.method)
+        if clase is None:
+            nombre = coincidencia.view_name or coincidencia.func.__name__
+        else:
+            nombre = f'{clase.__name__}.{accion}'
+        _vistas[clave] = nombre
+    return nombre
+
+
+class ContadorConsultas:
+    """execute_wrapper que solo cuenta las consultas, sin las sentencias de savepoints."""
+    __slots__ = ('consultas',)
+
+    def __init__(self):
+        self.consultas = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.startswith(presupuestos.PREFIJOS_TRANSACCION):
+            self.consultas += 1
+        return execute(sql, params, many, context)
+
+
+class MetricasMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.__acall__(request)
+        inicio = time.perf_counter()
+        contador = ContadorConsultas()
+        with connection.execute_wrapper(contador):
+            response = self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio, contador.consultas)
+        return response
+
+    async def __acall__(self, request):
+        inicio = time.perf_counter()
+        response = await self.get_response(request)
+        self.registrar(request, response, time.perf_counter() - inicio, 0)
+        return response
+
+    def registrar(self, request, response, segundos, consultas):
+        vista = nombre_vista(request)
+        incrementar('finanzas_peticiones_total', vista=vista, metodo=request.method, estado=response.status_code)
+        observar('finanzas_peticion_duracion_segundos', segundos, vista=vista)
+        if consultas:
+            incrementar('finanzas_consultas_sql_total', consultas, vista=vista)
+            presupuestos.revisar(request, consultas)
+        volcar()
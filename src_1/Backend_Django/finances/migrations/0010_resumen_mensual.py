@@ -0,0 +1,44 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:32
+
+from django.db import migrations, models
+
+
+def poblar_resumen(apps, schema_editor):
+    from finances import resumenes
+
+    resumenes.reconstruir(
+        ingreso_model=apps.get_model('finances', 'Ingreso'),
+        egreso_model=apps.get_model('finances', 'Egreso'),
+        resumen_model=apps.get_model('finances', 'ResumenMensual'),
+        using=schema_editor.connection.alias,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0009_egreso_creado_por_ingreso_creado_por'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResumenMensual',
+            fields=[
+                ('resumen_id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('usuario_ref', models.IntegerField(default=0)),
+                ('grupo_ref', models.IntegerField(default=0)),
+                ('bolsillo_ref', models.IntegerField(default=0)),
+                ('categoria_ref', models.IntegerField(default=0)),
+                ('periodo', models.DateField()),
+                ('total_ingresos', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('total_egresos', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('num_ingresos', models.IntegerField(default=0)),
+                ('num_egresos', models.IntegerField(default=0)),
+            ],
+            options={
+                'db_table': 'resumen_mensual',
+                'constraints': [models.UniqueConstraint(fields=('usuario_ref', 'grupo_ref', 'periodo', 'bolsillo_ref', 'categoria_ref'), name='uk_resumen_mensual')],
+            },
+        ),
+        migrations.RunPython(poblar_resumen, migrations.RunPython.noop),
+    ]
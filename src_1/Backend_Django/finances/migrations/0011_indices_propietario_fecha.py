@@ -0,0 +1,37 @@
+# Generated by Django 5.2.7 on 2026-10-18 10:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0010_resumen_mensual'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='egreso',
+            index=models.Index(fields=['usuario', 'grupo', 'fecha', 'egreso_id'], name='idx_egreso_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='egreso',
+            index=models.Index(fields=['grupo', 'fecha', 'egreso_id'], name='idx_egreso_grupo_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='ingreso',
+            index=models.Index(fields=['usuario', 'grupo', 'fecha', 'ingreso_id'], name='idx_ingreso_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='ingreso',
+            index=models.Index(fields=['grupo', 'fecha', 'ingreso_id'], name='idx_ingreso_grupo_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['usuario', 'fecha', 'movimiento_id'], name='idx_movimiento_usuario_fecha'),
+        ),
+        migrations.AddIndex(
+            model_name='movimiento',
+            index=models.Index(fields=['grupo', 'fecha', 'movimiento_id'], name='idx_movimiento_grupo_fecha'),
+        ),
+    ]
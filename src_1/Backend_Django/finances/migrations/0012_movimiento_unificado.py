@@ -0,0 +1,73 @@
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Vista portable (SQLite y PostgreSQL) con una clave única entre ambas tablas
+create_view_sql = [
+    "DROP VIEW IF EXISTS v_movimientos",
+    """
+CREATE VIEW v_movimientos AS
+SELECT
+  i.ingreso_id * 2 AS uid, i.ingreso_id AS transaccion_id, 'ing' AS tipo,
+  i.monto AS monto, i.fecha AS fecha, i.descripcion,
+  i.usuario_id, i.grupo_id, i.categoria_id, i.bolsillo_id, i.creado_por_id
+FROM ingreso i
+UNION ALL
+SELECT
+  e.egreso_id * 2 + 1 AS uid, e.egreso_id AS transaccion_id, 'eg' AS tipo,
+  -e.monto AS monto, e.fecha AS fecha, e.descripcion,
+  e.usuario_id, e.grupo_id, e.categoria_id, e.bolsillo_id, e.creado_por_id
+FROM egreso e
+""",
+]
+
+# Al revertir se restaura la vista de la migración 0002
+reverse_sql = [
+    "DROP VIEW IF EXISTS v_movimientos",
+    """
+CREATE VIEW v_movimientos AS
+SELECT
+  i.ingreso_id AS id, 'ing' AS tipo, i.monto AS monto,
+  i.fecha AS fecha, i.descripcion,
+  i.usuario_id, i.grupo_id, i.categoria_id, i.bolsillo_id
+FROM ingreso i
+UNION ALL
+SELECT
+  e.egreso_id AS id, 'eg' AS tipo, -e.monto AS monto,
+  e.fecha AS fecha, e.descripcion,
+  e.usuario_id, e.grupo_id, e.categoria_id, e.bolsillo_id
+FROM egreso e
+""",
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('finances', '0011_indices_propietario_fecha'),
+    ]
+
+    operations = [
+        migrations.RunSQL(create_view_sql, reverse_sql=reverse_sql),
+        migrations.CreateModel(
+            name='MovimientoUnificado',
+            fields=[
+                ('uid', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('transaccion_id', models.IntegerField()),
+                ('tipo', models.CharField(choices=[('ing', 'ing'), ('eg', 'eg')], max_length=3)),
+                ('monto', models.DecimalField(decimal_places=2, max_digits=14)),
+                ('fecha', models.DateField()),
+                ('descripcion', models.CharField(blank=True, max_length=255, null=True)),
+                ('bolsillo', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='finances.bolsillo')),
+                ('categoria', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='finances.categoria')),
+                ('creado_por', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+                ('grupo', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='finances.grupo')),
+                ('usuario', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'db_table': 'v_movimientos',
+                'managed': False,
+            },
+        ),
+    ]
@@ -146,6 +146,12 @@ class Ingreso(models.Model):
             models.CheckConstraint(check=(models.Q(usuario__isnull=True) ^ models.Q(grupo__isnull=True)), name="chk_ingreso_owner"),
             models.CheckConstraint(check=models.Q(monto__gt=0), name="chk_ingreso_monto"),
         ]
+        indexes = [
+            # Listados personales: usuario=..., grupo IS NULL, orden por (fecha, pk)
+            models.Index(fields=["usuario", "grupo", "fecha", "ingreso_id"], name="idx_ingreso_usuario_fecha"),
+            # Listados y reportes de grupo: grupo=..., orden por (fecha, pk)
+            models.Index(fields=["grupo", "fecha", "ingreso_id"], name="idx_ingreso_grupo_fecha"),
+        ]
 
 
 class Egreso(models.Model):
@@ -166,6 +172,12 @@ class Egreso(models.Model):
             models.CheckConstraint(check=(models.Q(usuario__isnull=True) ^ models.Q(grupo__isnull=True)), name="chk_egreso_owner"),
             models.CheckConstraint(check=models.Q(monto__gt=0), name="chk_egreso_monto"),
         ]
+        indexes = [
+            # Listados personales: usuario=..., grupo IS NULL, orden por (fecha, pk)
+            models.Index(fields=["usuario", "grupo", "fecha", "egreso_id"], name="idx_egreso_usuario_fecha"),
+            # Listados y reportes de grupo: grupo=..., orden por (fecha, pk)
+            models.Index(fields=["grupo", "fecha", "egreso_id"], name="idx_egreso_grupo_fecha"),
+        ]
 
 
 class Movimiento(models.Model):
@@ -186,6 +198,11 @@ class Movimiento(models.Model):
             models.CheckConstraint(check=(models.Q(usuario__isnull=True) ^ models.Q(grupo__isnull=True)), name="chk_movimiento_owner"),
             models.CheckConstraint(check=models.Q(monto__gt=0), name="chk_movimiento_monto"),
         ]
+        indexes = [
+            # Q(usuario=...) | Q(grupo__in=...) se resuelve con ambos índices (OR de índices)
+            models.Index(fields=["usuario", "fecha", "movimiento_id"], name="idx_movimiento_usuario_fecha"),
+            models.Index(fields=["grupo", "fecha", "movimiento_id"], name="idx_movimiento_grupo_fecha"),
+        ]
 
 
 class Aportacion(models.Model):
@@ -219,3 +236,64 @@ class Aportacion(models.Model):
     def __str__(self):
         return f"{self.usuario.email} -> {self.grupo.nombre}: {self.monto}"
 
+
+
+class ResumenMensual(models.Model):
+    """
+    Acumulado mensual de ingresos y egresos por propietario (usuario o grupo),
+    bolsillo y categoría. Se actualiza en la misma transacción que las
+    escrituras de ingresos/egresos (ver finances/resumenes.py) y se puede
+    reconstruir con `python manage.py rebuild_resumen_mensual`.
+
+    Las referencias son enteros simples (0 = sin valor) y no FKs, para que la
+    restricción única funcione igual en SQLite y PostgreSQL.
+    """
+    resumen_id = models.BigAutoField(primary_key=True)
+    usuario_ref = models.IntegerField(default=0)
+    grupo_ref = models.IntegerField(default=0)
+    bolsillo_ref = models.IntegerField(default=0)
+    categoria_ref = models.IntegerField(default=0)
+    # Primer día del mes
+    periodo = models.DateField()
+    total_ingresos = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    total_egresos = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    num_ingresos = models.IntegerField(default=0)
+    num_egresos = models.IntegerField(default=0)
+
+    class Meta:
+        db_table = "resumen_mensual"
+        constraints = [
+            # Sirve también como índice para (usuario_ref, grupo_ref, periodo)
+            models.UniqueConstraint(
+                fields=["usuario_ref", "grupo_ref", "periodo", "bolsillo_ref", "categoria_ref"],
+                name="uk_resumen_mensual",
+            ),
+        ]
+
+
+class MovimientoUnificado(models.Model):
+    """
+    Vista de solo lectura `v_movimientos`: ingresos y egresos en una sola
+    línea de tiempo (UNION ALL). La crean las migraciones 0002/0012; Django no
+    la administra.
+
+    `uid` es único entre ambas tablas (ingreso_id*2, egreso_id*2+1) y sirve de
+    clave primaria para el orden (fecha, pk) de la paginación por cursor. En
+    los egresos `monto` es negativo.
+    """
+    uid = models.BigIntegerField(primary_key=True)
+    transaccion_id = models.IntegerField()
+    TIPO_CHOICES = [("ing", "ing"), ("eg", "eg")]
+    tipo = models.CharField(max_length=3, choices=TIPO_CHOICES)
+    monto = models.DecimalField(max_digits=14, decimal_places=2)
+    fecha = models.DateField()
+    descripcion = models.CharField(max_length=255, blank=True, null=True)
+    usuario = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    grupo = models.ForeignKey(Grupo, on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    categoria = models.ForeignKey(Categoria, on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    bolsillo = models.ForeignKey(Bolsillo, on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+    creado_por = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.DO_NOTHING, null=True, related_name='+', db_constraint=False)
+
+    class Meta:
+        managed = False
+        db_table = "v_movimientos"
@@ -0,0 +1,152 @@
+"""
+Paginación por keyset (cursor) para los listados de transacciones.
+
+Ordena por (fecha, pk) de forma descendente y filtra con
+`fecha < f OR (fecha = f AND pk < p)`, de modo que cualquier página cuesta lo
+mismo que la primera (no hay OFFSET). Los cursores son opacos (base64).
+"""
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class FechaCursorPagination(BasePagination):
+    """
+    Paginación opcional: solo se activa si la petición incluye `cursor` o
+    `page_size`, para no romper a los clientes que esperan la lista completa.
+    """
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    ordering_field = 'fecha'
+    invalid_cursor_message = 'Cursor inválido'
+    # Si es False la paginación se aplica siempre
+    opcional = True
+
+    def __init__(self):
+        self.page_size = getattr(settings, 'API_PAGE_SIZE', 50)
+        self.max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def get_page_size(self, request):
+        valor = request.query_params.get(self.page_size_query_param)
+        if valor is None:
+            return self.page_size
+        try:
+            page_size = int(valor)
+        except (TypeError, ValueError):
+            return self.page_size
+        if page_size <= 0:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if self.opcional and self.cursor_query_param not in params and self.page_size_query_param not in params:
+            return None
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        campo = self.ordering_field
+        fecha_field = queryset.model._meta.get_field(campo)
+
+        cursor = self.decode_cursor(request, fecha_field)
+        if cursor is None:
+            queryset = queryset.order_by(f'-{campo}', '-pk')
+            reverso = False
+        else:
+            fecha, pk, reverso = cursor
+            if reverso:
+                # Página anterior: elementos más nuevos que el cursor, en orden ascendente
+                queryset = queryset.filter(
+                    Q(**{f'{campo}__gt': fecha}) | Q(**{campo: fecha, 'pk__gt': pk})
+                ).order_by(campo, 'pk')
+            else:
+                queryset = queryset.filter(
+                    Q(**{f'{campo}__lt': fecha}) | Q(**{campo: fecha, 'pk__lt': pk})
+                ).order_by(f'-{campo}', '-pk')
+
+        resultados = list(queryset[:page_size + 1])
+        hay_mas = len(resultados) > page_size
+        resultados = resultados[:page_size]
+
+        if reverso:
+            resultados.reverse()
+            self.has_next = True
+            self.has_previous = hay_mas
+        else:
+            self.has_next = hay_mas
+            self.has_previous = cursor is not None
+
+        self.page = resultados
+        return resultados
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self._link(self.page[-1], reverso=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self._link(self.page[0], reverso=True)
+
+    def _posicion(self, item):
+        if isinstance(item, dict):
+            return item[self.ordering_field], item['pk']
+        return getattr(item, self.ordering_field), item.pk
+
+    def _link(self, item, reverso):
+        fecha, pk = self._posicion(item)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(fecha, pk, reverso))
+
+    def encode_cursor(self, fecha, pk, reverso=False):
+        payload = json.dumps({'f': fecha.isoformat(), 'p': pk, 'r': int(reverso)}, separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+    def decode_cursor(self, request, fecha_field):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            relleno = '=' * (-len(encoded) % 4)
+            payload = json.loads(base64.urlsafe_b64decode(encoded + relleno).decode('utf-8'))
+            fecha = fecha_field.to_python(payload['f'])
+            pk = int(payload['p'])
+            reverso = bool(payload.get('r'))
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+        if fecha is None:
+            raise NotFound(self.invalid_cursor_message)
+        return fecha, pk, reverso
+
+
+class FechaCursorPaginationObligatoria(FechaCursorPagination):
+    """Siempre pagina (listados sin forma de devolver todo en una respuesta)."""
+    opcional = False
@@ -0,0 +1,66 @@
+"""
+Parsers adicionales para la API.
+"""
+import codecs
+import csv
+import io
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional (ver requirements.txt)
+    orjson = None
+
+
+class JSONRapidoParser(JSONParser):
+    """
+    JSONParser con orjson si está disponible. Igual que el de DRF, rechaza
+    NaN/Infinity y devuelve los números con decimales como float: los
+    DecimalField de los serializers los convierten a Decimal.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            cuerpo = stream.read()
+            if encoding.lower().replace('-', '') != 'utf8':
+                cuerpo = cuerpo.decode(encoding)
+            return orjson.loads(cuerpo)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+
+class CSVParser(BaseParser):
+    """
+    Convierte un cuerpo text/csv (con fila de encabezados) en una lista de dicts.
+    """
+    media_type = 'text/csv'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        try:
+            texto = codecs.getreader(encoding)(stream).read()
+        except UnicodeDecodeError as exc:
+            raise ParseError(f'CSV inválido - {exc}')
+        return leer_csv(texto)
+
+
+def leer_csv(texto):
+    """Lee un CSV con encabezados y devuelve una lista de dicts (ignora BOM y filas vacías)."""
+    texto = texto.lstrip('﻿')
+    try:
+        lector = csv.DictReader(io.StringIO(texto))
+        return [
+            {(clave or '').strip(): (valor.strip() if isinstance(valor, str) else valor) for clave, valor in fila.items()}
+            for fila in lector
+            if any((valor or '').strip() for valor in fila.values() if isinstance(valor, str))
+        ]
+    except csv.Error as exc:
+        raise ParseError(f'CSV inválido - {exc}')
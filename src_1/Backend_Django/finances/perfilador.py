@@ -0,0 +1,123 @@
+"""
+Perfilado a pedido de una petición en el servidor real.
+
+Un usuario staff pide el perfil con la cabecera `X-Perfilar` o el parámetro
+`?perfilar=`; el valor elige el formato (`1` usa PERFILADOR_FORMATO):
+
+- pstats:    cProfile determinista, archivo .prof para pstats/snakeviz.
+- colapsado: muestreo de la pila cada PERFILADOR_INTERVALO_MS, archivo .txt
+             con pilas colapsadas (flamegraph.pl, speedscope).
+
+El archivo se escribe en PERFILADOR_DIR y su nombre vuelve en la cabecera
+`X-Perfil`. Las peticiones sin la marca solo pasan por una búsqueda en
+cabeceras y parámetros. Con la marca, se autentica el token con las clases de
+DRF antes de la vista, y si el usuario no es staff la petición sigue sin
+perfilar. Las vistas de views_async (ASGI) no se perfilan.
+
+    curl -H "Authorization: Token ..." -H "X-Perfilar: colapsado" https://.../api/egresos/
+"""
+import cProfile
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+from .authentication import es_staff
+
+
+logger = logging.getLogger(__name__)
+
+CABECERA = 'X-Perfilar'
+PARAMETRO = 'perfilar'
+FORMATOS = {'pstats': '.prof', 'colapsado': '.txt'}
+
+
+class MuestreadorPila:
+    """Cuenta las pilas de un hilo vistas cada `intervalo` segundos desde otro hilo."""
+
+    def __init__(self, intervalo):
+        self.intervalo = intervalo
+        self.hilo = threading.get_ident()
+        self.pilas = Counter()
+        self._parar = threading.Event()
+        self._muestreador = threading.Thread(target=self._muestrear, name='perfilador', daemon=True)
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo)
+            pila = []
+            while frame is not None:
+                pila.append(f'{frame.f_globals.get("__name__", "?")}.{frame.f_code.co_qualname}')
+                frame = frame.f_back
+            if pila:
+                self.pilas[';'.join(reversed(pila))] += 1
+
+    def ejecutar(self, funcion, *args):
+        self._muestreador.start()
+        try:
+            return funcion(*args)
+        finally:
+            self._parar.set()
+            self._muestreador.join()
+
+    def guardar(self, ruta):
+        with open(ruta, 'w', encoding='utf-8') as archivo:
+            for pila, cuenta in self.pilas.most_common():
+                archivo.write(f'{pila} {cuenta}\n')
+
+
+def formato_pedido(request):
+    """Formato pedido por la petición, o None si no trae la marca."""
+    valor = request.headers.get(CABECERA) or request.GET.get(PARAMETRO)
+    if not valor:
+        return None
+    valor = valor.strip().lower()
+    if valor in ('1', 'true'):
+        return getattr(settings, 'PERFILADOR_FORMATO', 'pstats')
+    return valor if valor in FORMATOS else None
+
+
+def nombre_archivo(request, formato):
+    ruta = re.sub(r'[^A-Za-z0-9]+', '-', request.path).strip('-') or 'raiz'
+    return f'{time.strftime("%Y%m%d-%H%M%S")}-{request.method}-{ruta}-{uuid.uuid4().hex[:8]}{FORMATOS[formato]}'
+
+
+class PerfiladorMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.es_async = iscoroutinefunction(get_response)
+        if self.es_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.es_async:
+            return self.get_response(request)
+        formato = formato_pedido(request)
+        if formato is None or not es_staff(request):
+            return self.get_response(request)
+
+        directorio = str(settings.PERFILADOR_DIR)
+        os.makedirs(directorio, exist_ok=True)
+        archivo = nombre_archivo(request, formato)
+        if formato == 'pstats':
+            perfil = cProfile.Profile()
+            response = perfil.runcall(self.get_response, request)
+            perfil.dump_stats(os.path.join(directorio, archivo))
+        else:
+            muestreador = MuestreadorPila(getattr(settings, 'PERFILADOR_INTERVALO_MS', 5) / 1000)
+            response = muestreador.ejecutar(self.get_response, request)
+            muestreador.guardar(os.path.join(directorio, archivo))
+
+        logger.info('Perfil de %s %s guardado en %s', request.method, request.path, archivo)
+        response['X-Perfil'] = archivo
+        return response
@@ -0,0 +1,82 @@
+"""
+Presupuestos de consultas SQL por acción de las vistas.
+
+Cada vista declara cuántas consultas puede hacer por acción:
+
+    class IngresoViewSet(...):
+        presupuesto_consultas = {'list': 4, 'retrieve': 3, 'create': 9}
+
+Las acciones son las de DRF (list, retrieve, create, update, partial_update, destroy,
+las de @action) y en las APIView el método en minúsculas (get, post).
+
+`python manage.py check_query_budgets` verifica los presupuestos sobre una base
+de pruebas con datos de dos tamaños y falla si alguna acción pasa de su
+presupuesto o hace más consultas con más filas (N+1); finances/tests.py corre
+la misma verificación. Un solo presupuesto cubre todas las variantes de la
+acción (p. ej. los parámetros opcionales de dashboard/overview). En ejecución,
+MetricasMiddleware compara las consultas de cada petición con el presupuesto
+y, si PRESUPUESTOS_CONSULTAS_AVISAR está activo (por defecto con DEBUG),
+escribe un warning en el logger `finances.presupuestos`. Con
+PRESUPUESTOS_CONSULTAS_ESTRICTO (lo activa EjecutorPruebas en `manage.py
+test`) lanza PresupuestoExcedido, así que la prueba que hizo la petición falla.
+"""
+import logging
+
+from django.conf import settings
+from django.test.runner import DiscoverRunner
+
+
+logger = logging.getLogger(__name__)
+
+# Sentencias de los bloques atomic anidados; en autocommit no existen, así que no cuentan
+PREFIJOS_TRANSACCION = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+MENSAJE_EXCESO = 'Presupuesto de consultas excedido en %s.%s: %d consultas (presupuesto %d) %s %s'
+
+
+class PresupuestoExcedido(AssertionError):
+    """Una petición superó el presupuesto de consultas de su acción (modo estricto)."""
+
+
+def vista_y_accion(funcion, metodo):
+    """(clase, acción) del callback de una ruta para un método HTTP; la clase es None en vistas función."""
+    clase = getattr(funcion, 'cls', None) or getattr(funcion, 'view_class', None)
+    if clase is None:
+        return None, None
+    acciones = getattr(funcion, 'actions', None)
+    if acciones is not None:
+        return clase, acciones.get(metodo.lower(), metodo.lower())
+    return clase, metodo.lower()
+
+
+def limite(clase, accion):
+    """Consultas permitidas a la acción, o None si la vista no declara presupuesto para ella."""
+    return (getattr(clase, 'presupuesto_consultas', None) or {}).get(accion)
+
+
+def contar(sentencias):
+    """Cantidad de sentencias SQL sin contar las de savepoints."""
+    return sum(1 for sql in sentencias if not sql.lstrip().upper().startswith(PREFIJOS_TRANSACCION))
+
+
+def revisar(request, consultas):
+    """Avisa (o falla, en modo estricto) si la petición hizo más consultas que el presupuesto de su acción."""
+    estricto = getattr(settings, 'PRESUPUESTOS_CONSULTAS_ESTRICTO', False)
+    if not (estricto or getattr(settings, 'PRESUPUESTOS_CONSULTAS_AVISAR', False)) or request.resolver_match is None:
+        return
+    clase, accion = vista_y_accion(request.resolver_match.func, request.method)
+    maximo = limite(clase, accion)
+    if maximo is None or consultas <= maximo:
+        return
+    argumentos = (clase.__name__, accion, consultas, maximo, request.method, request.path)
+    if estricto:
+        raise PresupuestoExcedido(MENSAJE_EXCESO % argumentos)
+    logger.warning(MENSAJE_EXCESO, *argumentos)
+
+
+class EjecutorPruebas(DiscoverRunner):
+    """TEST_RUNNER del proyecto: las peticiones de las pruebas fallan si superan su presupuesto."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        settings.PRESUPUESTOS_CONSULTAS_ESTRICTO = True
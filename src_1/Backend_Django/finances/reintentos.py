@@ -0,0 +1,95 @@
+"""
+Reintentos de escrituras cuando SQLite responde "database is locked".
+
+SQLite admite un solo escritor a la vez. Con el perfil de backend/settings.py
+(WAL, busy_timeout y transaction_mode IMMEDIATE) cada transacción pide el
+bloqueo de escritura en el BEGIN y espera hasta busy_timeout; si aun así no lo
+obtiene, el error llega antes de ejecutar nada. Estos decoradores repiten la
+llamada completa un número acotado de veces con espera exponencial y jitter.
+
+Solo se reintenta si la llamada no está dentro de otra transacción: en ese
+caso la transacción externa ya no sirve y el error se propaga para que la
+reintente quien la abrió. Con PostgreSQL el mensaje no coincide y los errores
+se propagan sin cambios.
+"""
+import functools
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+
+
+logger = logging.getLogger(__name__)
+
+MENSAJES_BLOQUEO = ('database is locked', 'database table is locked', 'database schema is locked')
+
+_contadores = {'reintentos': 0, 'agotados': 0}
+_lock = threading.Lock()
+
+
+def es_bloqueo(exc):
+    return isinstance(exc, OperationalError) and any(mensaje in str(exc).lower() for mensaje in MENSAJES_BLOQUEO)
+
+
+def espera(intento, base, maximo):
+    """Segundos antes del reintento `intento` (0, 1, ...): backoff exponencial con jitter completo."""
+    return random.uniform(0, min(maximo, base * 2 ** intento))
+
+
+def contadores():
+    """Reintentos hechos y llamadas que agotaron los intentos en este proceso."""
+    with _lock:
+        return dict(_contadores)
+
+
+def _contar(clave):
+    with _lock:
+        _contadores[clave] += 1
+
+
+def con_reintentos(funcion=None, *, using=None, intentos=None):
+    """
+    Repite `funcion` si falla por bloqueo de la base. La función debe poder
+    repetirse completa: todo lo que escribe tiene que ir en su transacción.
+    """
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            if connections[using or DEFAULT_DB_ALIAS].in_atomic_block:
+                return funcion(*args, **kwargs)
+            total = intentos or getattr(settings, 'DB_REINTENTOS', 5)
+            base = getattr(settings, 'DB_REINTENTO_ESPERA_BASE', 0.05)
+            maximo = getattr(settings, 'DB_REINTENTO_ESPERA_MAX', 1.0)
+            for intento in range(total):
+                try:
+                    return funcion(*args, **kwargs)
+                except OperationalError as exc:
+                    if not es_bloqueo(exc):
+                        raise
+                    if intento == total - 1:
+                        _contar('agotados')
+                        raise
+                    pausa = espera(intento, base, maximo)
+                    _contar('reintentos')
+                    logger.warning(
+                        'Base de datos bloqueada en %s; reintento %d/%d en %.3f s',
+                        funcion.__qualname__, intento + 1, total - 1, pausa,
+                    )
+                    time.sleep(pausa)
+        return envoltura
+    return decorador(funcion) if funcion else decorador
+
+
+def atomico(funcion=None, *, using=None, intentos=None):
+    """transaction.atomic con reintentos ante bloqueos (reemplaza a @transaction.atomic)."""
+    def decorador(funcion):
+        return con_reintentos(transaction.atomic(using=using)(funcion), using=using, intentos=intentos)
+    return decorador(funcion) if funcion else decorador
+
+
+def en_transaccion(funcion, *args, **kwargs):
+    """Ejecuta funcion(*args, **kwargs) con atomico(); para bloques dentro de un método."""
+    return atomico(funcion)(*args, **kwargs)
@@ -0,0 +1,59 @@
+"""
+Renderer JSON de la API.
+
+Con orjson instalado las respuestas se codifican en C sin pasar por
+json.JSONEncoder. Los serializers mantienen los ajustes por defecto de DRF y
+entregan montos y fechas ya formateados como texto ("12.50", "...T10:00:00Z");
+el renderer solo escribe esas cadenas. Los Decimal, fechas y datetimes que
+las vistas devuelven sin serializer se escriben igual que DRF los formatearía:
+Decimal como texto con sus decimales, nunca float, y datetimes UTC con Z.
+
+Sin orjson se usa el JSONRenderer de DRF con el mismo formato de salida.
+"""
+import datetime
+import decimal
+
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Dependencia opcional (ver requirements.txt)
+    orjson = None
+
+
+def a_json(obj):
+    """Tipos que no son JSON nativo. Decimal siempre como texto, nunca float."""
+    if isinstance(obj, decimal.Decimal):
+        return format(obj, 'f')
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    return JSONEncoder().default(obj)
+
+
+class DecimalTextoEncoder(JSONEncoder):
+    """JSONEncoder de DRF pero con Decimal como texto (DRF los pasa a float)."""
+
+    def default(self, obj):
+        if isinstance(obj, decimal.Decimal):
+            return format(obj, 'f')
+        return super().default(obj)
+
+
+class JSONRapidoRenderer(JSONRenderer):
+    """JSONRenderer con orjson si está disponible; misma salida que DRF."""
+    encoder_class = DecimalTextoEncoder
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None:
+            return super().render(data, accepted_media_type, renderer_context)
+        if data is None:
+            return b''
+        opciones = orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS
+        # ?indent / Accept: application/json; indent=N (el navegador de la API lo usa)
+        if self.get_indent(accepted_media_type or '', renderer_context or {}):
+            opciones |= orjson.OPT_INDENT_2
+        return orjson.dumps(data, default=a_json, option=opciones)
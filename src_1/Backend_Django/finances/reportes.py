@@ -0,0 +1,318 @@
+"""
+Consultas agregadas para estadísticas y reportes.
+
+Las funciones de este módulo calculan los totales directamente en la base de
+datos (GROUP BY) para que el frontend no tenga que descargar todas las
+transacciones y sumarlas en el navegador. Siempre que es posible leen la
+tabla de resumen mensual (ResumenMensual) en lugar del historial completo.
+"""
+import datetime
+from decimal import Decimal
+
+from django.db.models import F, Sum
+from django.db.models.functions import TruncYear
+from django.utils import timezone
+from rest_framework.exceptions import ValidationError
+
+from . import membresias, models, resumenes
+
+
+MAX_PERIODOS = 120
+CENTAVOS = Decimal('0.01')
+
+
+def filtro_propietario(user, grupo_id=None, request=None):
+    """
+    Devuelve el filtro de propietario que usan los listados de transacciones:
+    con grupo_id solo datos del grupo, sin grupo_id solo datos personales.
+    """
+    if grupo_id:
+        try:
+            grupo_id = int(grupo_id)
+        except (TypeError, ValueError):
+            raise ValidationError({'detail': 'El grupo_id debe ser un número válido'})
+        if not membresias.es_miembro(user, grupo_id, request):
+            raise ValidationError({'detail': 'No eres miembro de este grupo'})
+        return {'grupo_id': grupo_id}
+    return {'usuario': user, 'grupo__isnull': True}
+
+
+def _indice_mes(fecha):
+    return fecha.year * 12 + fecha.month - 1
+
+
+def _mes_desde_indice(indice):
+    return datetime.date(indice // 12, indice % 12 + 1, 1)
+
+
+def _parsear_referencia(reference, group_by):
+    """Convierte 'YYYY-MM' (o 'YYYY' para años) en el primer día del periodo."""
+    if not reference:
+        hoy = timezone.localdate()
+        return datetime.date(hoy.year, 1 if group_by == 'year' else hoy.month, 1)
+    try:
+        partes = [int(p) for p in str(reference).split('-')[:2]]
+        if group_by == 'year':
+            return datetime.date(partes[0], 1, 1)
+        return datetime.date(partes[0], partes[1], 1)
+    except (ValueError, IndexError):
+        raise ValidationError({'detail': 'El parámetro reference debe tener formato YYYY-MM'})
+
+
+def rango_periodos(group_by='month', periods=6, reference=None):
+    """
+    Calcula los periodos solicitados terminando en `reference`.
+    Devuelve (lista de fechas de inicio de cada periodo, fecha fin exclusiva).
+    """
+    if group_by not in ('month', 'year'):
+        raise ValidationError({'detail': 'El parámetro group_by debe ser "month" o "year"'})
+    try:
+        periods = int(periods)
+    except (TypeError, ValueError):
+        raise ValidationError({'detail': 'El parámetro periods debe ser un número válido'})
+    if periods < 1 or periods > MAX_PERIODOS:
+        raise ValidationError({'detail': f'El parámetro periods debe estar entre 1 y {MAX_PERIODOS}'})
+
+    fin = _parsear_referencia(reference, group_by)
+    # El primer periodo y el fin exclusivo tienen que ser fechas válidas (años 1 a 9999)
+    if group_by == 'year':
+        valido = datetime.MINYEAR <= fin.year - periods + 1 and fin.year + 1 <= datetime.MAXYEAR
+    else:
+        indice_fin = _indice_mes(fin)
+        valido = (
+            _indice_mes(datetime.date.min) <= indice_fin - periods + 1
+            and indice_fin + 1 <= _indice_mes(datetime.date.max)
+        )
+    if not valido:
+        raise ValidationError({'detail': 'El parámetro reference con esos periods queda fuera del rango de fechas admitido'})
+    if group_by == 'year':
+        inicios = [datetime.date(fin.year - i, 1, 1) for i in range(periods - 1, -1, -1)]
+        fin_exclusivo = datetime.date(fin.year + 1, 1, 1)
+    else:
+        indice_fin = _indice_mes(fin)
+        inicios = [_mes_desde_indice(indice_fin - i) for i in range(periods - 1, -1, -1)]
+        fin_exclusivo = _mes_desde_indice(indice_fin + 1)
+    return inicios, fin_exclusivo
+
+
+def formatear_monto(valor):
+    # El renderer (finances/renderers.py) escribe los Decimal como texto
+    return (valor or Decimal('0')).quantize(CENTAVOS)
+
+
+def etiqueta_periodo(fecha, group_by):
+    return f'{fecha.year:04d}' if group_by == 'year' else f'{fecha.year:04d}-{fecha.month:02d}'
+
+
+def totales_por_periodo(filtro, group_by='month', periods=6, reference=None):
+    """
+    Suma ingresos y egresos por mes o año con un único GROUP BY sobre la tabla
+    de resumen mensual y rellena los periodos vacíos con cero.
+    """
+    inicios, fin_exclusivo = rango_periodos(group_by, periods, reference)
+
+    queryset = models.ResumenMensual.objects.filter(
+        **resumenes.filtro_resumen(filtro), periodo__gte=inicios[0], periodo__lt=fin_exclusivo
+    )
+    if group_by == 'year':
+        queryset = queryset.annotate(bucket=TruncYear('periodo'))
+    else:
+        queryset = queryset.annotate(bucket=F('periodo'))
+    filas = (
+        queryset
+        .values('bucket')
+        .annotate(ingresos=Sum('total_ingresos'), egresos=Sum('total_egresos'))
+        .values_list('bucket', 'ingresos', 'egresos')
+        .order_by()
+    )
+
+    buckets = {etiqueta_periodo(inicio, group_by): [Decimal('0'), Decimal('0')] for inicio in inicios}
+    for periodo, ingresos, egresos in filas:
+        if isinstance(periodo, datetime.datetime):
+            periodo = periodo.date()
+        clave = etiqueta_periodo(periodo, group_by)
+        if clave in buckets:
+            buckets[clave][0] += ingresos or Decimal('0')
+            buckets[clave][1] += egresos or Decimal('0')
+
+    return [
+        {
+            'periodo': clave,
+            'ingresos': formatear_monto(ingresos),
+            'egresos': formatear_monto(egresos),
+            'neto': formatear_monto(ingresos - egresos),
+        }
+        for clave, (ingresos, egresos) in buckets.items()
+    ]
+
+
+def _parsear_fecha(valor, nombre):
+    if not valor:
+        return None
+    try:
+        return datetime.date.fromisoformat(str(valor))
+    except ValueError:
+        raise ValidationError({'detail': f'El parámetro {nombre} debe tener formato YYYY-MM-DD'})
+
+
+def rango_fechas(fecha_desde=None, fecha_hasta=None):
+    """Filtro opcional por rango de fechas (ambos extremos incluidos)."""
+    filtro = {}
+    desde = _parsear_fecha(fecha_desde, 'fecha_desde')
+    hasta = _parsear_fecha(fecha_hasta, 'fecha_hasta')
+    if desde:
+        filtro['fecha__gte'] = desde
+    if hasta:
+        filtro['fecha__lte'] = hasta
+    return filtro
+
+
+def bolsillos_propietario(filtro):
+    """Tarjetas de bolsillos del propietario (una consulta)."""
+    return list(
+        models.Bolsillo.objects
+        .filter(**filtro)
+        .order_by('bolsillo_id')
+        .values('bolsillo_id', 'nombre', 'saldo', 'color')
+    )
+
+
+def total_ingresos(filtro, fechas=None):
+    """Total de ingresos del periodo (una consulta)."""
+    if not fechas:
+        # Sin rango de fechas basta con el resumen mensual
+        queryset = models.ResumenMensual.objects.filter(**resumenes.filtro_resumen(filtro))
+        total = queryset.aggregate(total=Sum('total_ingresos'))['total']
+    else:
+        total = models.Ingreso.objects.filter(**filtro, **fechas).aggregate(total=Sum('monto'))['total']
+    return total or Decimal('0')
+
+
+def egresos_por_categoria(filtro, fechas=None):
+    """
+    Totales de egresos agrupados por categoría. Sin rango de fechas se leen del
+    resumen mensual (dos consultas: agrupación y nombres de categorías).
+    """
+    if fechas:
+        return list(
+            models.Egreso.objects
+            .filter(**filtro, **fechas)
+            .values('categoria_id', 'categoria__nombre', 'categoria__color')
+            .annotate(total=Sum('monto'))
+            .order_by('-total')
+        )
+
+    filas = list(
+        models.ResumenMensual.objects
+        .filter(**resumenes.filtro_resumen(filtro), num_egresos__gt=0)
+        .values('categoria_ref')
+        .annotate(total=Sum('total_egresos'))
+        .order_by('-total')
+    )
+    ids = [f['categoria_ref'] for f in filas if f['categoria_ref']]
+    categorias = {
+        c['categoria_id']: c
+        for c in models.Categoria.objects.filter(categoria_id__in=ids).values('categoria_id', 'nombre', 'color')
+    } if ids else {}
+    resultado = []
+    for fila in filas:
+        categoria = categorias.get(fila['categoria_ref'])
+        resultado.append({
+            'categoria_id': categoria['categoria_id'] if categoria else None,
+            'categoria__nombre': categoria['nombre'] if categoria else None,
+            'categoria__color': categoria['color'] if categoria else None,
+            'total': fila['total'],
+        })
+    return resultado
+
+
+def armar_resumen(bolsillos, ingresos, categorias):
+    """Combina los resultados de las consultas del dashboard en la respuesta final."""
+    saldo_total = sum((b['saldo'] for b in bolsillos), Decimal('0'))
+    egresos = sum((c['total'] or Decimal('0') for c in categorias), Decimal('0'))
+    base = egresos or Decimal('1')
+    return {
+        'saldo_total': formatear_monto(saldo_total),
+        'ingresos': formatear_monto(ingresos),
+        'egresos': formatear_monto(egresos),
+        'neto': formatear_monto(ingresos - egresos),
+        'bolsillos': [
+            {
+                'bolsillo_id': b['bolsillo_id'],
+                'nombre': b['nombre'],
+                'saldo': formatear_monto(b['saldo']),
+                'color': b['color'],
+            }
+            for b in bolsillos
+        ],
+        'categorias': [
+            {
+                'categoria_id': c['categoria_id'],
+                'nombre': c['categoria__nombre'] or 'Otros',
+                'color': c['categoria__color'],
+                'total': formatear_monto(c['total']),
+                'porcentaje': round(float((c['total'] or 0) / base) * 100),
+            }
+            for c in categorias
+        ],
+    }
+
+
+def movimientos_recientes(filtro, fechas=None, limite=10):
+    """Últimos ingresos y egresos desde la vista v_movimientos (una consulta)."""
+    return list(
+        models.MovimientoUnificado.objects
+        .filter(**filtro, **(fechas or {}))
+        .order_by('-fecha', '-uid')
+        .values(
+            'uid', 'tipo', 'monto', 'fecha', 'descripcion',
+            categoria_nombre=F('categoria__nombre'), bolsillo_nombre=F('bolsillo__nombre'),
+        )[:limite]
+    )
+
+
+# Partes del dashboard que se agregan con ?incluir=
+PARTES_OPCIONALES = ('periodos', 'recientes')
+
+
+def leer_incluir(valor):
+    partes = [parte.strip() for parte in (valor or '').split(',') if parte.strip()]
+    if set(partes) - set(PARTES_OPCIONALES):
+        raise ValidationError({'detail': f'El parámetro incluir admite: {", ".join(PARTES_OPCIONALES)}'})
+    return partes
+
+
+def consultas_dashboard(filtro, fechas=None, incluir=()):
+    """
+    Consultas independientes del dashboard como {nombre: función sin argumentos}.
+    Las vistas síncronas las ejecutan en serie y las de views_async a la vez.
+    """
+    consultas = {
+        'bolsillos': lambda: bolsillos_propietario(filtro),
+        'ingresos': lambda: total_ingresos(filtro, fechas),
+        'categorias': lambda: egresos_por_categoria(filtro, fechas),
+    }
+    if 'periodos' in incluir:
+        consultas['periodos'] = lambda: totales_por_periodo(filtro)
+    if 'recientes' in incluir:
+        consultas['recientes'] = lambda: movimientos_recientes(filtro, fechas)
+    return consultas
+
+
+def armar_dashboard(resultados):
+    """Respuesta del dashboard a partir de {nombre: resultado} de consultas_dashboard."""
+    resumen = armar_resumen(resultados['bolsillos'], resultados['ingresos'], resultados['categorias'])
+    for parte in PARTES_OPCIONALES:
+        if parte in resultados:
+            resumen[parte] = resultados[parte]
+    return resumen
+
+
+def resumen_dashboard(filtro, fechas=None, incluir=()):
+    """
+    Resumen del dashboard con un número fijo de consultas agregadas
+    (bolsillos, total de ingresos y egresos por categoría) sobre la tabla de
+    resumen mensual, independiente del tamaño del historial.
+    """
+    consultas = consultas_dashboard(filtro, fechas, incluir)
+    return armar_dashboard({nombre: consulta() for nombre, consulta in consultas.items()})
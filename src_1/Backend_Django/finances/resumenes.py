@@ -0,0 +1,190 @@
+"""
+Mantenimiento de la tabla de resumen mensual (ResumenMensual).
+
+Cada alta, edición o borrado de un ingreso/egreso aplica aquí su delta dentro
+de la misma transacción, de modo que los reportes mensuales y por categoría
+leen unas pocas filas acumuladas en lugar de todo el historial.
+"""
+import datetime
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db import DEFAULT_DB_ALIAS, IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncMonth
+
+from . import models
+
+
+CAMPOS_CLAVE = ('usuario_ref', 'grupo_ref', 'bolsillo_ref', 'categoria_ref', 'periodo')
+CAMPOS_TOTALES = ('total_ingresos', 'num_ingresos', 'total_egresos', 'num_egresos')
+
+
+def _primer_dia_mes(fecha):
+    if isinstance(fecha, str):
+        fecha = models.Ingreso._meta.get_field('fecha').to_python(fecha)
+    if isinstance(fecha, datetime.datetime):
+        fecha = fecha.date()
+    return fecha.replace(day=1)
+
+
+def clave_transaccion(transaccion):
+    """Clave del resumen (usuario, grupo, bolsillo, categoría, mes) de un ingreso/egreso."""
+    return (
+        transaccion.usuario_id or 0,
+        transaccion.grupo_id or 0,
+        transaccion.bolsillo_id or 0,
+        transaccion.categoria_id or 0,
+        _primer_dia_mes(transaccion.fecha),
+    )
+
+
+def _delta_vacio():
+    return {'total_ingresos': Decimal('0'), 'num_ingresos': 0, 'total_egresos': Decimal('0'), 'num_egresos': 0}
+
+
+class Deltas:
+    """Acumula deltas por clave para aplicarlos con una escritura por fila de resumen."""
+
+    def __init__(self):
+        self._deltas = defaultdict(_delta_vacio)
+
+    def agregar(self, transaccion, signo=1):
+        delta = self._deltas[clave_transaccion(transaccion)]
+        monto = Decimal(str(transaccion.monto))
+        if isinstance(transaccion, models.Ingreso):
+            delta['total_ingresos'] += signo * monto
+            delta['num_ingresos'] += signo
+        else:
+            delta['total_egresos'] += signo * monto
+            delta['num_egresos'] += signo
+        return self
+
+    def aplicar(self):
+        for clave, delta in self._deltas.items():
+            if any(delta.values()):
+                _aplicar_delta(dict(zip(CAMPOS_CLAVE, clave)), delta)
+        self._deltas.clear()
+
+
+def _aplicar_delta(clave, delta):
+    actualizados = models.ResumenMensual.objects.filter(**clave).update(
+        **{campo: F(campo) + valor for campo, valor in delta.items()}
+    )
+    if actualizados:
+        return
+    try:
+        # Savepoint: si otra transacción insertó la misma fila, se reintenta como UPDATE
+        with transaction.atomic():
+            models.ResumenMensual.objects.create(**clave, **delta)
+    except IntegrityError:
+        models.ResumenMensual.objects.filter(**clave).update(
+            **{campo: F(campo) + valor for campo, valor in delta.items()}
+        )
+
+
+def registrar(transaccion, signo=1):
+    """Suma (signo=1) o resta (signo=-1) un ingreso/egreso del resumen mensual."""
+    Deltas().agregar(transaccion, signo).aplicar()
+
+
+def desvincular(campo, valor):
+    """
+    Pasa a 0 la referencia `campo` (bolsillo_ref o categoria_ref) de las filas
+    que apuntan a `valor`, igual que SET_NULL hace con los ingresos/egresos al
+    borrar el bolsillo o la categoría. Sin esto, editar o borrar después esas
+    transacciones restaría de la fila con referencia 0 y no de la original.
+    Las filas se suman a las que ya tengan la referencia en 0, con un número
+    fijo de consultas sin importar cuántas sean.
+    """
+    filas = models.ResumenMensual.objects.filter(**{campo: valor})
+    movidas = list(filas.values(*CAMPOS_CLAVE, *CAMPOS_TOTALES))
+    if not movidas:
+        return 0
+    deltas = {}
+    for fila in movidas:
+        clave = dict(zip(CAMPOS_CLAVE, (fila[nombre] for nombre in CAMPOS_CLAVE)), **{campo: 0})
+        deltas[tuple(clave[nombre] for nombre in CAMPOS_CLAVE)] = {nombre: fila[nombre] for nombre in CAMPOS_TOTALES}
+
+    # Las filas de destino (referencia en 0) que ya existen, bloqueadas hasta el final de la transacción
+    destinos = {
+        tuple(getattr(fila, nombre) for nombre in CAMPOS_CLAVE): fila
+        for fila in models.ResumenMensual.objects.select_for_update().filter(
+            **{campo: 0},
+            **{f'{nombre}__in': {clave[i] for clave in deltas} for i, nombre in enumerate(CAMPOS_CLAVE) if nombre != campo},
+        )
+    }
+    filas.delete()
+
+    existentes, nuevas = [], []
+    for clave, delta in deltas.items():
+        fila = destinos.get(clave)
+        if fila is None:
+            nuevas.append((clave, delta))
+            continue
+        for nombre, cantidad in delta.items():
+            setattr(fila, nombre, getattr(fila, nombre) + cantidad)
+        existentes.append(fila)
+    if existentes:
+        models.ResumenMensual.objects.bulk_update(existentes, CAMPOS_TOTALES)
+    if nuevas:
+        try:
+            # Savepoint: si otra transacción insertó alguna de las filas, se aplican una por una
+            with transaction.atomic():
+                models.ResumenMensual.objects.bulk_create([
+                    models.ResumenMensual(**dict(zip(CAMPOS_CLAVE, clave)), **delta) for clave, delta in nuevas
+                ])
+        except IntegrityError:
+            for clave, delta in nuevas:
+                _aplicar_delta(dict(zip(CAMPOS_CLAVE, clave)), delta)
+    return len(movidas)
+
+
+def reconstruir(ingreso_model=None, egreso_model=None, resumen_model=None, batch_size=1000, using=None):
+    """
+    Recalcula toda la tabla de resumen desde cero con dos GROUP BY.
+    Acepta los modelos y la base (`using`) como parámetro para poder usarse
+    desde migraciones.
+    """
+    using = using or DEFAULT_DB_ALIAS
+    ingreso_model = ingreso_model or models.Ingreso
+    egreso_model = egreso_model or models.Egreso
+    resumen_model = resumen_model or models.ResumenMensual
+
+    acumulado = defaultdict(_delta_vacio)
+    for modelo, campo_total, campo_num in (
+        (ingreso_model, 'total_ingresos', 'num_ingresos'),
+        (egreso_model, 'total_egresos', 'num_egresos'),
+    ):
+        filas = (
+            modelo.objects.using(using)
+            .annotate(mes=TruncMonth('fecha'))
+            .values('usuario_id', 'grupo_id', 'bolsillo_id', 'categoria_id', 'mes')
+            .annotate(total=Sum('monto'), num=Count('pk'))
+            .order_by()
+        )
+        for fila in filas:
+            clave = (
+                fila['usuario_id'] or 0,
+                fila['grupo_id'] or 0,
+                fila['bolsillo_id'] or 0,
+                fila['categoria_id'] or 0,
+                _primer_dia_mes(fila['mes']),
+            )
+            acumulado[clave][campo_total] += fila['total'] or Decimal('0')
+            acumulado[clave][campo_num] += fila['num']
+
+    with transaction.atomic(using=using):
+        resumen_model.objects.using(using).all().delete()
+        resumen_model.objects.using(using).bulk_create(
+            [resumen_model(**dict(zip(CAMPOS_CLAVE, clave)), **valores) for clave, valores in acumulado.items()],
+            batch_size=batch_size,
+        )
+    return len(acumulado)
+
+
+def filtro_resumen(filtro):
+    """Traduce el filtro de propietario de las transacciones (reportes.filtro_propietario) al resumen."""
+    if filtro.get('grupo_id'):
+        return {'usuario_ref': 0, 'grupo_ref': filtro['grupo_id']}
+    return {'usuario_ref': filtro['usuario'].pk, 'grupo_ref': 0}
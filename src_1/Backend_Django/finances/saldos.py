@@ -0,0 +1,201 @@
+"""
+Cambios de saldo de los bolsillos.
+
+Los saldos se modifican siempre con un UPDATE atómico por bolsillo
+(`saldo = saldo + delta`) en lugar de leer, sumar en Python y guardar la fila
+completa. Para los débitos la verificación de saldo suficiente va en el mismo
+UPDATE (`WHERE saldo >= -delta`), así dos peticiones concurrentes no pueden
+dejar el bolsillo en negativo ni pisarse los cambios, y no hace falta bloquear
+la fila antes de escribir.
+
+Las funciones deben llamarse dentro de transaction.atomic() junto con los
+inserts relacionados: si un débito no procede se lanza ValidationError y la
+transacción completa se revierte.
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from django.db.models import Case, DecimalField, F, Sum, Value, When
+from rest_framework.exceptions import ValidationError
+
+from . import models
+
+
+CENTAVOS = Decimal('0.01')
+CERO = Decimal('0.00')
+
+DESCRIPCION_ADOPCION = 'Saldo adoptado en conciliación'
+
+
+def _mensaje_insuficiente(bolsillo_id, requerido):
+    bolsillo = models.Bolsillo.objects.filter(bolsillo_id=bolsillo_id).values('nombre', 'saldo').first()
+    if bolsillo is None:
+        return 'El bolsillo no existe'
+    return (
+        f'Saldo insuficiente en el bolsillo "{bolsillo["nombre"]}". '
+        f'Saldo disponible: ${bolsillo["saldo"]}, monto requerido: ${requerido}'
+    )
+
+
+def aplicar(deltas, verificar=True):
+    """
+    Aplica {bolsillo_id: delta} con un UPDATE por bolsillo. Los deltas del
+    mismo bolsillo se suman antes de escribir. Con `verificar`, un delta
+    negativo solo se aplica si el saldo alcanza; si no, ValidationError.
+    """
+    netos = defaultdict(Decimal)
+    for bolsillo_id, delta in deltas.items() if isinstance(deltas, dict) else deltas:
+        if bolsillo_id is not None and delta:
+            netos[bolsillo_id] += Decimal(delta)
+
+    # Orden fijo por ID para que dos transacciones no se bloqueen en orden inverso
+    for bolsillo_id in sorted(netos):
+        delta = netos[bolsillo_id]
+        if not delta:
+            continue
+        queryset = models.Bolsillo.objects.filter(bolsillo_id=bolsillo_id)
+        if verificar and delta < 0:
+            queryset = queryset.filter(saldo__gte=-delta)
+        if not queryset.update(saldo=F('saldo') + delta):
+            raise ValidationError({'detail': _mensaje_insuficiente(bolsillo_id, -delta)})
+
+
+def debitar(bolsillo_id, monto):
+    """Resta `monto` del bolsillo si el saldo alcanza."""
+    aplicar({bolsillo_id: -Decimal(monto)})
+
+
+def acreditar(bolsillo_id, monto):
+    """Suma `monto` al bolsillo."""
+    aplicar({bolsillo_id: Decimal(monto)})
+
+
+def transferir(origen_id, destino_id, monto):
+    """Mueve `monto` entre dos bolsillos (débito verificado y crédito)."""
+    aplicar([(origen_id, -Decimal(monto)), (destino_id, Decimal(monto))])
+
+
+def refrescar(*bolsillos):
+    """Recarga el saldo de las instancias dadas con una sola consulta."""
+    bolsillos = [b for b in bolsillos if b is not None]
+    saldos = dict(
+        models.Bolsillo.objects
+        .filter(bolsillo_id__in=[b.bolsillo_id for b in bolsillos])
+        .values_list('bolsillo_id', 'saldo')
+    )
+    for bolsillo in bolsillos:
+        bolsillo.saldo = saldos.get(bolsillo.bolsillo_id, bolsillo.saldo)
+
+
+# -- Conciliación -------------------------------------------------------------
+
+def _sumas_por_bolsillo(queryset, expresion, desde, hasta):
+    return (
+        queryset
+        .filter(bolsillo_id__gte=desde, bolsillo_id__lte=hasta)
+        .order_by()
+        .values('bolsillo_id')
+        .annotate(total=Sum(expresion))
+        .values_list('bolsillo_id', 'total')
+    )
+
+
+def saldos_esperados(desde, hasta):
+    """
+    Saldo que implican los registros para los bolsillos con ID en [desde, hasta]:
+    ingresos - egresos + movimientos de entrada - movimientos de salida.
+    Las aportaciones cuentan a través de su egreso e ingreso. Son tres
+    consultas GROUP BY; no se cargan transacciones en Python.
+    """
+    esperados = defaultdict(Decimal)
+    for bolsillo_id, total in _sumas_por_bolsillo(models.Ingreso.objects, 'monto', desde, hasta):
+        esperados[bolsillo_id] += total or 0
+    for bolsillo_id, total in _sumas_por_bolsillo(models.Egreso.objects, 'monto', desde, hasta):
+        esperados[bolsillo_id] -= total or 0
+    con_signo = Case(
+        When(tipo='eg', then=-F('monto')),
+        default=F('monto'),
+        output_field=DecimalField(max_digits=15, decimal_places=2),
+    )
+    for bolsillo_id, total in _sumas_por_bolsillo(models.Movimiento.objects, con_signo, desde, hasta):
+        esperados[bolsillo_id] += total or 0
+    # SQLite suma decimales en punto flotante: redondear a centavos
+    return {bolsillo_id: total.quantize(CENTAVOS) for bolsillo_id, total in esperados.items()}
+
+
+def diferencias(bolsillo_ids):
+    """
+    Devuelve [(bolsillo_id, saldo, esperado)] de los bolsillos entre el primer y
+    el último ID de `bolsillo_ids` (ordenados) cuyo saldo no coincide con el esperado.
+    """
+    if not bolsillo_ids:
+        return []
+    esperados = saldos_esperados(bolsillo_ids[0], bolsillo_ids[-1])
+    actuales = (
+        models.Bolsillo.objects
+        .filter(bolsillo_id__gte=bolsillo_ids[0], bolsillo_id__lte=bolsillo_ids[-1])
+        .order_by('bolsillo_id')
+        .values_list('bolsillo_id', 'saldo')
+    )
+    return [
+        (bolsillo_id, saldo, esperados.get(bolsillo_id, CERO))
+        for bolsillo_id, saldo in actuales
+        if saldo != esperados.get(bolsillo_id, CERO)
+    ]
+
+
+def sumar_en_lote(deltas, batch_size=400):
+    """
+    Suma {bolsillo_id: delta} con un UPDATE ... CASE por lote de bolsillos, sin
+    verificar saldos: usar solo cuando ya se verificaron con las filas
+    bloqueadas (select_for_update) o para correcciones.
+    """
+    ajustes = [(bolsillo_id, delta) for bolsillo_id, delta in sorted(deltas.items()) if delta]
+    actualizados = 0
+    for inicio in range(0, len(ajustes), batch_size):
+        lote = ajustes[inicio:inicio + batch_size]
+        ajuste = Case(
+            *[When(bolsillo_id=bolsillo_id, then=Value(delta)) for bolsillo_id, delta in lote],
+            default=Value(Decimal('0')),
+            output_field=DecimalField(max_digits=14, decimal_places=2),
+        )
+        actualizados += models.Bolsillo.objects.filter(
+            bolsillo_id__in=[bolsillo_id for bolsillo_id, _ in lote]
+        ).update(saldo=F('saldo') + ajuste)
+    return actualizados
+
+
+def corregir(diferencias_bolsillos):
+    """
+    Ajusta el saldo de [(bolsillo_id, saldo, esperado)] en lotes.
+    Se suma la diferencia (saldo = saldo + (esperado - saldo leído)) en lugar
+    de sobrescribir, para no perder cambios hechos después de la lectura.
+    """
+    return sumar_en_lote({bolsillo_id: esperado - saldo for bolsillo_id, saldo, esperado in diferencias_bolsillos})
+
+
+def adoptar(diferencias_bolsillos):
+    """
+    Acepta como correcto el saldo actual de [(bolsillo_id, saldo, esperado)]:
+    registra un Movimiento por la diferencia (entrada si el saldo es mayor que
+    el esperado, salida si es menor) sin tocar el saldo. Después de esto los
+    bolsillos ya no aparecen como diferencia. Es una decisión del operador
+    tras revisar el reporte: la diferencia deja de verse como descuadre.
+    """
+    deltas = {bolsillo_id: saldo - esperado for bolsillo_id, saldo, esperado in diferencias_bolsillos if saldo != esperado}
+    propietarios = models.Bolsillo.objects.filter(bolsillo_id__in=list(deltas)).values_list('bolsillo_id', 'usuario_id', 'grupo_id')
+    movimientos = [
+        models.Movimiento(
+            tipo='ing' if deltas[bolsillo_id] > 0 else 'eg',
+            monto=abs(deltas[bolsillo_id]),
+            descripcion=DESCRIPCION_ADOPCION,
+            usuario_id=usuario_id,
+            grupo_id=grupo_id,
+            bolsillo_id=bolsillo_id,
+        )
+        for bolsillo_id, usuario_id, grupo_id in propietarios
+        # Sin propietario no puede haber Movimiento (chk_movimiento_owner)
+        if (usuario_id is None) != (grupo_id is None)
+    ]
+    models.Movimiento.objects.bulk_create(movimientos)
+    return len(movimientos)
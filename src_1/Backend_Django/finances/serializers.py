@@ -1,6 +1,6 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
-from . import models
+from . import instrumentacion, models
 from django.contrib.auth.models import User
 from rest_framework.authtoken.models import Token
 
@@ -8,7 +8,86 @@ from rest_framework.authtoken.models import Token
 User = get_user_model()
 
 
-class UsuarioSerializer(serializers.ModelSerializer):
+def _lista_param(request, nombre):
+    valor = request.query_params.get(nombre)
+    if valor is None:
+        return None
+    return [v.strip() for v in valor.split(',') if v.strip()]
+
+
+class ListaMedida(serializers.ListSerializer):
+    """ListSerializer que suma su serialización a la petición instrumentada (finances/instrumentacion.py)."""
+
+    @property
+    def data(self):
+        return instrumentacion.medir_serializacion(lambda: super(ListaMedida, self).data)
+
+
+class CamposDinamicosMixin:
+    """
+    Proyección de la respuesta con parámetros de la URL (solo en lecturas):
+
+    - ?fields=id,monto,fecha  columnas a devolver ('id' es la clave primaria)
+    - ?expand=categoria,...   objetos anidados a incluir (ver `expansiones`)
+    - ?compact=1              ningún objeto anidado, solo IDs
+
+    Sin parámetros se devuelve la representación completa. Con ?fields= y sin
+    ?expand= solo se expande lo que aparezca en ?fields=. Solo aplica al serializer raíz (o al hijo de
+    un many=True); los anidados se devuelven completos. Las vistas llevan la
+    misma selección a la consulta (views.ProyeccionMixin).
+    """
+    # {expansión: campos del serializer que la componen}
+    expansiones = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        meta = cls.__dict__.get('Meta')
+        # Los listados (many=True) usan ListaMedida salvo que el serializer declare la suya
+        if meta is not None and not hasattr(meta, 'list_serializer_class'):
+            meta.list_serializer_class = ListaMedida
+
+    @property
+    def data(self):
+        return instrumentacion.medir_serializacion(lambda: super(CamposDinamicosMixin, self).data)
+
+    @classmethod
+    def seleccion(cls, request):
+        """Devuelve (campos pedidos o None, expansiones activas)."""
+        if request is None or request.method not in ('GET', 'HEAD'):
+            return None, set(cls.expansiones)
+        campos = _lista_param(request, 'fields')
+        expandir = _lista_param(request, 'expand')
+        if request.query_params.get('compact') in ('1', 'true'):
+            expandir = []
+        if expandir is None and campos is None:
+            expandir = cls.expansiones
+        elif expandir is None:
+            # Pedir un campo de una expansión (p. ej. categoria_detalle) la activa
+            expandir = [nombre for nombre, componentes in cls.expansiones.items() if set(componentes) & set(campos)]
+        if campos is not None:
+            pk = cls.Meta.model._meta.pk.name
+            campos = [pk if campo == 'id' else campo for campo in campos]
+        return campos, {e for e in expandir if e in cls.expansiones}
+
+    def _es_raiz(self):
+        return self.parent is None or (isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None)
+
+    def get_fields(self):
+        fields = super().get_fields()
+        self.campos_pedidos, self.expansiones_activas = None, set(self.expansiones)
+        if not self._es_raiz():
+            return fields
+        self.campos_pedidos, self.expansiones_activas = self.seleccion(self.context.get('request'))
+        ocultos = {
+            campo for nombre, campos in self.expansiones.items() if nombre not in self.expansiones_activas for campo in campos
+        }
+        return {
+            nombre: campo for nombre, campo in fields.items()
+            if nombre not in ocultos and (self.campos_pedidos is None or nombre in self.campos_pedidos)
+        }
+
+
+class UsuarioSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True)
 
     class Meta:
@@ -47,73 +126,89 @@ class RegisterSerializer(serializers.Serializer):
         return {"user": user, "token": token.key, "usuario": user}
 
 
-class GrupoSerializer(serializers.ModelSerializer):
+class GrupoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Grupo
         fields = '__all__'
 
 
-class BolsilloSerializer(serializers.ModelSerializer):
+class BolsilloSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Bolsillo
         fields = '__all__'
 
 
-class CategoriaSerializer(serializers.ModelSerializer):
+class CategoriaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Categoria
         fields = '__all__'
 
 
-class TransferenciaSerializer(serializers.ModelSerializer):
+class TransferenciaSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Transferencia
         fields = '__all__'
 
 
-class IngresoSerializer(serializers.ModelSerializer):
-    # Agregar campos de solo lectura para incluir información completa
-    categoria_detalle = CategoriaSerializer(source='categoria', read_only=True)
-    bolsillo_detalle = BolsilloSerializer(source='bolsillo', read_only=True)
-    
-    class Meta:
-        model = models.Ingreso
-        fields = '__all__'
-    
+class TransaccionRepresentationMixin:
+    """
+    Representación común de ingresos y egresos.
+
+    Solo usa relaciones que la vista ya carga con select_related/prefetch_related
+    (ver `views.con_relaciones_transaccion`), así un listado cuesta un número
+    fijo de consultas sin importar cuántas filas tenga.
+    """
+    # Nombre de la relación inversa hacia Aportacion ('aportacion_ingreso' o 'aportacion_egreso')
+    relacion_aportacion = None
+    # Formatea el saldo del bolsillo anidado igual que BolsilloSerializer
+    campo_saldo = serializers.DecimalField(max_digits=14, decimal_places=2, read_only=True)
+    expansiones = {
+        'categoria': ('categoria_detalle',),
+        'bolsillo': ('bolsillo_detalle',),
+        'creado_por': ('creado_por_info',),
+    }
+
     def to_representation(self, instance):
         representation = super().to_representation(instance)
-        # Incluir información anidada de categoría y bolsillo
-        if instance.categoria:
+        expandir = self.expansiones_activas
+        # Incluir información anidada de categoría y bolsillo en lugar del ID
+        categoria = instance.categoria if 'categoria' in expandir and 'categoria' in representation else None
+        if categoria:
             representation['categoria'] = {
-                'categoria_id': instance.categoria.categoria_id,
-                'nombre': instance.categoria.nombre,
-                'color': instance.categoria.color,
-                'tipo': instance.categoria.tipo,
+                'categoria_id': categoria.categoria_id,
+                'nombre': categoria.nombre,
+                'color': categoria.color,
+                'tipo': categoria.tipo,
             }
-        if instance.bolsillo:
+        bolsillo = instance.bolsillo if 'bolsillo' in expandir and 'bolsillo' in representation else None
+        if bolsillo:
             representation['bolsillo'] = {
-                'bolsillo_id': instance.bolsillo.bolsillo_id,
-                'nombre': instance.bolsillo.nombre,
-                'saldo': str(instance.bolsillo.saldo),
-                'color': instance.bolsillo.color,
+                'bolsillo_id': bolsillo.bolsillo_id,
+                'nombre': bolsillo.nombre,
+                'saldo': self.campo_saldo.to_representation(bolsillo.saldo),
+                'color': bolsillo.color,
             }
-        
+
+        if 'creado_por' not in expandir or (self.campos_pedidos is not None and 'creado_por_info' not in self.campos_pedidos):
+            return representation
+
         # Incluir información del usuario que creó la transacción
         # Prioridad: creado_por > usuario > aportacion
         usuario_autor = None
-        
+
         # 1. Primero intentar con creado_por (el más confiable)
         if instance.creado_por:
             usuario_autor = instance.creado_por
         # 2. Si tiene usuario directo (transacción personal)
         elif instance.usuario:
             usuario_autor = instance.usuario
-        # 3. Si es una aportación al grupo, buscar en la relación inversa
-        elif hasattr(instance, 'aportacion_ingreso'):
-            aportacion = instance.aportacion_ingreso.first()
-            if aportacion and aportacion.usuario:
-                usuario_autor = aportacion.usuario
-        
+        # 3. Si es una aportación, buscar en la relación inversa.
+        # Se usa .all() (y no .first()) para aprovechar el prefetch de la vista.
+        elif self.relacion_aportacion:
+            aportaciones = list(getattr(instance, self.relacion_aportacion).all()[:1])
+            if aportaciones and aportaciones[0].usuario:
+                usuario_autor = aportaciones[0].usuario
+
         # Agregar información del usuario autor
         if usuario_autor:
             representation['creado_por_info'] = {
@@ -123,79 +218,59 @@ class IngresoSerializer(serializers.ModelSerializer):
             }
         else:
             representation['creado_por_info'] = None
-        
+
         return representation
 
 
-class EgresoSerializer(serializers.ModelSerializer):
+class IngresoSerializer(TransaccionRepresentationMixin, CamposDinamicosMixin, serializers.ModelSerializer):
+    # Agregar campos de solo lectura para incluir información completa
+    categoria_detalle = CategoriaSerializer(source='categoria', read_only=True)
+    bolsillo_detalle = BolsilloSerializer(source='bolsillo', read_only=True)
+    relacion_aportacion = 'aportacion_ingreso'
+
+    class Meta:
+        model = models.Ingreso
+        fields = '__all__'
+
+
+class EgresoSerializer(TransaccionRepresentationMixin, CamposDinamicosMixin, serializers.ModelSerializer):
     # Agregar campos de solo lectura para incluir información completa
     categoria_detalle = CategoriaSerializer(source='categoria', read_only=True)
     bolsillo_detalle = BolsilloSerializer(source='bolsillo', read_only=True)
-    
+    relacion_aportacion = 'aportacion_egreso'
+
     class Meta:
         model = models.Egreso
         fields = '__all__'
-    
-    def to_representation(self, instance):
-        representation = super().to_representation(instance)
-        # Incluir información anidada de categoría y bolsillo
-        if instance.categoria:
-            representation['categoria'] = {
-                'categoria_id': instance.categoria.categoria_id,
-                'nombre': instance.categoria.nombre,
-                'color': instance.categoria.color,
-                'tipo': instance.categoria.tipo,
-            }
-        if instance.bolsillo:
-            representation['bolsillo'] = {
-                'bolsillo_id': instance.bolsillo.bolsillo_id,
-                'nombre': instance.bolsillo.nombre,
-                'saldo': str(instance.bolsillo.saldo),
-                'color': instance.bolsillo.color,
-            }
-        
-        # Incluir información del usuario que creó la transacción
-        # Prioridad: creado_por > usuario > aportacion
-        usuario_autor = None
-        
-        # 1. Primero intentar con creado_por (el más confiable)
-        if instance.creado_por:
-            usuario_autor = instance.creado_por
-        # 2. Si tiene usuario directo (transacción personal)
-        elif instance.usuario:
-            usuario_autor = instance.usuario
-        # 3. Si es una aportación del grupo, buscar en la relación inversa
-        elif hasattr(instance, 'aportacion_egreso'):
-            aportacion = instance.aportacion_egreso.first()
-            if aportacion and aportacion.usuario:
-                usuario_autor = aportacion.usuario
-        
-        # Agregar información del usuario autor
-        if usuario_autor:
-            representation['creado_por_info'] = {
-                'usuario_id': usuario_autor.usuario_id,
-                'email': usuario_autor.email,
-                'nombre': usuario_autor.nombre,
-            }
-        else:
-            representation['creado_por_info'] = None
-        
-        return representation
 
 
-class MovimientoSerializer(serializers.ModelSerializer):
+class MovimientoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Movimiento
         fields = '__all__'
 
 
-class UsuarioGrupoSerializer(serializers.ModelSerializer):
+class MovimientoUnificadoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
+    categoria_nombre = serializers.CharField(source='categoria.nombre', read_only=True, default=None)
+    bolsillo_nombre = serializers.CharField(source='bolsillo.nombre', read_only=True, default=None)
+    expansiones = {'categoria': ('categoria_nombre',), 'bolsillo': ('bolsillo_nombre',)}
+
+    class Meta:
+        model = models.MovimientoUnificado
+        fields = [
+            'uid', 'transaccion_id', 'tipo', 'monto', 'fecha', 'descripcion', 'usuario', 'grupo',
+            'categoria', 'categoria_nombre', 'bolsillo', 'bolsillo_nombre', 'creado_por',
+        ]
+        read_only_fields = fields
+
+
+class UsuarioGrupoSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.UsuarioGrupo
         fields = '__all__'
 
 
-class AportacionSerializer(serializers.ModelSerializer):
+class AportacionSerializer(CamposDinamicosMixin, serializers.ModelSerializer):
     class Meta:
         model = models.Aportacion
         fields = '__all__'
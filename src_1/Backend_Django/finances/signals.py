@@ -0,0 +1,65 @@
+"""
+Señales de la app finances: mantienen coherentes las cachés cuando cambian los datos.
+"""
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from . import authentication, membresias, models, resumenes, versiones
+
+
+@receiver([post_save, post_delete], sender=models.UsuarioGrupo)
+def invalidar_membresias(sender, instance, **kwargs):
+    # Altas, cambios de rol y bajas (también en cascada al borrar un grupo)
+    membresias.invalidar(instance.usuario_id)
+    versiones.incrementar(versiones.alcance_usuario(instance.usuario_id), versiones.alcance_grupo(instance.grupo_id))
+
+
+@receiver(post_delete, sender=Token)
+def invalidar_token(sender, instance, **kwargs):
+    authentication.invalidar_token(instance.key)
+
+
+@receiver([post_save, post_delete], sender=models.Usuario)
+def invalidar_tokens_usuario(sender, instance, created=False, **kwargs):
+    versiones.incrementar(versiones.ALCANCE_USUARIOS)
+    # Desactivación, cambio de contraseña o de datos: no servir el usuario cacheado
+    if not created:
+        authentication.invalidar_usuario(instance.pk)
+        # Nombre y email aparecen en los listados de miembros de sus grupos
+        versiones.incrementar(
+            versiones.alcance_usuario(instance.pk),
+            *[versiones.alcance_grupo(g) for g in membresias.grupos_ids(instance)],
+        )
+
+
+@receiver([post_save, post_delete], sender=models.Grupo)
+def versionar_grupo(sender, instance, **kwargs):
+    versiones.incrementar(versiones.alcance_grupo(instance.grupo_id))
+
+
+@receiver([post_save, post_delete], sender=models.Bolsillo)
+@receiver([post_save, post_delete], sender=models.Categoria)
+@receiver([post_save, post_delete], sender=models.Ingreso)
+@receiver([post_save, post_delete], sender=models.Egreso)
+@receiver([post_save, post_delete], sender=models.Movimiento)
+def versionar_propietario(sender, instance, **kwargs):
+    versiones.incrementar(versiones.alcance_propietario(instance.usuario_id, instance.grupo_id))
+
+
+@receiver([post_save, post_delete], sender=models.Aportacion)
+def versionar_aportacion(sender, instance, **kwargs):
+    versiones.incrementar(versiones.alcance_usuario(instance.usuario_id), versiones.alcance_grupo(instance.grupo_id))
+
+
+@receiver([post_save, post_delete], sender=models.Transferencia)
+def versionar_transferencia(sender, instance, **kwargs):
+    versiones.incrementar_bolsillos([instance.de_bolsillo_id, instance.a_bolsillo_id])
+
+
+@receiver(pre_delete, sender=models.Bolsillo)
+@receiver(pre_delete, sender=models.Categoria)
+def desvincular_resumen(sender, instance, **kwargs):
+    # Corre dentro de la transacción del borrado, antes del SET_NULL en ingresos/egresos
+    campo = 'bolsillo_ref' if sender is models.Bolsillo else 'categoria_ref'
+    resumenes.desvincular(campo, instance.pk)
@@ -0,0 +1,478 @@
+import datetime
+import io
+import json
+from decimal import Decimal
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from rest_framework import exceptions
+from rest_framework.authtoken.models import Token
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from . import authentication, membresias, models, presupuestos, renderers, saldos, serializers, versiones, views
+from .management.commands import check_query_budgets
+
+
+class DatosMixin:
+    """Usuario con un grupo del que es admin, y ayudas para sembrar transacciones."""
+
+    def setUp(self):
+        cache.clear()
+        self.usuario = models.Usuario.objects.create_user(email='dueno@test.local', password='x', nombre='Dueño')
+        self.miembro = models.Usuario.objects.create_user(email='miembro@test.local', password='x', nombre='Miembro')
+        self.grupo = models.Grupo.objects.create(nombre='Casa', creador=self.usuario)
+        models.UsuarioGrupo.objects.create(usuario=self.usuario, grupo=self.grupo, rol='admin')
+        models.UsuarioGrupo.objects.create(usuario=self.miembro, grupo=self.grupo, rol='miembro')
+        self.bolsillo = models.Bolsillo.objects.create(usuario=self.usuario, nombre='Principal', saldo=Decimal('100000'))
+        self.bolsillo_grupo = models.Bolsillo.objects.create(grupo=self.grupo, nombre='General', saldo=Decimal('100000'))
+        self.cliente = APIClient()
+        self.cliente.force_authenticate(self.usuario)
+        self.sembradas = 0
+
+    def sembrar(self, cantidad):
+        """Agrega `cantidad` ingresos y egresos personales y de grupo, cada uno con su categoría y una aportación."""
+        for _ in range(cantidad):
+            i = self.sembradas
+            self.sembradas += 1
+            fecha = datetime.date(2025, 1, 1) + datetime.timedelta(days=i)
+            for modelo, tipo in ((models.Ingreso, 'ing'), (models.Egreso, 'eg')):
+                personal = models.Categoria.objects.create(usuario=self.usuario, nombre=f'C{i}', tipo=tipo)
+                de_grupo = models.Categoria.objects.create(grupo=self.grupo, nombre=f'C{i}', tipo=tipo)
+                modelo.objects.create(
+                    usuario=self.usuario, categoria=personal, bolsillo=self.bolsillo, monto=Decimal('10'),
+                    fecha=fecha, creado_por=self.usuario,
+                )
+                modelo.objects.create(
+                    grupo=self.grupo, categoria=de_grupo, bolsillo=self.bolsillo_grupo, monto=Decimal('10'),
+                    fecha=fecha, creado_por=self.miembro,
+                )
+            egreso = models.Egreso.objects.create(
+                usuario=self.usuario, bolsillo=self.bolsillo, monto=Decimal('5'), fecha=fecha, creado_por=self.usuario,
+            )
+            # Sin creado_por, como las aportaciones antiguas: el autor sale de la aportación
+            ingreso = models.Ingreso.objects.create(
+                grupo=self.grupo, bolsillo=self.bolsillo_grupo, monto=Decimal('5'), fecha=fecha,
+            )
+            models.Aportacion.objects.create(
+                usuario=self.usuario, grupo=self.grupo, monto=Decimal('5'), fecha=fecha, egreso_usuario=egreso,
+                ingreso_grupo=ingreso, bolsillo_usuario=self.bolsillo, bolsillo_grupo=self.bolsillo_grupo,
+            )
+
+
+class ConsultasTransaccionesTests(DatosMixin, TestCase):
+    """
+    Listados y detalle de ingresos/egresos con un número fijo de consultas
+    (views.con_relaciones_transaccion): el mismo con N y con 2N filas.
+    """
+    N = 5
+    # Filas y aportaciones (prefetch); con grupo_id, además la membresía
+    CONSULTAS_LISTA = 2
+    CONSULTAS_LISTA_GRUPO = 3
+    CONSULTAS_DETALLE_GRUPO = 3
+
+    def pedir(self, url, params=None):
+        cache.clear()
+        response = self.cliente.get(url, params or {})
+        self.assertEqual(response.status_code, 200, response.content)
+        datos = response.json()
+        return datos['results'] if isinstance(datos, dict) and 'results' in datos else datos
+
+    def assert_constante(self, url, consultas, params=None):
+        self.sembrar(self.N)
+        with self.assertNumQueries(consultas):
+            filas_n = len(self.pedir(url, params))
+        self.sembrar(self.N)
+        with self.assertNumQueries(consultas):
+            filas_2n = len(self.pedir(url, params))
+        self.assertGreater(filas_2n, filas_n)
+
+    def test_lista_ingresos_personales(self):
+        self.assert_constante('/api/ingresos/', self.CONSULTAS_LISTA)
+
+    def test_lista_egresos_personales(self):
+        self.assert_constante('/api/egresos/', self.CONSULTAS_LISTA)
+
+    def test_lista_ingresos_grupo(self):
+        self.assert_constante('/api/ingresos/', self.CONSULTAS_LISTA_GRUPO, {'grupo_id': self.grupo.pk})
+
+    def test_lista_egresos_grupo(self):
+        self.assert_constante('/api/egresos/', self.CONSULTAS_LISTA_GRUPO, {'grupo_id': self.grupo.pk})
+
+    def test_lista_paginada(self):
+        self.assert_constante('/api/egresos/', self.CONSULTAS_LISTA, {'page_size': 500})
+
+    def test_detalle_autor_desde_aportacion(self):
+        self.sembrar(1)
+        ingreso = models.Ingreso.objects.get(aportacion_ingreso__isnull=False)
+        with self.assertNumQueries(self.CONSULTAS_DETALLE_GRUPO):
+            datos = self.pedir(f'/api/ingresos/{ingreso.pk}/', {'grupo_id': self.grupo.pk})
+        self.assertEqual(datos['creado_por_info']['email'], self.usuario.email)
+
+
+class ResumenBorradoRelacionesTests(DatosMixin, TestCase):
+    """El resumen mensual sigue cuadrando al borrar la categoría o el bolsillo de una transacción."""
+
+    def crear_egreso(self, **campos):
+        response = self.cliente.post('/api/egresos/', {'monto': '40', 'fecha': '2025-03-06', **campos}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        return response.json()['egreso_id']
+
+    def assert_resumen_cuadra(self):
+        self.assertEqual(models.ResumenMensual.objects.filter(num_egresos__lt=0).count(), 0)
+        totales = self.cliente.get('/api/dashboard/overview/').json()
+        egresos = sum(models.Egreso.objects.filter(usuario=self.usuario).values_list('monto', flat=True), Decimal('0'))
+        self.assertEqual(Decimal(str(totales['egresos'])), egresos)
+
+    def test_borrar_categoria_y_luego_el_egreso(self):
+        categoria = models.Categoria.objects.create(usuario=self.usuario, nombre='Mercado', tipo='eg')
+        egreso_id = self.crear_egreso(bolsillo=self.bolsillo.pk, categoria=categoria.pk)
+        self.assertEqual(self.cliente.delete(f'/api/categorias/{categoria.pk}/').status_code, 204)
+        self.assertFalse(models.ResumenMensual.objects.filter(categoria_ref=categoria.pk).exists())
+        self.assertEqual(self.cliente.delete(f'/api/egresos/{egreso_id}/').status_code, 204)
+        self.assertFalse(models.ResumenMensual.objects.filter(num_egresos__gt=0).exists())
+        self.assert_resumen_cuadra()
+
+    def test_borrar_categoria_y_editar_el_egreso(self):
+        categoria = models.Categoria.objects.create(usuario=self.usuario, nombre='Mercado', tipo='eg')
+        otra = models.Categoria.objects.create(usuario=self.usuario, nombre='Transporte', tipo='eg')
+        self.crear_egreso(bolsillo=self.bolsillo.pk, categoria=otra.pk)
+        egreso_id = self.crear_egreso(bolsillo=self.bolsillo.pk, categoria=categoria.pk)
+        self.cliente.delete(f'/api/categorias/{categoria.pk}/')
+        response = self.cliente.patch(f'/api/egresos/{egreso_id}/', {'monto': '15'}, format='json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assert_resumen_cuadra()
+
+    def test_borrar_bolsillo_y_luego_el_egreso(self):
+        bolsillo = models.Bolsillo.objects.create(usuario=self.usuario, nombre='Viajes', saldo=Decimal('100'))
+        egreso_id = self.crear_egreso(bolsillo=bolsillo.pk)
+        self.assertEqual(self.cliente.delete(f'/api/bolsillos/{bolsillo.pk}/').status_code, 204)
+        self.assertFalse(models.ResumenMensual.objects.filter(bolsillo_ref=bolsillo.pk).exists())
+        self.assertEqual(self.cliente.delete(f'/api/egresos/{egreso_id}/').status_code, 204)
+        self.assertFalse(models.ResumenMensual.objects.filter(num_egresos__gt=0).exists())
+        self.assert_resumen_cuadra()
+
+    def test_borrar_categoria_suma_a_filas_existentes(self):
+        categoria = models.Categoria.objects.create(usuario=self.usuario, nombre='Mercado', tipo='eg')
+        self.crear_egreso(bolsillo=self.bolsillo.pk)
+        self.crear_egreso(bolsillo=self.bolsillo.pk, categoria=categoria.pk)
+        self.crear_egreso(bolsillo=self.bolsillo.pk, categoria=categoria.pk, fecha='2025-04-02')
+        self.assertEqual(self.cliente.delete(f'/api/categorias/{categoria.pk}/').status_code, 204)
+        filas = models.ResumenMensual.objects.filter(usuario_ref=self.usuario.pk).order_by('periodo')
+        self.assertEqual(
+            [(f.categoria_ref, f.periodo.month, f.num_egresos, f.total_egresos) for f in filas],
+            [(0, 3, 2, Decimal('80')), (0, 4, 1, Decimal('40'))],
+        )
+        self.assert_resumen_cuadra()
+
+
+class FormatoRespuestasTests(DatosMixin, TestCase):
+    """El renderer rápido escribe montos y fechas con el mismo formato que DRF."""
+
+    def test_montos_y_fechas_como_texto(self):
+        grupo = self.cliente.get(f'/api/grupos/{self.grupo.pk}/').json()
+        self.assertTrue(grupo['fecha_creacion'].endswith('Z'), grupo['fecha_creacion'])
+        bolsillo = self.cliente.get(f'/api/bolsillos/{self.bolsillo.pk}/').json()
+        self.assertEqual(bolsillo['saldo'], '100000.00')
+
+    def test_fechas_en_la_zona_horaria_actual(self):
+        # Formato ISO 8601 de DRF: hora local de TIME_ZONE, y Z en lugar de +00:00
+        for zona in ('UTC', 'America/Bogota'):
+            with self.subTest(zona=zona), override_settings(TIME_ZONE=zona):
+                esperado = timezone.localtime(self.grupo.fecha_creacion).isoformat().replace('+00:00', 'Z')
+                grupo = self.cliente.get(f'/api/grupos/{self.grupo.pk}/').json()
+                self.assertEqual(grupo['fecha_creacion'], esperado)
+
+    def test_misma_salida_que_drf(self):
+        datos = serializers.GrupoSerializer(self.grupo).data
+        self.assertEqual(renderers.JSONRapidoRenderer().render(datos), JSONRenderer().render(datos))
+
+
+class MembresiasCacheTests(DatosMixin, TestCase):
+    """Las membresías cacheadas no sobreviven a un cambio de rol, ni siquiera con lecturas concurrentes."""
+
+    def test_cambio_de_rol(self):
+        self.assertEqual(membresias.obtener_membresias(self.miembro)[self.grupo.pk], 'miembro')
+        models.UsuarioGrupo.objects.get(usuario=self.miembro, grupo=self.grupo).delete()
+        self.assertEqual(membresias.obtener_membresias(self.miembro), {})
+
+    def test_lectura_concurrente_guarda_el_estado_anterior(self):
+        # Una lectura lenta toma la versión y los roles antes del cambio...
+        version = membresias._version(self.miembro.pk)
+        anteriores = dict(models.UsuarioGrupo.objects.filter(usuario=self.miembro).values_list('grupo_id', 'rol'))
+        membresia = models.UsuarioGrupo.objects.get(usuario=self.miembro, grupo=self.grupo)
+        membresia.rol = 'admin'
+        membresia.save()
+        # ...y los guarda después de la invalidación
+        cache.set(membresias._clave(self.miembro.pk, version), anteriores)
+        self.assertTrue(membresias.es_admin(self.miembro, self.grupo.pk))
+
+
+@override_settings(METRICAS_TOKEN='secreto')
+class MetricasAccesoTests(TestCase):
+    """/metrics con METRICAS_TOKEN solo responde al bearer exacto."""
+
+    def test_token(self):
+        for encabezado, estado in (
+            ('Bearer secreto', 200),
+            ('Bearer secret', 403),
+            ('Bearer secretoñ', 403),
+            ('', 403),
+        ):
+            with self.subTest(encabezado=encabezado):
+                response = self.client.get('/metrics', HTTP_AUTHORIZATION=encabezado)
+                self.assertEqual(response.status_code, estado)
+
+
+class CacheTokensTests(TestCase):
+    """La caché de tokens se invalida también cuando el cambio lo hizo otro proceso."""
+
+    def setUp(self):
+        cache.clear()
+        authentication.token_cache.clear()
+        self.usuario = models.Usuario.objects.create_user(email='token@test.local', password='x')
+        self.token = Token.objects.create(user=self.usuario)
+        self.backend = authentication.CachedTokenAuthentication()
+
+    def autenticar(self):
+        return self.backend.authenticate_credentials(self.token.key)
+
+    def test_acierto_sin_consultas(self):
+        self.autenticar()
+        with self.assertNumQueries(0):
+            usuario, _ = self.autenticar()
+        self.assertEqual(usuario.pk, self.usuario.pk)
+        self.assertEqual(authentication.estadisticas()['hits'], 1)
+
+    def test_desactivacion_en_otro_proceso(self):
+        self.autenticar()
+        # Otro worker desactiva al usuario: la fila cambia y la versión compartida se renueva,
+        # pero la LRU de este proceso no se toca
+        models.Usuario.objects.filter(pk=self.usuario.pk).update(is_active=False)
+        versiones.incrementar(versiones.alcance_token(self.token.key))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.autenticar()
+
+    def test_token_borrado_en_otro_proceso(self):
+        self.autenticar()
+        Token.objects.filter(pk=self.token.pk).delete()
+        versiones.incrementar(versiones.alcance_token(self.token.key))
+        with self.assertRaises(exceptions.AuthenticationFailed):
+            self.autenticar()
+
+    def test_senal_de_usuario_renueva_la_version(self):
+        alcance = versiones.alcance_token(self.token.key)
+        antes = versiones.obtener([alcance])[alcance]
+        self.usuario.is_active = False
+        self.usuario.save()
+        self.assertNotEqual(versiones.obtener([alcance])[alcance], antes)
+
+
+class TransferenciasBorradoTests(DatosMixin, TestCase):
+    """Las transferencias individuales no impiden borrar bolsillos ni usuarios; las del lote sí, con un 400."""
+
+    def setUp(self):
+        super().setUp()
+        self.destino = models.Bolsillo.objects.create(usuario=self.usuario, nombre='Ahorro', saldo=Decimal('0'))
+
+    def transferir(self, url, cuerpo):
+        response = self.cliente.post(url, cuerpo, format='json')
+        self.assertIn(response.status_code, (200, 201), response.content)
+
+    def test_transferencia_individual_solo_registra_movimientos(self):
+        self.transferir('/api/movimientos/transferir/', {
+            'bolsillo_origen_id': self.bolsillo.pk, 'bolsillo_destino_id': self.destino.pk, 'monto': '250',
+        })
+        self.assertFalse(models.Transferencia.objects.exists())
+        self.assertEqual(models.Movimiento.objects.filter(bolsillo__in=[self.bolsillo, self.destino]).count(), 2)
+        self.destino.refresh_from_db()
+        self.assertEqual(self.destino.saldo, Decimal('250'))
+        self.assertEqual(self.cliente.delete(f'/api/bolsillos/{self.destino.pk}/').status_code, 204)
+
+    def test_borrar_usuario_con_transferencias_en_lote(self):
+        self.transferir('/api/transferencias/batch/', [
+            {'bolsillo_origen_id': self.bolsillo.pk, 'bolsillo_destino_id': self.destino.pk, 'monto': '250'},
+        ])
+        response = self.cliente.delete(f'/api/usuarios/{self.usuario.pk}/')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('detail', response.json())
+        self.assertTrue(models.Usuario.objects.filter(pk=self.usuario.pk).exists())
+
+
+class ConciliacionTests(DatosMixin, TestCase):
+    """
+    reconcile_balances reporta los descuadres; --fix solo corrige los bolsillos
+    pedidos y --adopt-current acepta el saldo actual registrando la diferencia.
+    """
+
+    def setUp(self):
+        super().setUp()
+        # Saldo inicial sin registro, como los bolsillos creados por la API
+        self.otro = models.Bolsillo.objects.create(usuario=self.usuario, nombre='Viajes', saldo=Decimal('50'))
+
+    def conciliar(self, *args):
+        salida = io.StringIO()
+        call_command('reconcile_balances', '--json', *args, stdout=salida)
+        return json.loads(salida.getvalue())
+
+    def test_reporte_sin_cambios(self):
+        reporte = self.conciliar()
+        self.assertEqual(reporte['con_diferencia'], 3)
+        self.otro.refresh_from_db()
+        self.assertEqual(self.otro.saldo, Decimal('50'))
+        self.assertFalse(models.Movimiento.objects.exists())
+
+    def test_fix_exige_bolsillos(self):
+        with self.assertRaises(CommandError):
+            self.conciliar('--fix')
+        self.otro.refresh_from_db()
+        self.assertEqual(self.otro.saldo, Decimal('50'))
+
+    def test_fix_solo_corrige_los_pedidos(self):
+        reporte = self.conciliar('--fix', '--bolsillos', str(self.otro.pk))
+        self.assertEqual(reporte['corregidos'], 1)
+        self.otro.refresh_from_db()
+        self.bolsillo.refresh_from_db()
+        self.assertEqual((self.otro.saldo, self.bolsillo.saldo), (Decimal('0'), Decimal('100000')))
+
+    def test_adoptar_saldos_actuales(self):
+        self.assertEqual(self.conciliar('--adopt-current')['adoptados'], 3)
+        self.otro.refresh_from_db()
+        self.assertEqual(self.otro.saldo, Decimal('50'))
+        self.assertEqual(self.conciliar()['con_diferencia'], 0)
+        # Un descuadre posterior vuelve a aparecer
+        models.Bolsillo.objects.filter(pk=self.otro.pk).update(saldo=Decimal('40'))
+        reporte = self.conciliar()
+        self.assertEqual([d['bolsillo_id'] for d in reporte['diferencias']], [self.otro.pk])
+
+
+class SemillaTests(DatosMixin, TestCase):
+    """seed_finances solo recalcula los saldos de los bolsillos que generó."""
+
+    def test_no_toca_bolsillos_existentes(self):
+        call_command('seed_finances', usuarios=3, transacciones=60, hasta='2025-06-30', stdout=io.StringIO())
+        self.bolsillo.refresh_from_db()
+        self.bolsillo_grupo.refresh_from_db()
+        self.assertEqual((self.bolsillo.saldo, self.bolsillo_grupo.saldo), (Decimal('100000'), Decimal('100000')))
+        generados = list(
+            models.Bolsillo.objects.filter(usuario__email__endswith='@seed.local').order_by('bolsillo_id')
+            .values_list('bolsillo_id', flat=True)
+        )
+        self.assertTrue(generados)
+        self.assertEqual(saldos.diferencias(generados), [])
+
+
+class EntradasInvalidasTests(DatosMixin, TestCase):
+    """Parámetros y cuerpos fuera de lo admitido responden 400, nunca 500."""
+
+    def test_stats_reference_fuera_de_rango(self):
+        token = Token.objects.create(user=self.usuario)
+        for params in ({'reference': '9999-12'}, {'reference': '0001-01', 'periods': 3}, {'reference': '9999', 'group_by': 'year'}):
+            for url in ('/api/stats/monthly/', '/api/async/stats/monthly/'):
+                with self.subTest(url=url, **params):
+                    response = self.cliente.get(url, params, HTTP_AUTHORIZATION=f'Token {token.key}')
+                    self.assertEqual(response.status_code, 400, response.content)
+
+    def test_bulk_cuerpo_escalar(self):
+        for cuerpo in (5, 'filas', None, True):
+            for url in ('/api/ingresos/bulk/', '/api/egresos/bulk/'):
+                with self.subTest(url=url, cuerpo=cuerpo):
+                    response = self.cliente.post(url, cuerpo, format='json')
+                    self.assertEqual(response.status_code, 400, response.content)
+
+    def test_lote_transferencias_cuerpo_escalar(self):
+        for cuerpo in (5, 'transferencias', True):
+            with self.subTest(cuerpo=cuerpo):
+                response = self.cliente.post('/api/transferencias/batch/', cuerpo, format='json')
+                self.assertEqual(response.status_code, 400, response.content)
+
+    def test_lote_transferencias_filas_invalidas(self):
+        destino = models.Bolsillo.objects.create(usuario=self.usuario, nombre='Ahorro', saldo=Decimal('0'))
+        base = {'bolsillo_origen_id': self.bolsillo.pk, 'bolsillo_destino_id': destino.pk, 'monto': '10'}
+        for campo, fila in (
+            ('monto', {**base, 'monto': '0.001'}),
+            ('monto', {**base, 'monto': '1e12'}),
+            ('descripcion', {**base, 'descripcion': 'x' * 256}),
+        ):
+            with self.subTest(fila=fila):
+                response = self.cliente.post('/api/transferencias/batch/', [fila], format='json')
+                self.assertEqual(response.status_code, 400, response.content)
+                self.assertIn(campo, response.json()['errores'][0]['errores'])
+        self.assertFalse(models.Transferencia.objects.exists())
+        self.assertFalse(models.Movimiento.objects.filter(bolsillo=destino).exists())
+
+    def test_aportar_monto_invalido(self):
+        base = {
+            'grupo_id': self.grupo.pk, 'bolsillo_usuario_id': self.bolsillo.pk,
+            'bolsillo_grupo_id': self.bolsillo_grupo.pk, 'fecha': '2025-03-06',
+        }
+        for monto in ('abc', 'NaN', 'Infinity', '-5', '0.001', '1e12'):
+            with self.subTest(monto=monto):
+                response = self.cliente.post('/api/aportaciones/aportar/', {**base, 'monto': monto}, format='json')
+                self.assertEqual(response.status_code, 400, response.content)
+        self.assertFalse(models.Aportacion.objects.exists())
+        self.bolsillo.refresh_from_db()
+        self.assertEqual(self.bolsillo.saldo, Decimal('100000'))
+
+    def test_revertir_ingreso_ya_gastado(self):
+        bolsillo = models.Bolsillo.objects.create(usuario=self.usuario, nombre='Viajes', saldo=Decimal('90'))
+        response = self.cliente.post('/api/ingresos/', {'monto': '100', 'fecha': '2025-03-06', 'bolsillo': bolsillo.pk}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+        ingreso_id = response.json()['ingreso_id']
+        response = self.cliente.post('/api/egresos/', {'monto': '190', 'fecha': '2025-03-07', 'bolsillo': bolsillo.pk}, format='json')
+        self.assertEqual(response.status_code, 201, response.content)
+
+        response = self.cliente.patch(f'/api/ingresos/{ingreso_id}/', {'monto': '50'}, format='json')
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn('Saldo insuficiente', response.json()['detail'])
+        response = self.cliente.delete(f'/api/ingresos/{ingreso_id}/')
+        self.assertEqual(response.status_code, 400, response.content)
+        self.assertIn('Saldo insuficiente', response.json()['detail'])
+
+        bolsillo.refresh_from_db()
+        self.assertEqual(bolsillo.saldo, Decimal('0'))
+        self.assertTrue(models.Ingreso.objects.filter(pk=ingreso_id).exists())
+
+    def test_stats_reference_en_los_extremos(self):
+        for params in ({'reference': '9999-11', 'periods': 120}, {'reference': '0001-01', 'periods': 1}):
+            with self.subTest(**params):
+                self.assertEqual(self.cliente.get('/api/stats/monthly/', params).status_code, 200)
+
+
+class PresupuestosConsultasTests(TestCase):
+    """
+    Los presupuestos de consultas de las vistas (presupuesto_consultas) se
+    cumplen con pocas y con más filas: la verificación de check_query_budgets
+    sobre la base de pruebas.
+    """
+    # Acciones que deben tener receta y presupuesto
+    CUBIERTAS = (
+        'IngresoViewSet.bulk', 'EgresoViewSet.bulk', 'TransferenciaViewSet.batch',
+        'IngresoViewSet.update', 'EgresoViewSet.update', 'BolsilloViewSet.update', 'CategoriaViewSet.update',
+        'GrupoViewSet.update', 'BolsilloViewSet.partial_update', 'BolsilloViewSet.destroy',
+        'DashboardViewSet.overview', 'DashboardViewSet.overview[incluir]',
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.reporte = check_query_budgets.Command().verificar(2, 6)
+
+    def test_sin_fallas(self):
+        self.assertEqual(self.reporte['fallas'], [])
+
+    def test_acciones_cubiertas(self):
+        for clave in self.CUBIERTAS:
+            with self.subTest(clave):
+                self.assertIn(clave, self.reporte['acciones'])
+                self.assertIsNotNone(self.reporte['acciones'][clave]['presupuesto'])
+
+    def test_exceso_en_ejecucion_falla(self):
+        usuario = models.Usuario.objects.create_user(email='estricto@test.local', password='x')
+        cliente = APIClient()
+        cliente.force_authenticate(usuario)
+        with mock.patch.object(views.BolsilloViewSet, 'presupuesto_consultas', {'list': 0}):
+            with self.assertRaises(presupuestos.PresupuestoExcedido):
+                cliente.get('/api/bolsillos/')
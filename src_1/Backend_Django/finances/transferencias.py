@@ -0,0 +1,206 @@
+"""
+Transferencias entre bolsillos en lote (/api/transferencias/batch/).
+
+Cada transferencia registra una fila de Transferencia y el par de Movimientos
+(salida del origen, entrada al destino). Un lote bloquea una sola vez todos
+los bolsillos involucrados, en orden de ID para que dos lotes concurrentes no
+se bloqueen mutuamente, verifica los saldos en el orden del lote y aplica el
+delta neto de cada bolsillo en un único UPDATE.
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from . import membresias, metricas, models, reintentos, saldos, versiones
+
+
+MAX_TRANSFERENCIAS_LOTE = 500
+
+
+@dataclass
+class TransferenciaPendiente:
+    origen: models.Bolsillo
+    destino: models.Bolsillo
+    monto: Decimal
+    descripcion: str
+    usuario: object
+    grupo_id: int
+
+
+def _leer_monto(valor):
+    if valor in (None, ''):
+        return None, 'El monto es requerido'
+    try:
+        monto = Decimal(str(valor))
+    except (InvalidOperation, ValueError, TypeError):
+        return None, 'El monto debe ser un número válido'
+    if not monto.is_finite():
+        return None, 'El monto debe ser un número válido'
+    if monto <= 0:
+        return None, 'El monto debe ser mayor a 0'
+    if monto.as_tuple().exponent < -2:
+        return None, 'El monto no puede tener más de 2 decimales'
+    if monto >= Decimal('1e12'):
+        return None, 'El monto es demasiado grande'
+    return monto, None
+
+
+def _leer_id(valor):
+    try:
+        return int(valor)
+    except (TypeError, ValueError):
+        return None
+
+
+def _contexto(origen, destino, user, request):
+    """Devuelve (usuario, grupo_id) de la transferencia o lanza ValidationError."""
+    if origen.usuario_id and destino.usuario_id:
+        # Ambos son personales - deben ser del mismo usuario
+        if origen.usuario_id != user.pk or destino.usuario_id != user.pk:
+            raise ValidationError({'detail': 'Solo puedes transferir entre tus propios bolsillos'})
+        return user, None
+    if origen.grupo_id and destino.grupo_id:
+        # Ambos son de grupo - deben ser del mismo grupo
+        if origen.grupo_id != destino.grupo_id:
+            raise ValidationError({'detail': 'Solo puedes transferir entre bolsillos del mismo grupo'})
+        if not membresias.es_miembro(user, origen.grupo_id, request):
+            raise ValidationError({'detail': 'No eres miembro de este grupo'})
+        return None, origen.grupo_id
+    raise ValidationError({'detail': 'No puedes transferir entre bolsillos personales y de grupo'})
+
+
+def validar(filas, user, request=None):
+    """
+    Valida una lista de dicts con bolsillo_origen_id, bolsillo_destino_id,
+    monto y descripcion (opcional). Carga los bolsillos en una sola consulta.
+    Devuelve (transferencias, errores) con errores = [{'fila': n, 'errores': {...}}].
+    """
+    if not isinstance(filas, list) or not filas:
+        raise ValidationError({'detail': 'Se requiere una lista de transferencias'})
+    if len(filas) > MAX_TRANSFERENCIAS_LOTE:
+        raise ValidationError({'detail': f'Se permiten como máximo {MAX_TRANSFERENCIAS_LOTE} transferencias por lote'})
+
+    ids = set()
+    for fila in filas:
+        if isinstance(fila, dict):
+            ids.update(i for i in (_leer_id(fila.get('bolsillo_origen_id')), _leer_id(fila.get('bolsillo_destino_id'))) if i)
+    bolsillos = models.Bolsillo.objects.in_bulk(ids)
+
+    transferencias = []
+    errores = []
+    for indice, fila in enumerate(filas, start=1):
+        if not isinstance(fila, dict):
+            errores.append({'fila': indice, 'errores': {'detail': 'Cada transferencia debe ser un objeto'}})
+            continue
+        errores_fila = {}
+        origen_id = _leer_id(fila.get('bolsillo_origen_id'))
+        destino_id = _leer_id(fila.get('bolsillo_destino_id'))
+        if origen_id is None:
+            errores_fila['bolsillo_origen_id'] = 'El bolsillo_origen_id es requerido'
+        elif origen_id not in bolsillos:
+            errores_fila['bolsillo_origen_id'] = 'El bolsillo de origen no existe'
+        if destino_id is None:
+            errores_fila['bolsillo_destino_id'] = 'El bolsillo_destino_id es requerido'
+        elif destino_id not in bolsillos:
+            errores_fila['bolsillo_destino_id'] = 'El bolsillo de destino no existe'
+        if origen_id is not None and origen_id == destino_id:
+            errores_fila['detail'] = 'No puedes transferir al mismo bolsillo'
+        monto, error = _leer_monto(fila.get('monto'))
+        if error:
+            errores_fila['monto'] = error
+        descripcion = fila.get('descripcion') or ''
+        if len(str(descripcion)) > 255:
+            errores_fila['descripcion'] = 'La descripción no puede superar 255 caracteres'
+
+        if not errores_fila:
+            origen, destino = bolsillos[origen_id], bolsillos[destino_id]
+            try:
+                usuario, grupo_id = _contexto(origen, destino, user, request)
+            except ValidationError as exc:
+                errores_fila['detail'] = exc.detail['detail']
+
+        if errores_fila:
+            errores.append({'fila': indice, 'errores': errores_fila})
+            continue
+        transferencias.append(TransferenciaPendiente(
+            origen=origen,
+            destino=destino,
+            monto=monto,
+            descripcion=str(descripcion),
+            usuario=usuario,
+            grupo_id=grupo_id,
+        ))
+    return transferencias, errores
+
+
+@reintentos.con_reintentos
+def ejecutar(transferencias, user):
+    """
+    Registra las transferencias validadas en una transacción y devuelve las
+    filas de Transferencia creadas. Si algún bolsillo no alcanza a cubrir sus
+    salidas (en el orden del lote) se lanza ValidationError y no se escribe nada.
+    """
+    ids = sorted({t.origen.bolsillo_id for t in transferencias} | {t.destino.bolsillo_id for t in transferencias})
+    with transaction.atomic():
+        # Un solo bloqueo de todos los bolsillos, siempre en el mismo orden
+        disponibles = dict(
+            models.Bolsillo.objects.select_for_update()
+            .filter(bolsillo_id__in=ids)
+            .order_by('bolsillo_id')
+            .values_list('bolsillo_id', 'saldo')
+        )
+        netos = defaultdict(Decimal)
+        for indice, t in enumerate(transferencias, start=1):
+            if disponibles[t.origen.bolsillo_id] < t.monto:
+                cual = f' para la transferencia {indice}' if len(transferencias) > 1 else ''
+                raise ValidationError({
+                    'detail': f'Saldo insuficiente en el bolsillo "{t.origen.nombre}"{cual}. '
+                              f'Saldo disponible: ${disponibles[t.origen.bolsillo_id]}, necesitas ${t.monto}'
+                })
+            disponibles[t.origen.bolsillo_id] -= t.monto
+            disponibles[t.destino.bolsillo_id] += t.monto
+            netos[t.origen.bolsillo_id] -= t.monto
+            netos[t.destino.bolsillo_id] += t.monto
+
+        # Saldos ya verificados con las filas bloqueadas: un solo UPDATE ... CASE
+        saldos.sumar_en_lote(netos)
+
+        registros = models.Transferencia.objects.bulk_create([
+            models.Transferencia(
+                de_bolsillo=t.origen,
+                a_bolsillo=t.destino,
+                monto_origen=t.monto,
+                monto_destino=t.monto,
+                descripcion=t.descripcion or None,
+                creado_por=user,
+            )
+            for t in transferencias
+        ])
+        movimientos = []
+        for t in transferencias:
+            movimientos.append(models.Movimiento(
+                tipo='eg',
+                monto=t.monto,
+                descripcion=t.descripcion or f'Transferencia a {t.destino.nombre}',
+                usuario=t.usuario,
+                grupo_id=t.grupo_id,
+                bolsillo=t.origen,
+            ))
+            movimientos.append(models.Movimiento(
+                tipo='ing',
+                monto=t.monto,
+                descripcion=t.descripcion or f'Transferencia desde {t.origen.nombre}',
+                usuario=t.usuario,
+                grupo_id=t.grupo_id,
+                bolsillo=t.destino,
+            ))
+        models.Movimiento.objects.bulk_create(movimientos)
+        metricas.al_confirmar('transferencias', [t.monto for t in transferencias])
+        # bulk_create no emite señales: renovar la versión de los propietarios a mano
+        versiones.incrementar(*{
+            versiones.alcance_propietario(t.usuario.pk if t.usuario else None, t.grupo_id) for t in transferencias
+        })
+    return registros
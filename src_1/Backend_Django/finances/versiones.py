@@ -0,0 +1,134 @@
+"""
+Versiones por propietario (usuario o grupo) para cachear respuestas.
+
+Cada propietario tiene un token de versión en la caché de Django. Las
+escrituras lo renuevan (señales en finances/signals.py y llamadas explícitas
+en los caminos que usan bulk_create o update()), así que las claves que lo
+incluyen quedan obsoletas sin tener que buscarlas ni borrarlas.
+
+Los tokens son aleatorios en lugar de contadores: si la caché pierde una
+versión, la nueva nunca coincide con una clave antigua.
+"""
+import datetime
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+from . import membresias, models
+
+
+# Cambia con cualquier alta, cambio o baja de usuarios
+ALCANCE_USUARIOS = 'usuarios'
+
+
+def alcance_usuario(usuario_id):
+    return f'u:{usuario_id}'
+
+
+def alcance_grupo(grupo_id):
+    return f'g:{grupo_id}'
+
+
+def alcance_token(key):
+    """Versión de la entrada de un token en la caché de autenticación (finances/authentication.py)."""
+    return f'token:{key}'
+
+
+def alcance_propietario(usuario_id=None, grupo_id=None):
+    """Alcance de una fila con propietario XOR (grupo tiene prioridad)."""
+    if grupo_id:
+        return alcance_grupo(grupo_id)
+    if usuario_id:
+        return alcance_usuario(usuario_id)
+    return None
+
+
+def alcances_peticion(user, grupo_id=None, request=None):
+    """
+    Alcances de una lectura filtrada por ?grupo_id=: el del grupo si el
+    usuario es miembro, si no hay grupo el del usuario. None para anónimos o
+    no miembros (no se versiona).
+    """
+    if not user or user.is_anonymous:
+        return None
+    if grupo_id:
+        if not membresias.es_miembro(user, grupo_id, request):
+            return None
+        return [alcance_grupo(int(grupo_id))]
+    return [alcance_usuario(user.pk)]
+
+
+def _clave(alcance):
+    return f'finances:version:{alcance}'
+
+
+def _nuevo_token():
+    return uuid.uuid4().hex[:16]
+
+
+def obtener(alcances):
+    """Devuelve {alcance: token}; crea los que falten."""
+    claves = {_clave(a): a for a in alcances}
+    existentes = cache.get_many(list(claves))
+    faltantes = {clave: _nuevo_token() for clave in claves if clave not in existentes}
+    if faltantes:
+        cache.set_many(faltantes, None)
+        existentes.update(faltantes)
+    return {claves[clave]: token for clave, token in existentes.items()}
+
+
+def incrementar(*alcances):
+    """
+    Renueva la versión de los alcances dados. Se repite al confirmar la
+    transacción para que una lectura concurrente no guarde en caché el estado
+    anterior al commit con la versión nueva.
+    """
+    claves = [_clave(a) for a in alcances if a]
+    if not claves:
+        return
+    cache.set_many({clave: _nuevo_token() for clave in claves}, None)
+    transaction.on_commit(lambda: cache.set_many({clave: _nuevo_token() for clave in claves}, None))
+
+
+def incrementar_bolsillos(bolsillo_ids):
+    """Renueva la versión de los propietarios de los bolsillos dados."""
+    propietarios = models.Bolsillo.objects.filter(bolsillo_id__in=list(bolsillo_ids)).values_list('usuario_id', 'grupo_id')
+    incrementar(*{alcance_propietario(usuario_id, grupo_id) for usuario_id, grupo_id in propietarios})
+
+
+def huella(request, nombre, alcances):
+    """
+    Identificador de la respuesta para (usuario, ruta, parámetros, versiones
+    de los alcances). Cambia en cuanto cambia cualquiera de las versiones.
+    Sirve de ETag y de clave de caché.
+    """
+    versiones = obtener(alcances)
+    partes = [
+        nombre,
+        # Los valores por defecto relativos a hoy (p. ej. el mes de referencia) cambian con la fecha
+        datetime.date.today().isoformat(),
+        str(request.user.pk),
+        request.path,
+        '&'.join(f'{k}={v}' for k, v in sorted(request.query_params.lists())),
+        ','.join(f'{a}={versiones[a]}' for a in sorted(alcances)),
+    ]
+    return hashlib.sha1('|'.join(partes).encode()).hexdigest()
+
+
+def respuesta_cacheada(huella_respuesta, construir):
+    """
+    Devuelve la respuesta cacheada bajo `huella_respuesta` (ver huella()) o la
+    construye con `construir()` y la guarda si es 200.
+    """
+    clave = f'finances:respuesta:{huella_respuesta}'
+    datos = cache.get(clave)
+    if datos is not None:
+        return Response(datos)
+    response = construir()
+    if response.status_code == 200:
+        cache.set(clave, response.data, getattr(settings, 'RESPUESTAS_CACHE_TTL', 300))
+    return response
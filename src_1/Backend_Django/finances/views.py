@@ -1,18 +1,151 @@
 from rest_framework import viewsets, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.decorators import action
-from rest_framework.exceptions import ValidationError
-from django.db.models import Q
-from . import models, serializers
+from rest_framework.exceptions import APIException, ValidationError
+from django.db.models import F, Q, Prefetch
+from rest_framework.parsers import MultiPartParser, FormParser
+from . import models, serializers, reportes, resumenes, membresias, importacion, exportacion, metricas, reintentos, saldos, transferencias, versiones
+from .pagination import FechaCursorPagination, FechaCursorPaginationObligatoria
+from .parsers import CSVParser, JSONRapidoParser, leer_csv
 from rest_framework.views import APIView
 from rest_framework.response import Response
+from django.core.exceptions import FieldDoesNotExist
 from django.db.models.deletion import RestrictedError
-from django.db import IntegrityError
+from django.db import IntegrityError, transaction
+from django.http import StreamingHttpResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
 
+def con_relaciones_transaccion(queryset, relacion_aportacion, expandir=('categoria', 'bolsillo', 'creado_por')):
+    """
+    Carga de una vez las relaciones que usa la representación de ingresos/egresos
+    (categoría, bolsillo, autor y aportación), evitando una consulta por fila.
+    Solo se cargan las de las expansiones pedidas (ver serializers.CamposDinamicosMixin).
+    """
+    relaciones = [relacion for relacion in ('categoria', 'bolsillo') if relacion in expandir]
+    if 'creado_por' in expandir:
+        relaciones += ['creado_por', 'usuario']
+        queryset = queryset.prefetch_related(
+            Prefetch(relacion_aportacion, queryset=models.Aportacion.objects.select_related('usuario'))
+        )
+    return queryset.select_related(*relaciones) if relaciones else queryset
+
+
+class ProyeccionMixin:
+    """
+    Lleva ?fields= y ?expand= a la consulta: en lecturas solo se piden las
+    columnas que el serializer va a devolver, más la clave primaria, la fecha
+    de orden de la paginación y las relaciones cargadas con select_related.
+    """
+
+    def seleccion_campos(self):
+        """(campos, expansiones) pedidos; ver serializers.CamposDinamicosMixin."""
+        serializer_class = self.get_serializer_class()
+        if not hasattr(serializer_class, 'seleccion'):
+            return None, set()
+        return serializer_class.seleccion(self.request)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        campos, _ = self.seleccion_campos()
+        if campos is None:
+            return queryset
+        opciones = queryset.model._meta
+        declarados = self.get_serializer_class()._declared_fields
+        columnas = {opciones.pk.name}
+        orden = getattr(self.pagination_class, 'ordering_field', None)
+        if orden:
+            columnas.add(orden)
+        if isinstance(queryset.query.select_related, dict):
+            columnas.update(queryset.query.select_related)
+        for campo in campos:
+            # categoria_nombre (source='categoria.nombre') necesita la columna categoria
+            fuente = getattr(declarados.get(campo), 'source', None) or campo
+            nombre = fuente.split('.')[0]
+            try:
+                field = opciones.get_field(nombre)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columnas.add(nombre)
+        return queryset.only(*columnas)
+
+
+class NoModificado(APIException):
+    status_code = status.HTTP_304_NOT_MODIFIED
+
+
+class VersionadoMixin:
+    """
+    ETag y GET condicional a partir de la versión de los propietarios
+    involucrados (ver finances/versiones.py), sin ejecutar el queryset ni
+    serializar: si If-None-Match coincide se responde 304 sin cuerpo.
+    """
+
+    def alcances_version(self):
+        """
+        Alcances (usuario/grupo) de los que dependen las respuestas GET de la
+        vista, o None para no versionar. Por defecto: el grupo de ?grupo_id=
+        o el usuario.
+        """
+        return versiones.alcances_peticion(self.request.user, self.request.query_params.get('grupo_id'), self.request)
+
+    def alcances_usuario_y_grupos(self):
+        """Para vistas que mezclan datos del usuario y de todos sus grupos."""
+        user = self.request.user
+        if not user or user.is_anonymous:
+            return None
+        return [versiones.alcance_usuario(user.pk)] + [
+            versiones.alcance_grupo(g) for g in membresias.grupos_ids(user, self.request)
+        ]
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.huella_version = None
+        if request.method not in ('GET', 'HEAD'):
+            return
+        alcances = self.alcances_version()
+        if alcances is None:
+            return
+        self.huella_version = versiones.huella(request, self.basename, alcances)
+        etags = [e.strip() for e in request.headers.get('If-None-Match', '').split(',')]
+        if f'"{self.huella_version}"' in etags or '*' in etags:
+            raise NoModificado()
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NoModificado):
+            return self._con_etag(Response(status=status.HTTP_304_NOT_MODIFIED))
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, 'huella_version', None) and response.status_code == status.HTTP_200_OK:
+            self._con_etag(response)
+        return response
+
+    def _con_etag(self, response):
+        response['ETag'] = f'"{self.huella_version}"'
+        # El cliente puede guardar la respuesta pero debe revalidarla siempre
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class ListaCacheadaMixin(VersionadoMixin):
+    """
+    Cachea la respuesta de `list` bajo la huella de versión de la petición:
+    mientras nada cambie, el listado se sirve sin consultar la base de datos.
+    """
+
+    def list(self, request, *args, **kwargs):
+        if not getattr(self, 'huella_version', None):
+            return super().list(request, *args, **kwargs)
+        return versiones.respuesta_cacheada(
+            self.huella_version, lambda: super(ListaCacheadaMixin, self).list(request, *args, **kwargs)
+        )
+
+
 class RegisterAPIView(APIView):
     permission_classes = []  # allow any
 
@@ -26,11 +159,22 @@ class RegisterAPIView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
-class UsuarioViewSet(viewsets.ModelViewSet):
+class UsuarioViewSet(VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Usuario.objects.all()
     serializer_class = serializers.UsuarioSerializer
     # Allow unauthenticated users to create (register). Other actions require authentication.
     permission_classes = [IsAuthenticated]
+    # Consultas por acción en frío (ver finances/presupuestos.py y check_query_budgets)
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'check_email': 2, 'me': 1}
+
+    def alcances_version(self):
+        user = self.request.user
+        if not user or user.is_anonymous:
+            return None
+        if self.action == 'me':
+            return [versiones.alcance_usuario(user.pk)]
+        # Listado y detalle muestran cualquier usuario
+        return [versiones.ALCANCE_USUARIOS]
 
     def get_permissions(self):
         # AllowAnyone for create (registration), otherwise require IsAuthenticated
@@ -64,6 +208,16 @@ class UsuarioViewSet(viewsets.ModelViewSet):
             pass
         return response
 
+    def destroy(self, request, *args, **kwargs):
+        # Transferencias (creado_por) y aportaciones restringen el borrado del usuario
+        try:
+            return super().destroy(request, *args, **kwargs)
+        except RestrictedError:
+            return Response(
+                {'detail': 'No se puede eliminar este usuario porque tiene transferencias o aportaciones registradas.'},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
     @action(detail=False, methods=['get'], url_path='check-email', permission_classes=[])
     def check_email(self, request):
         """
@@ -93,10 +247,15 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
-class GrupoViewSet(viewsets.ModelViewSet):
+class GrupoViewSet(ListaCacheadaMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Grupo.objects.all()
     serializer_class = serializers.GrupoSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'create': 4, 'update': 4, 'partial_update': 4}
+
+    def alcances_version(self):
+        # Membresías del usuario (su versión) y datos de cada uno de sus grupos
+        return self.alcances_usuario_y_grupos()
 
     def get_queryset(self):
         """
@@ -106,7 +265,7 @@ class GrupoViewSet(viewsets.ModelViewSet):
         if not user or user.is_anonymous:
             return models.Grupo.objects.none()
         # Obtener los IDs de grupos donde el usuario es miembro
-        grupos_ids = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
+        grupos_ids = membresias.grupos_ids(user, self.request)
         return models.Grupo.objects.filter(grupo_id__in=grupos_ids)
 
     def perform_create(self, serializer):
@@ -131,10 +290,11 @@ class GrupoViewSet(viewsets.ModelViewSet):
 
 
 
-class BolsilloViewSet(viewsets.ModelViewSet):
+class BolsilloViewSet(ListaCacheadaMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Bolsillo.objects.all()
     serializer_class = serializers.BolsilloSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'create': 4, 'update': 10, 'partial_update': 8, 'destroy': 14}
 
     def get_queryset(self):
         user = self.request.user
@@ -144,11 +304,8 @@ class BolsilloViewSet(viewsets.ModelViewSet):
         # Filtrar por grupo específico si se proporciona grupo_id
         grupo_id = self.request.query_params.get('grupo_id')
         if grupo_id:
-            # Obtener todos los grupos donde el usuario es miembro
-            grupos_ids = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
-            
             # Verificar que el usuario sea miembro del grupo
-            if int(grupo_id) not in grupos_ids:
+            if not membresias.es_miembro(user, grupo_id, self.request):
                 return models.Bolsillo.objects.none()
             return models.Bolsillo.objects.filter(grupo_id=grupo_id)
         
@@ -165,10 +322,7 @@ class BolsilloViewSet(viewsets.ModelViewSet):
         
         if grupo_id:
             # Verificar que el usuario sea miembro del grupo
-            es_miembro = models.UsuarioGrupo.objects.filter(
-                usuario=user,
-                grupo_id=grupo_id
-            ).exists()
+            es_miembro = membresias.es_miembro(user, grupo_id, self.request)
             if not es_miembro:
                 raise ValidationError({'detail': 'No eres miembro de este grupo'})
             
@@ -185,22 +339,12 @@ class BolsilloViewSet(viewsets.ModelViewSet):
                         'detail': 'No se encontró el bolsillo General del grupo. Crea primero el bolsillo General.'
                     })
                 
-                # Verificar que el bolsillo General tenga saldo suficiente
-                if bolsillo_general.saldo < monto_bolsillo:
-                    raise ValidationError({
-                        'detail': f'Saldo insuficiente en el bolsillo General. Saldo disponible: ${bolsillo_general.saldo:.2f}',
-                        'saldo_disponible': float(bolsillo_general.saldo)
-                    })
-                
-                # Crear el bolsillo primero con saldo 0
-                nuevo_bolsillo = serializer.save(grupo_id=grupo_id, saldo=0)
-                
-                # Realizar la transferencia interna
-                bolsillo_general.saldo -= monto_bolsillo
-                bolsillo_general.save()
-                
-                nuevo_bolsillo.saldo = monto_bolsillo
-                nuevo_bolsillo.save()
+                # Transferencia interna: el débito al General verifica el saldo en el
+                # mismo UPDATE y el bolsillo nuevo se crea ya con el monto
+                def crear_con_saldo():
+                    saldos.debitar(bolsillo_general.bolsillo_id, monto_bolsillo)
+                    serializer.save(grupo_id=grupo_id, saldo=monto_bolsillo)
+                reintentos.en_transaccion(crear_con_saldo)
             else:
                 # Crear bolsillo sin saldo inicial
                 serializer.save(grupo_id=grupo_id)
@@ -213,6 +357,7 @@ class BolsilloViewSet(viewsets.ModelViewSet):
         bolsillo = self.get_object()
         nuevo_saldo = serializer.validated_data.get('saldo', bolsillo.saldo)
         saldo_anterior = bolsillo.saldo
+        deltas = []
         
         # Solo validar si el bolsillo pertenece a un grupo Y el saldo cambió
         if bolsillo.grupo and nuevo_saldo != saldo_anterior:
@@ -233,24 +378,20 @@ class BolsilloViewSet(viewsets.ModelViewSet):
                     'detail': 'No se encontró el bolsillo General del grupo.'
                 })
             
-            # Calcular la diferencia
-            diferencia = nuevo_saldo - saldo_anterior
-            
-            if diferencia > 0:
-                # Aumentar saldo: transferir desde General
-                if bolsillo_general.saldo < diferencia:
-                    raise ValidationError({
-                        'detail': f'Saldo insuficiente en el bolsillo General. Saldo disponible: ${bolsillo_general.saldo:.2f}, necesitas: ${diferencia:.2f}',
-                        'saldo_disponible': float(bolsillo_general.saldo)
-                    })
-                bolsillo_general.saldo -= diferencia
-                bolsillo_general.save()
-            else:
-                # Disminuir saldo: devolver a General
-                bolsillo_general.saldo += abs(diferencia)
-                bolsillo_general.save()
+            # Aumentar saldo resta la diferencia del General; disminuirlo la devuelve
+            deltas.append((bolsillo_general.bolsillo_id, saldo_anterior - nuevo_saldo))
         
-        serializer.save()
+        # El saldo se ajusta por diferencia con UPDATE atómicos (no se sobrescribe
+        # con el valor leído, así no se pierden movimientos concurrentes)
+        deltas.append((bolsillo.bolsillo_id, nuevo_saldo - saldo_anterior))
+        serializer.validated_data.pop('saldo', None)
+
+        def guardar():
+            saldos.aplicar(deltas)
+            # save() escribe la fila completa: conservar el saldo ya actualizado en la base
+            serializer.save(saldo=F('saldo'))
+            serializer.instance.refresh_from_db(fields=['saldo'])
+        reintentos.en_transaccion(guardar)
 
     def destroy(self, request, *args, **kwargs):
         """Override destroy to return a friendly error when DB restricts deletion (e.g. transferencias)."""
@@ -286,10 +427,11 @@ class BolsilloViewSet(viewsets.ModelViewSet):
             return Response({'detail': f'Error al actualizar el bolsillo: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
 
-class CategoriaViewSet(viewsets.ModelViewSet):
+class CategoriaViewSet(ListaCacheadaMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Categoria.objects.all()
     serializer_class = serializers.CategoriaSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'list': 2, 'retrieve': 2, 'create': 4, 'update': 7, 'partial_update': 6}
 
     def get_queryset(self):
         user = self.request.user
@@ -300,10 +442,7 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         grupo_id = self.request.query_params.get('grupo_id')
         if grupo_id:
             # Verificar que el usuario sea miembro del grupo
-            es_miembro = models.UsuarioGrupo.objects.filter(
-                usuario=user,
-                grupo_id=grupo_id
-            ).exists()
+            es_miembro = membresias.es_miembro(user, grupo_id, self.request)
             if not es_miembro:
                 return models.Categoria.objects.none()
             return models.Categoria.objects.filter(grupo_id=grupo_id)
@@ -317,10 +456,7 @@ class CategoriaViewSet(viewsets.ModelViewSet):
         
         if grupo_id:
             # Verificar que el usuario sea miembro del grupo
-            es_miembro = models.UsuarioGrupo.objects.filter(
-                usuario=user,
-                grupo_id=grupo_id
-            ).exists()
+            es_miembro = membresias.es_miembro(user, grupo_id, self.request)
             if not es_miembro:
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError({'detail': 'No eres miembro de este grupo'})
@@ -329,25 +465,110 @@ class CategoriaViewSet(viewsets.ModelViewSet):
             serializer.save(usuario=user)
 
 
-class TransferenciaViewSet(viewsets.ModelViewSet):
+class TransferenciaViewSet(VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Transferencia.objects.all()
     serializer_class = serializers.TransferenciaSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FechaCursorPagination
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'batch': 7}
 
     def get_queryset(self):
         user = self.request.user
         if not user or user.is_anonymous:
             return models.Transferencia.objects.none()
-        grupos = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
+        grupos = membresias.grupos_ids(user, self.request)
         return models.Transferencia.objects.filter(
             Q(de_bolsillo__usuario=user) | Q(a_bolsillo__usuario=user) | Q(de_bolsillo__grupo__in=grupos) | Q(a_bolsillo__grupo__in=grupos)
         )
 
+    def alcances_version(self):
+        return self.alcances_usuario_y_grupos()
 
-class IngresoViewSet(viewsets.ModelViewSet):
+    @action(detail=False, methods=['post'], url_path='batch')
+    def batch(self, request):
+        """
+        Registrar varias transferencias en una sola transacción.
+        Acepta una lista (o {"transferencias": [...]}) de objetos con
+        bolsillo_origen_id, bolsillo_destino_id, monto y descripcion (opcional).
+        Si alguna es inválida o un bolsillo no alcanza, no se registra ninguna.
+        """
+        datos = request.data
+        if not isinstance(datos, (list, dict)):
+            raise ValidationError({'detail': 'El cuerpo debe ser una lista de transferencias o un objeto con "transferencias"'})
+        filas = datos if isinstance(datos, list) else datos.get('transferencias')
+        transferencias_validas, errores = transferencias.validar(filas, request.user, request)
+        if errores:
+            return Response({
+                'detail': f'{len(errores)} transferencia(s) con errores; no se registró ninguna',
+                'creadas': 0,
+                'errores': errores,
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        registros = transferencias.ejecutar(transferencias_validas, request.user)
+        bolsillos = {}
+        for t in transferencias_validas:
+            bolsillos[t.origen.bolsillo_id] = t.origen
+            bolsillos[t.destino.bolsillo_id] = t.destino
+        saldos.refrescar(*bolsillos.values())
+        return Response({
+            'detail': f'{len(registros)} transferencia(s) realizadas exitosamente',
+            'creadas': len(registros),
+            'transferencias': [r.transferencia_id for r in registros],
+            'bolsillos': [
+                {'id': b.bolsillo_id, 'nombre': b.nombre, 'saldo': b.saldo}
+                for b in sorted(bolsillos.values(), key=lambda b: b.bolsillo_id)
+            ],
+        }, status=status.HTTP_201_CREATED)
+
+
+class ImportacionMasivaMixin:
+    """
+    Acción POST .../bulk/ para importar muchas transacciones de una vez.
+
+    Acepta una lista JSON (o {"filas": [...]}), un cuerpo text/csv o un archivo
+    CSV en el campo multipart "archivo". El grupo se indica con grupo_id en la
+    query o en el cuerpo.
+    """
+
+    @action(detail=False, methods=['post'], url_path='bulk',
+            parser_classes=[JSONRapidoParser, CSVParser, MultiPartParser, FormParser])
+    def bulk(self, request):
+        user = request.user
+        datos = request.data
+        grupo_id = request.query_params.get('grupo_id')
+        if isinstance(datos, list):
+            filas = datos
+        elif not isinstance(datos, dict):
+            raise ValidationError({'detail': 'El cuerpo debe ser una lista de filas o un objeto con "filas"'})
+        elif 'archivo' in request.FILES:
+            try:
+                filas = leer_csv(request.FILES['archivo'].read().decode('utf-8'))
+            except UnicodeDecodeError:
+                raise ValidationError({'detail': 'El archivo debe estar codificado en UTF-8'})
+            grupo_id = grupo_id or datos.get('grupo_id')
+        else:
+            filas = datos.get('filas')
+            grupo_id = grupo_id or datos.get('grupo_id')
+
+        if grupo_id and not membresias.es_miembro(user, grupo_id, request):
+            raise ValidationError({'detail': 'No eres miembro de este grupo'})
+
+        creados, errores = importacion.importar(self.queryset.model, filas, user, int(grupo_id) if grupo_id else None)
+        if errores:
+            return Response({
+                'detail': f'{len(errores)} fila(s) con errores; no se importó ninguna fila',
+                'creados': 0,
+                'errores': errores,
+            }, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'creados': creados, 'errores': []}, status=status.HTTP_201_CREATED)
+
+
+class IngresoViewSet(ImportacionMasivaMixin, VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Ingreso.objects.all()
     serializer_class = serializers.IngresoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FechaCursorPagination
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'create': 7, 'update': 10, 'partial_update': 8, 'destroy': 7, 'bulk': 7}
 
     def get_queryset(self):
         user = self.request.user
@@ -357,17 +578,16 @@ class IngresoViewSet(viewsets.ModelViewSet):
         # Filtrar por grupo específico si se proporciona grupo_id
         grupo_id = self.request.query_params.get('grupo_id')
         if grupo_id:
-            # Obtener todos los grupos donde el usuario es miembro
-            grupos_ids = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
-            
             # Verificar que el usuario sea miembro del grupo
-            if int(grupo_id) not in grupos_ids:
+            if not membresias.es_miembro(user, grupo_id, self.request):
                 return models.Ingreso.objects.none()
-            return models.Ingreso.objects.filter(grupo_id=grupo_id)
-        
-        # Si no hay grupo_id, mostrar SOLO ingresos personales (sin grupo)
-        return models.Ingreso.objects.filter(usuario=user, grupo__isnull=True)
+            queryset = models.Ingreso.objects.filter(grupo_id=grupo_id)
+        else:
+            # Si no hay grupo_id, mostrar SOLO ingresos personales (sin grupo)
+            queryset = models.Ingreso.objects.filter(usuario=user, grupo__isnull=True)
+        return con_relaciones_transaccion(queryset, 'aportacion_ingreso', self.seleccion_campos()[1])
 
+    @reintentos.atomico
     def perform_create(self, serializer):
         user = self.request.user
         bolsillo = serializer.validated_data.get('bolsillo')
@@ -376,15 +596,11 @@ class IngresoViewSet(viewsets.ModelViewSet):
         
         # Actualizar saldo del bolsillo (sumar ingreso)
         if bolsillo and monto:
-            bolsillo.saldo += monto
-            bolsillo.save()
+            saldos.acreditar(bolsillo.bolsillo_id, monto)
         
         if grupo_id:
             # Verificar que el usuario sea miembro del grupo
-            es_miembro = models.UsuarioGrupo.objects.filter(
-                usuario=user,
-                grupo_id=grupo_id
-            ).exists()
+            es_miembro = membresias.es_miembro(user, grupo_id, self.request)
             if not es_miembro:
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError({'detail': 'No eres miembro de este grupo'})
@@ -393,40 +609,40 @@ class IngresoViewSet(viewsets.ModelViewSet):
             serializer.save(grupo_id=grupo_id, creado_por=user)
         else:
             serializer.save(usuario=user, creado_por=user)
+        resumenes.registrar(serializer.instance)
     
+    @reintentos.atomico
     def perform_update(self, serializer):
         # Obtener el ingreso original antes de actualizar
         ingreso_original = self.get_object()
-        bolsillo_original = ingreso_original.bolsillo
-        monto_original = ingreso_original.monto
-        
-        # Revertir el saldo original si había bolsillo
-        if bolsillo_original and monto_original:
-            bolsillo_original.saldo -= monto_original
-            bolsillo_original.save()
+        bolsillo_nuevo = serializer.validated_data.get('bolsillo', ingreso_original.bolsillo)
+        monto_nuevo = serializer.validated_data.get('monto', ingreso_original.monto)
         
-        # Aplicar el nuevo monto al bolsillo nuevo o actualizado
-        bolsillo_nuevo = serializer.validated_data.get('bolsillo')
-        monto_nuevo = serializer.validated_data.get('monto', 0)
-        
-        if bolsillo_nuevo and monto_nuevo:
-            bolsillo_nuevo.saldo += monto_nuevo
-            bolsillo_nuevo.save()
+        # Revertir el monto original y aplicar el nuevo (un UPDATE neto por bolsillo);
+        # falla si el bolsillo queda sin saldo para cubrir la reversión
+        saldos.aplicar([
+            (ingreso_original.bolsillo_id, -(ingreso_original.monto or 0)),
+            (bolsillo_nuevo.bolsillo_id if bolsillo_nuevo else None, monto_nuevo or 0),
+        ])
         
         serializer.save()
+        resumenes.Deltas().agregar(ingreso_original, -1).agregar(serializer.instance).aplicar()
     
+    @reintentos.atomico
     def perform_destroy(self, instance):
-        # Revertir el saldo al eliminar
-        if instance.bolsillo and instance.monto:
-            instance.bolsillo.saldo -= instance.monto
-            instance.bolsillo.save()
+        # Revertir el saldo al eliminar; falla si ese dinero ya se gastó
+        if instance.bolsillo_id and instance.monto:
+            saldos.aplicar({instance.bolsillo_id: -instance.monto})
+        resumenes.registrar(instance, -1)
         instance.delete()
 
 
-class EgresoViewSet(viewsets.ModelViewSet):
+class EgresoViewSet(ImportacionMasivaMixin, VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Egreso.objects.all()
     serializer_class = serializers.EgresoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FechaCursorPagination
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'create': 7, 'update': 10, 'partial_update': 8, 'destroy': 7, 'bulk': 7}
 
     def get_queryset(self):
         user = self.request.user
@@ -436,41 +652,29 @@ class EgresoViewSet(viewsets.ModelViewSet):
         # Filtrar por grupo específico si se proporciona grupo_id
         grupo_id = self.request.query_params.get('grupo_id')
         if grupo_id:
-            # Obtener todos los grupos donde el usuario es miembro
-            grupos_ids = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
-            
             # Verificar que el usuario sea miembro del grupo
-            if int(grupo_id) not in grupos_ids:
+            if not membresias.es_miembro(user, grupo_id, self.request):
                 return models.Egreso.objects.none()
-            return models.Egreso.objects.filter(grupo_id=grupo_id)
-        
-        # Si no hay grupo_id, mostrar SOLO egresos personales (sin grupo)
-        return models.Egreso.objects.filter(usuario=user, grupo__isnull=True)
+            queryset = models.Egreso.objects.filter(grupo_id=grupo_id)
+        else:
+            # Si no hay grupo_id, mostrar SOLO egresos personales (sin grupo)
+            queryset = models.Egreso.objects.filter(usuario=user, grupo__isnull=True)
+        return con_relaciones_transaccion(queryset, 'aportacion_egreso', self.seleccion_campos()[1])
 
+    @reintentos.atomico
     def perform_create(self, serializer):
         user = self.request.user
         bolsillo = serializer.validated_data.get('bolsillo')
         monto = serializer.validated_data.get('monto', 0)
         grupo_id = self.request.data.get('grupo_id') or self.request.data.get('grupo')
         
-        # Validar que hay saldo suficiente en el bolsillo
+        # Restar el egreso del bolsillo; el UPDATE falla si el saldo no alcanza
         if bolsillo and monto:
-            if bolsillo.saldo < monto:
-                from rest_framework.exceptions import ValidationError
-                raise ValidationError({
-                    'detail': f'Saldo insuficiente en el bolsillo "{bolsillo.nombre}". Saldo disponible: ${bolsillo.saldo}, monto requerido: ${monto}'
-                })
-            
-            # Actualizar saldo del bolsillo (restar egreso)
-            bolsillo.saldo -= monto
-            bolsillo.save()
+            saldos.debitar(bolsillo.bolsillo_id, monto)
         
         if grupo_id:
             # Verificar que el usuario sea miembro del grupo
-            es_miembro = models.UsuarioGrupo.objects.filter(
-                usuario=user,
-                grupo_id=grupo_id
-            ).exists()
+            es_miembro = membresias.es_miembro(user, grupo_id, self.request)
             if not es_miembro:
                 from rest_framework.exceptions import ValidationError
                 raise ValidationError({'detail': 'No eres miembro de este grupo'})
@@ -479,53 +683,164 @@ class EgresoViewSet(viewsets.ModelViewSet):
             serializer.save(grupo_id=grupo_id, creado_por=user)
         else:
             serializer.save(usuario=user, creado_por=user)
+        resumenes.registrar(serializer.instance)
     
+    @reintentos.atomico
     def perform_update(self, serializer):
         # Obtener el egreso original antes de actualizar
         egreso_original = self.get_object()
-        bolsillo_original = egreso_original.bolsillo
-        monto_original = egreso_original.monto
-        
-        # Revertir el saldo original si había bolsillo (sumar de vuelta)
-        if bolsillo_original and monto_original:
-            bolsillo_original.saldo += monto_original
-            bolsillo_original.save()
-        
-        # Validar y aplicar el nuevo monto
-        bolsillo_nuevo = serializer.validated_data.get('bolsillo')
-        monto_nuevo = serializer.validated_data.get('monto', 0)
+        bolsillo_nuevo = serializer.validated_data.get('bolsillo', egreso_original.bolsillo)
+        monto_nuevo = serializer.validated_data.get('monto', egreso_original.monto)
         
-        if bolsillo_nuevo and monto_nuevo:
-            if bolsillo_nuevo.saldo < monto_nuevo:
-                from rest_framework.exceptions import ValidationError
-                raise ValidationError({
-                    'detail': f'Saldo insuficiente en el bolsillo "{bolsillo_nuevo.nombre}". Saldo disponible: ${bolsillo_nuevo.saldo}, monto requerido: ${monto_nuevo}'
-                })
-            bolsillo_nuevo.saldo -= monto_nuevo
-            bolsillo_nuevo.save()
+        # Devolver el monto original y restar el nuevo en un UPDATE neto por
+        # bolsillo, que verifica el saldo suficiente en la misma sentencia
+        saldos.aplicar([
+            (egreso_original.bolsillo_id, egreso_original.monto or 0),
+            (bolsillo_nuevo.bolsillo_id if bolsillo_nuevo else None, -(monto_nuevo or 0)),
+        ])
         
         serializer.save()
+        resumenes.Deltas().agregar(egreso_original, -1).agregar(serializer.instance).aplicar()
     
+    @reintentos.atomico
     def perform_destroy(self, instance):
         # Revertir el saldo al eliminar (sumar de vuelta)
-        if instance.bolsillo and instance.monto:
-            instance.bolsillo.saldo += instance.monto
-            instance.bolsillo.save()
+        if instance.bolsillo_id and instance.monto:
+            saldos.acreditar(instance.bolsillo_id, instance.monto)
+        resumenes.registrar(instance, -1)
         instance.delete()
 
 
-class MovimientoViewSet(viewsets.ModelViewSet):
+class StatsViewSet(VersionadoMixin, viewsets.ViewSet):
+    """
+    Estadísticas agregadas en el servidor (sin descargar las transacciones).
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'monthly': 2}
+
+    @action(detail=False, methods=['get'], url_path='monthly')
+    def monthly(self, request):
+        """
+        Totales de ingresos y egresos por mes o por año.
+        Parámetros: grupo_id (opcional), group_by (month|year), periods (default 6),
+        reference (YYYY-MM, default mes actual)
+        """
+        filtro = reportes.filtro_propietario(request.user, request.query_params.get('grupo_id'), request)
+        group_by = request.query_params.get('group_by', 'month')
+        data = reportes.totales_por_periodo(
+            filtro,
+            group_by=group_by,
+            periods=request.query_params.get('periods', 6),
+            reference=request.query_params.get('reference'),
+        )
+        return Response({'group_by': group_by, 'periodos': data}, status=status.HTTP_200_OK)
+
+
+class DashboardViewSet(VersionadoMixin, viewsets.ViewSet):
+    """
+    Datos del dashboard calculados en el servidor con consultas agregadas.
+    """
+    permission_classes = [IsAuthenticated]
+    # Con incluir=periodos,recientes hace dos consultas más que sin él
+    presupuesto_consultas = {'overview': 7}
+
+    @action(detail=False, methods=['get'], url_path='overview')
+    def overview(self, request):
+        """
+        Saldo total, ingresos, egresos, neto, bolsillos y egresos por categoría.
+        Parámetros: grupo_id (opcional), fecha_desde y fecha_hasta (opcionales, YYYY-MM-DD),
+        incluir (opcional: periodos y/o recientes, separados por comas).
+        La versión asíncrona con las consultas en paralelo está en /api/async/dashboard/overview/.
+        """
+        filtro = reportes.filtro_propietario(request.user, request.query_params.get('grupo_id'), request)
+        fechas = reportes.rango_fechas(
+            request.query_params.get('fecha_desde'),
+            request.query_params.get('fecha_hasta'),
+        )
+        incluir = reportes.leer_incluir(request.query_params.get('incluir'))
+        return Response(reportes.resumen_dashboard(filtro, fechas, incluir), status=status.HTTP_200_OK)
+
+
+class MovimientoUnificadoViewSet(VersionadoMixin, ProyeccionMixin, viewsets.ReadOnlyModelViewSet):
+    """
+    Línea de tiempo de ingresos y egresos en una sola consulta (vista v_movimientos).
+    Parámetros: grupo_id (opcional), fecha_desde y fecha_hasta (opcionales,
+    YYYY-MM-DD), page_size y cursor. Siempre paginado, de lo más nuevo a lo más antiguo.
+    """
+    queryset = models.MovimientoUnificado.objects.all()
+    serializer_class = serializers.MovimientoUnificadoSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = FechaCursorPaginationObligatoria
+    presupuesto_consultas = {'list': 2, 'retrieve': 2}
+
+    def get_queryset(self):
+        user = self.request.user
+        if not user or user.is_anonymous:
+            return models.MovimientoUnificado.objects.none()
+        filtro = reportes.filtro_propietario(user, self.request.query_params.get('grupo_id'), self.request)
+        fechas = reportes.rango_fechas(
+            self.request.query_params.get('fecha_desde'),
+            self.request.query_params.get('fecha_hasta'),
+        )
+        queryset = models.MovimientoUnificado.objects.filter(**filtro, **fechas).order_by('-fecha', '-uid')
+        expandir = self.seleccion_campos()[1]
+        # Nombres de categoría y bolsillo solo si se piden
+        return queryset.select_related(*expandir) if expandir else queryset
+
+
+class ExportAPIView(APIView):
+    """
+    Exporta en streaming el libro del usuario (o de un grupo) como CSV o NDJSON.
+    Parámetros: formato (csv|ndjson, default csv), grupo_id (opcional),
+    tipos (lista separada por comas de ingresos, egresos, movimientos y
+    transferencias; default todos), fecha_desde y fecha_hasta (opcionales).
+    """
+    permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'get': 5}
+
+    def get(self, request):
+        # 'format' lo reserva DRF para la negociación de contenido
+        formato = request.query_params.get('formato', 'csv')
+        if formato not in exportacion.FORMATOS:
+            raise ValidationError({'detail': 'El parámetro formato debe ser csv o ndjson'})
+        tipos = request.query_params.get('tipos')
+        tipos = [t.strip() for t in tipos.split(',') if t.strip()] if tipos else list(exportacion.TIPOS)
+        invalidos = [t for t in tipos if t not in exportacion.TIPOS]
+        if invalidos:
+            raise ValidationError({'detail': f'Tipos no válidos: {", ".join(invalidos)}'})
+
+        filtro = reportes.filtro_propietario(request.user, request.query_params.get('grupo_id'), request)
+        fechas = reportes.rango_fechas(
+            request.query_params.get('fecha_desde'),
+            request.query_params.get('fecha_hasta'),
+        )
+        filas = exportacion.filas(filtro, fechas, tipos)
+        response = StreamingHttpResponse(
+            exportacion.GENERADORES[formato](filas),
+            content_type=exportacion.FORMATOS[formato],
+        )
+        sufijo = f'grupo-{filtro["grupo_id"]}' if 'grupo_id' in filtro else 'personal'
+        response['Content-Disposition'] = f'attachment; filename="finanzas-{sufijo}.{formato}"'
+        return response
+
+
+class MovimientoViewSet(VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.Movimiento.objects.all()
     serializer_class = serializers.MovimientoSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = FechaCursorPagination
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'transferir': 10}
 
     def get_queryset(self):
         user = self.request.user
         if not user or user.is_anonymous:
             return models.Movimiento.objects.none()
-        grupos = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
+        grupos = membresias.grupos_ids(user, self.request)
         return models.Movimiento.objects.filter(Q(usuario=user) | Q(grupo__in=grupos))
 
+    def alcances_version(self):
+        return self.alcances_usuario_y_grupos()
+
     def perform_create(self, serializer):
         user = self.request.user
         if user and not serializer.validated_data.get('grupo'):
@@ -534,13 +849,15 @@ class MovimientoViewSet(viewsets.ModelViewSet):
             serializer.save()
 
     @action(detail=False, methods=['post'], url_path='transferir')
+    @reintentos.con_reintentos
     def transferir(self, request):
         """
         Transferir dinero entre bolsillos (del mismo usuario o del mismo grupo).
         Requiere: bolsillo_origen_id, bolsillo_destino_id, monto, descripcion (opcional)
+        Solo registra el par de Movimientos; las filas de Transferencia (que
+        restringen el borrado de los bolsillos) son del lote /api/transferencias/batch/.
         """
-        from decimal import Decimal
-        from django.db import transaction
+        from decimal import Decimal, InvalidOperation
         
         user = request.user
         bolsillo_origen_id = request.data.get('bolsillo_origen_id')
@@ -562,7 +879,7 @@ class MovimientoViewSet(viewsets.ModelViewSet):
             monto = Decimal(str(monto))
             if monto <= 0:
                 raise ValidationError({'detail': 'El monto debe ser mayor a 0'})
-        except (ValueError, TypeError):
+        except (ValueError, TypeError, InvalidOperation):
             raise ValidationError({'detail': 'El monto debe ser un número válido'})
         
         # Obtener bolsillos
@@ -588,10 +905,7 @@ class MovimientoViewSet(viewsets.ModelViewSet):
             if bolsillo_origen.grupo != bolsillo_destino.grupo:
                 raise ValidationError({'detail': 'Solo puedes transferir entre bolsillos del mismo grupo'})
             # Verificar que el usuario es miembro del grupo
-            es_miembro = models.UsuarioGrupo.objects.filter(
-                usuario=user,
-                grupo=bolsillo_origen.grupo
-            ).exists()
+            es_miembro = membresias.es_miembro(user, bolsillo_origen.grupo_id, request)
             if not es_miembro:
                 raise ValidationError({'detail': 'No eres miembro de este grupo'})
             contexto_usuario = None
@@ -599,20 +913,10 @@ class MovimientoViewSet(viewsets.ModelViewSet):
         else:
             raise ValidationError({'detail': 'No puedes transferir entre bolsillos personales y de grupo'})
         
-        # Verificar saldo suficiente
-        if bolsillo_origen.saldo < monto:
-            raise ValidationError({
-                'detail': f'Saldo insuficiente. El bolsillo tiene ${bolsillo_origen.saldo}, necesitas ${monto}'
-            })
-        
         # Realizar la transferencia (atomic para que ambas operaciones se hagan o ninguna)
         with transaction.atomic():
-            # Actualizar saldos
-            bolsillo_origen.saldo -= monto
-            bolsillo_origen.save()
-            
-            bolsillo_destino.saldo += monto
-            bolsillo_destino.save()
+            # Actualizar saldos; el débito verifica el saldo suficiente en el mismo UPDATE
+            saldos.transferir(bolsillo_origen.bolsillo_id, bolsillo_destino.bolsillo_id, monto)
             
             # Crear registro de movimiento (egreso del origen)
             movimiento_egreso = models.Movimiento.objects.create(
@@ -633,34 +937,45 @@ class MovimientoViewSet(viewsets.ModelViewSet):
                 grupo=contexto_grupo,
                 bolsillo=bolsillo_destino
             )
+            metricas.al_confirmar('transferencias', [monto])
         
+        saldos.refrescar(bolsillo_origen, bolsillo_destino)
         return Response({
             'detail': 'Transferencia realizada exitosamente',
             'bolsillo_origen': {
                 'id': bolsillo_origen.bolsillo_id,
                 'nombre': bolsillo_origen.nombre,
-                'saldo': str(bolsillo_origen.saldo)
+                'saldo': bolsillo_origen.saldo
             },
             'bolsillo_destino': {
                 'id': bolsillo_destino.bolsillo_id,
                 'nombre': bolsillo_destino.nombre,
-                'saldo': str(bolsillo_destino.saldo)
+                'saldo': bolsillo_destino.saldo
             },
-            'monto': str(monto)
+            'monto': monto
         }, status=status.HTTP_200_OK)
 
 
-class UsuarioGrupoViewSet(viewsets.ModelViewSet):
+class UsuarioGrupoViewSet(VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     queryset = models.UsuarioGrupo.objects.all()
     serializer_class = serializers.UsuarioGrupoSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'add_by_email': 6, 'change_role': 7, 'list_members': 5}
+
+    def alcances_version(self):
+        if self.action == 'list_members':
+            grupo_id = self.kwargs.get('grupo_id')
+            if not membresias.es_miembro(self.request.user, grupo_id, self.request):
+                return None
+            return [versiones.alcance_grupo(int(grupo_id))]
+        return self.alcances_usuario_y_grupos()
 
     def get_queryset(self):
         user = self.request.user
         if not user or user.is_anonymous:
             return models.UsuarioGrupo.objects.none()
         # Obtener todos los grupos donde el usuario es miembro
-        grupos = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
+        grupos = membresias.grupos_ids(user, self.request)
         # Retornar todos los miembros de esos grupos
         return models.UsuarioGrupo.objects.filter(grupo__in=grupos)
 
@@ -692,13 +1007,10 @@ class UsuarioGrupoViewSet(viewsets.ModelViewSet):
             raise ValidationError({'detail': 'El grupo no existe'})
         
         # Verificar que el usuario actual tiene permisos en el grupo (debe ser admin)
-        user_grupo = models.UsuarioGrupo.objects.filter(
-            usuario=request.user,
-            grupo=grupo,
-            rol='admin'  # Solo los admins pueden agregar usuarios
-        ).first()
+        # Solo los admins pueden agregar usuarios
+        es_admin = membresias.es_admin(request.user, grupo.grupo_id, request)
         
-        if not user_grupo:
+        if not es_admin:
             raise ValidationError({'detail': 'Solo los administradores del grupo pueden agregar usuarios'})
         
         # Verificar que el usuario no esté ya en el grupo
@@ -730,16 +1042,19 @@ class UsuarioGrupoViewSet(viewsets.ModelViewSet):
         """
         Listar todos los miembros de un grupo
         """
+        # Para miembros se sirve la respuesta cacheada por versión del grupo
+        if self.huella_version:
+            return versiones.respuesta_cacheada(self.huella_version, lambda: self._listar_miembros(request, grupo_id))
+        return self._listar_miembros(request, grupo_id)
+
+    def _listar_miembros(self, request, grupo_id):
         try:
             grupo = models.Grupo.objects.get(grupo_id=grupo_id)
         except models.Grupo.DoesNotExist:
             raise ValidationError({'detail': 'El grupo no existe'})
         
         # Verificar que el usuario actual es miembro del grupo
-        es_miembro = models.UsuarioGrupo.objects.filter(
-            usuario=request.user,
-            grupo=grupo
-        ).exists()
+        es_miembro = membresias.es_miembro(request.user, grupo.grupo_id, request)
         
         if not es_miembro:
             raise ValidationError({'detail': 'No tienes permisos para ver los miembros de este grupo'})
@@ -785,13 +1100,9 @@ class UsuarioGrupoViewSet(viewsets.ModelViewSet):
             raise ValidationError({'detail': 'El grupo no existe'})
         
         # Verificar que el usuario actual es admin del grupo
-        user_grupo = models.UsuarioGrupo.objects.filter(
-            usuario=request.user,
-            grupo=grupo,
-            rol='admin'
-        ).first()
+        es_admin = membresias.es_admin(request.user, grupo.grupo_id, request)
         
-        if not user_grupo:
+        if not es_admin:
             raise ValidationError({'detail': 'Solo los administradores del grupo pueden cambiar roles'})
         
         # Buscar el miembro a modificar
@@ -838,7 +1149,7 @@ class UsuarioGrupoViewSet(viewsets.ModelViewSet):
         }, status=status.HTTP_200_OK)
 
 
-class AportacionViewSet(viewsets.ModelViewSet):
+class AportacionViewSet(VersionadoMixin, ProyeccionMixin, viewsets.ModelViewSet):
     """
     ViewSet para manejar aportaciones de usuarios a grupos.
     Al crear una aportación, se crea automáticamente:
@@ -848,6 +1159,7 @@ class AportacionViewSet(viewsets.ModelViewSet):
     queryset = models.Aportacion.objects.all()
     serializer_class = serializers.AportacionSerializer
     permission_classes = [IsAuthenticated]
+    presupuesto_consultas = {'list': 3, 'retrieve': 3, 'aportar': 13}
 
     def get_queryset(self):
         user = self.request.user
@@ -855,12 +1167,16 @@ class AportacionViewSet(viewsets.ModelViewSet):
             return models.Aportacion.objects.none()
         
         # Mostrar aportaciones donde el usuario es el aportante o miembro del grupo
-        grupos_ids = models.UsuarioGrupo.objects.filter(usuario=user).values_list('grupo', flat=True)
+        grupos_ids = membresias.grupos_ids(user, self.request)
         return models.Aportacion.objects.filter(
             Q(usuario=user) | Q(grupo__in=grupos_ids)
         )
 
+    def alcances_version(self):
+        return self.alcances_usuario_y_grupos()
+
     @action(detail=False, methods=['post'], url_path='aportar')
+    @reintentos.con_reintentos
     def aportar(self, request):
         """
         Endpoint para que un usuario aporte dinero a un grupo.
@@ -886,14 +1202,20 @@ class AportacionViewSet(viewsets.ModelViewSet):
         if not fecha:
             raise ValidationError({'detail': 'La fecha es requerida'})
         
-        from decimal import Decimal
+        from decimal import Decimal, InvalidOperation
         
         try:
             monto = Decimal(str(monto))
-            if monto <= 0:
-                raise ValidationError({'detail': 'El monto debe ser mayor a 0'})
-        except (ValueError, TypeError):
+        except (InvalidOperation, ValueError, TypeError):
             raise ValidationError({'detail': 'El monto debe ser un número válido'})
+        if not monto.is_finite():
+            raise ValidationError({'detail': 'El monto debe ser un número válido'})
+        if monto <= 0:
+            raise ValidationError({'detail': 'El monto debe ser mayor a 0'})
+        if monto.as_tuple().exponent < -2:
+            raise ValidationError({'detail': 'El monto no puede tener más de 2 decimales'})
+        if monto >= Decimal('1e12'):
+            raise ValidationError({'detail': 'El monto es demasiado grande'})
         
         # Verificar que el grupo existe
         try:
@@ -902,10 +1224,7 @@ class AportacionViewSet(viewsets.ModelViewSet):
             raise ValidationError({'detail': 'El grupo no existe'})
         
         # Verificar que el usuario es miembro del grupo
-        es_miembro = models.UsuarioGrupo.objects.filter(
-            usuario=user,
-            grupo=grupo
-        ).exists()
+        es_miembro = membresias.es_miembro(user, grupo.grupo_id, request)
         if not es_miembro:
             raise ValidationError({'detail': 'No eres miembro de este grupo'})
         
@@ -926,58 +1245,54 @@ class AportacionViewSet(viewsets.ModelViewSet):
         except models.Bolsillo.DoesNotExist:
             raise ValidationError({'detail': 'El bolsillo del grupo no existe o no pertenece al grupo'})
         
-        # Verificar saldo suficiente
-        if bolsillo_usuario.saldo < monto:
-            raise ValidationError({
-                'detail': f'Saldo insuficiente. Tienes ${bolsillo_usuario.saldo}, necesitas ${monto}'
-            })
-        
-        # Crear el egreso del usuario
-        egreso = models.Egreso.objects.create(
-            usuario=user,
-            bolsillo=bolsillo_usuario,
-            monto=monto,
-            fecha=fecha,
-            descripcion=descripcion or f'Aportación al grupo {grupo.nombre}',
-            creado_por=user
-        )
-        
-        # Actualizar saldo del bolsillo del usuario
-        bolsillo_usuario.saldo -= monto
-        bolsillo_usuario.save()
+        # Egreso, ingreso, saldos, resumen y aportación se registran en una sola transacción
+        with transaction.atomic():
+            # Mover el monto entre bolsillos; falla si el saldo del usuario no alcanza
+            saldos.transferir(bolsillo_usuario.bolsillo_id, bolsillo_grupo.bolsillo_id, monto)
         
-        # Crear el ingreso al grupo
-        ingreso = models.Ingreso.objects.create(
-            grupo=grupo,
-            bolsillo=bolsillo_grupo,
-            monto=monto,
-            fecha=fecha,
-            descripcion=descripcion or f'Aportación de {user.nombre or user.email}',
-            creado_por=user
-        )
+            # Crear el egreso del usuario
+            egreso = models.Egreso.objects.create(
+                usuario=user,
+                bolsillo=bolsillo_usuario,
+                monto=monto,
+                fecha=fecha,
+                descripcion=descripcion or f'Aportación al grupo {grupo.nombre}',
+                creado_por=user
+            )
         
-        # Actualizar saldo del bolsillo del grupo
-        bolsillo_grupo.saldo += monto
-        bolsillo_grupo.save()
+            # Crear el ingreso al grupo
+            ingreso = models.Ingreso.objects.create(
+                grupo=grupo,
+                bolsillo=bolsillo_grupo,
+                monto=monto,
+                fecha=fecha,
+                descripcion=descripcion or f'Aportación de {user.nombre or user.email}',
+                creado_por=user
+            )
         
-        # Crear el registro de aportación
-        aportacion = models.Aportacion.objects.create(
-            usuario=user,
-            grupo=grupo,
-            monto=monto,
-            fecha=fecha,
-            descripcion=descripcion,
-            egreso_usuario=egreso,
-            ingreso_grupo=ingreso,
-            bolsillo_usuario=bolsillo_usuario,
-            bolsillo_grupo=bolsillo_grupo
-        )
+            # Actualizar el resumen mensual de ambos propietarios
+            resumenes.Deltas().agregar(egreso).agregar(ingreso).aplicar()
+            
+            # Crear el registro de aportación
+            aportacion = models.Aportacion.objects.create(
+                usuario=user,
+                grupo=grupo,
+                monto=monto,
+                fecha=fecha,
+                descripcion=descripcion,
+                egreso_usuario=egreso,
+                ingreso_grupo=ingreso,
+                bolsillo_usuario=bolsillo_usuario,
+                bolsillo_grupo=bolsillo_grupo
+            )
+            metricas.al_confirmar('aportaciones', [monto])
         
+        saldos.refrescar(bolsillo_usuario, bolsillo_grupo)
         return Response({
             'detail': f'Aportación de ${monto} realizada exitosamente',
             'aportacion_id': aportacion.aportacion_id,
             'egreso_id': egreso.egreso_id,
             'ingreso_id': ingreso.ingreso_id,
-            'nuevo_saldo_usuario': str(bolsillo_usuario.saldo),
-            'nuevo_saldo_grupo': str(bolsillo_grupo.saldo)
+            'nuevo_saldo_usuario': bolsillo_usuario.saldo,
+            'nuevo_saldo_grupo': bolsillo_grupo.saldo
         }, status=status.HTTP_201_CREATED)
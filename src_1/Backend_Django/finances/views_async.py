@@ -0,0 +1,139 @@
+"""
+Vistas asíncronas de solo lectura para estadísticas y dashboard.
+
+Devuelven lo mismo que StatsViewSet.monthly y DashboardViewSet.overview, pero
+las consultas independientes del dashboard (bolsillos, ingresos, egresos por
+categoría y, con ?incluir=, periodos y movimientos recientes) se lanzan a la
+vez, cada una en un hilo con su propia conexión: la latencia queda acotada por
+la consulta más lenta y no por la suma.
+
+El ORM async de Django (aaggregate, async for...) ejecuta todas las consultas
+de una petición en el mismo hilo, una detrás de otra; por eso se usa
+sync_to_async(thread_sensitive=False). Se sirven desde backend/asgi.py
+(uvicorn/daphne); bajo WSGI también responden, pero cada petición ocupa el
+worker completo mientras espera.
+"""
+import asyncio
+
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
+from django.http import HttpResponse
+from django.views import View
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from . import reportes, versiones
+from .renderers import JSONRapidoRenderer
+
+
+def _consulta_en_hilo(consulta):
+    try:
+        return consulta()
+    finally:
+        # El hilo es del pool de asgiref, no de la petición: devolver la
+        # conexión según CONN_MAX_AGE como hace request_finished
+        close_old_connections()
+
+
+async def ejecutar_en_paralelo(consultas):
+    """Ejecuta {nombre: función} a la vez y devuelve {nombre: resultado}."""
+    resultados = await asyncio.gather(*[
+        sync_to_async(_consulta_en_hilo, thread_sensitive=False)(consulta) for consulta in consultas.values()
+    ])
+    return dict(zip(consultas, resultados))
+
+
+class VistaAnaliticaAsync(View):
+    """
+    Base de las vistas: autenticación con las clases de DRF, ETag con las
+    versiones de finances/versiones.py y respuesta con el renderer de la API.
+    Las subclases implementan `preparar` (síncrono) y `calcular` (async).
+    """
+    http_method_names = ['get', 'head', 'options']
+    nombre = None
+
+    async def get(self, request, *args, **kwargs):
+        try:
+            huella, contexto = await sync_to_async(self._inicial)(request)
+        except exceptions.APIException as exc:
+            return self._error(exc)
+        if huella and f'"{huella}"' in [e.strip() for e in request.headers.get('If-None-Match', '').split(',')]:
+            return self._con_etag(HttpResponse(status=status.HTTP_304_NOT_MODIFIED), huella)
+        datos = await self.calcular(contexto)
+        response = HttpResponse(JSONRapidoRenderer().render(datos), content_type='application/json')
+        return self._con_etag(response, huella) if huella else response
+
+    def _inicial(self, request):
+        drf_request = Request(request, authenticators=[clase() for clase in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+        if not drf_request.user or drf_request.user.is_anonymous:
+            raise exceptions.NotAuthenticated()
+        contexto = self.preparar(drf_request)
+        alcances = versiones.alcances_peticion(drf_request.user, drf_request.query_params.get('grupo_id'), drf_request)
+        huella = versiones.huella(drf_request, self.nombre, alcances) if alcances else None
+        return huella, contexto
+
+    def preparar(self, request):
+        """Valida los parámetros (en el hilo de la petición) y devuelve lo que necesita `calcular`."""
+        raise NotImplementedError
+
+    async def calcular(self, contexto):
+        raise NotImplementedError
+
+    def _error(self, exc):
+        response = HttpResponse(
+            JSONRapidoRenderer().render(exc.detail if isinstance(exc.detail, dict) else {'detail': exc.detail}),
+            content_type='application/json',
+            status=exc.status_code,
+        )
+        if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+            response.status_code = status.HTTP_401_UNAUTHORIZED
+            response['WWW-Authenticate'] = 'Token'
+        return response
+
+    def _con_etag(self, response, huella):
+        response['ETag'] = f'"{huella}"'
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class DashboardOverviewAsync(VistaAnaliticaAsync):
+    """
+    Igual que /api/dashboard/overview/ con las consultas en paralelo.
+    Parámetros: grupo_id, fecha_desde, fecha_hasta e incluir (periodos, recientes).
+    """
+    nombre = 'dashboard'
+
+    def preparar(self, request):
+        filtro = reportes.filtro_propietario(request.user, request.query_params.get('grupo_id'), request)
+        fechas = reportes.rango_fechas(
+            request.query_params.get('fecha_desde'),
+            request.query_params.get('fecha_hasta'),
+        )
+        incluir = reportes.leer_incluir(request.query_params.get('incluir'))
+        return reportes.consultas_dashboard(filtro, fechas, incluir)
+
+    async def calcular(self, consultas):
+        return reportes.armar_dashboard(await ejecutar_en_paralelo(consultas))
+
+
+class StatsMonthlyAsync(VistaAnaliticaAsync):
+    """
+    Igual que /api/stats/monthly/ (una sola consulta agregada, fuera del bucle de eventos).
+    Parámetros: grupo_id, group_by (month|year), periods y reference.
+    """
+    nombre = 'stats'
+
+    def preparar(self, request):
+        filtro = reportes.filtro_propietario(request.user, request.query_params.get('grupo_id'), request)
+        group_by = request.query_params.get('group_by', 'month')
+        periods = request.query_params.get('periods', 6)
+        reference = request.query_params.get('reference')
+        # Validar los parámetros aquí para responder 400 antes de ir al hilo de la consulta
+        reportes.rango_periodos(group_by, periods, reference)
+        return group_by, lambda: reportes.totales_por_periodo(filtro, group_by=group_by, periods=periods, reference=reference)
+
+    async def calcular(self, contexto):
+        group_by, consulta = contexto
+        resultados = await ejecutar_en_paralelo({'periodos': consulta})
+        return {'group_by': group_by, 'periodos': resultados['periodos']}
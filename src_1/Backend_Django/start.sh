@@ -6,5 +6,10 @@ python manage.py migrate --noinput
 # Collect static files
 python manage.py collectstatic --noinput
 
+# Directorio compartido de métricas entre workers; en cada arranque se borran
+# solo los archivos de métricas propios, nunca el directorio
+export DJANGO_METRICAS_DIR="${DJANGO_METRICAS_DIR:-/tmp/finanzas-metricas}"
+mkdir -p "$DJANGO_METRICAS_DIR" && rm -f "$DJANGO_METRICAS_DIR"/metricas-*.json*
+
 # Start Gunicorn server
 gunicorn backend.wsgi --bind 0.0.0.0:$PORT
@@ -62,55 +62,29 @@ export async function getOverview(grupoId = null) {
   const params = grupoId ? { grupo_id: grupoId } : {}
   
   try {
-    const [pocketsRes, ingresosRes, egresosRes] = await Promise.all([
-      api.get('/bolsillos/', { params }),
-      api.get('/ingresos/', { params }),
-      api.get('/egresos/', { params }),
-    ])
-    
-    // Extraer datos de la respuesta
-    const pocketsData = Array.isArray(pocketsRes?.data) ? pocketsRes.data : (Array.isArray(pocketsRes) ? pocketsRes : [])
-    const ingresosData = Array.isArray(ingresosRes?.data) ? ingresosRes.data : (Array.isArray(ingresosRes) ? ingresosRes : [])
-    const egresosData = Array.isArray(egresosRes?.data) ? egresosRes.data : (Array.isArray(egresosRes) ? egresosRes : [])
-
-    console.log('Backend Response - Pockets:', pocketsData)
-    console.log('Backend Response - Ingresos:', ingresosData)
-    console.log('Backend Response - Egresos:', egresosData)
-
-    // Procesar bolsillos
-    const pockets = pocketsData.map(p => ({
-      name: p.nombre ?? p.name ?? 'Sin nombre',
-      amount: Number(p.balance ?? p.saldo ?? 0),
+    // Totales y agrupaciones calculados en el backend con consultas agregadas
+    const res = await api.get('/dashboard/overview/', { params })
+    const data = res?.data || {}
+
+    const pockets = (data.bolsillos || []).map(p => ({
+      name: p.nombre ?? 'Sin nombre',
+      amount: Number(p.saldo ?? 0),
       color: p.color || '#3b82f6',
     }))
 
-    // Calcular totales
-    const ingresos = ingresosData.reduce((a, b) => a + Number(b.monto ?? b.amount ?? 0), 0)
-    const egresos = egresosData.reduce((a, b) => a + Number(b.monto ?? b.amount ?? 0), 0)
-    const neto = ingresos - egresos
-    const totalBalance = pocketsData.reduce((s, p) => s + Number(p.balance ?? p.saldo ?? 0), 0)
-
-    console.log('Calculated totals:', { totalBalance, ingresos, egresos, neto })
-
     // Estadísticas
     const stats = [
-      { title: 'Balance Total', value: totalBalance, icon: '👛' },
-      { title: 'Ingresos', value: ingresos, icon: '📈' },
-      { title: 'Gastos', value: egresos, icon: '📉' },
-      { title: 'Balance Neto', value: neto, icon: '🎯' },
+      { title: 'Balance Total', value: Number(data.saldo_total ?? 0), icon: '👛' },
+      { title: 'Ingresos', value: Number(data.ingresos ?? 0), icon: '📈' },
+      { title: 'Gastos', value: Number(data.egresos ?? 0), icon: '📉' },
+      { title: 'Balance Neto', value: Number(data.neto ?? 0), icon: '🎯' },
     ]
 
     // categorías de egresos
-    const catMap = {}
-    egresosData.forEach(t => {
-      const k = t.categoria?.nombre ?? t.categoria ?? t.category ?? 'Otros'
-      catMap[k] = (catMap[k] || 0) + Number(t.monto ?? t.amount ?? 0)
-    })
-    const totalCat = Object.values(catMap).reduce((a,b)=>a+b,0) || 1
-    const categories = Object.entries(catMap).map(([name, val]) => ({ 
-      name, 
-      amount: val,
-      percent: Math.round((val/totalCat)*100) 
+    const categories = (data.categorias || []).map(c => ({
+      name: c.nombre ?? 'Otros',
+      amount: Number(c.total ?? 0),
+      percent: c.porcentaje ?? 0,
     }))
 
     return { stats, pockets, categories }